@@ -0,0 +1,155 @@
+"""
+Test de charge du handler de commandes du bot Telegram : N utilisateurs
+envoient une commande en même temps, avec un Ollama factice (latence fixe,
+asynchrone) et un embedding factice bloquant. Compare le traitement une mise à
+jour à la fois (comportement par défaut de python-telegram-bot) et le
+traitement concurrent, et affiche les latences p50/p99 du handler.
+
+    python scripts/bench_bot_concurrency.py --users 20 --llm-latency 2 --embed-latency 0.05
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import chromadb
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from bench_sync_memory import FakeEmbeddingFunction
+from stub_woocommerce_server import generate_products
+
+MESSAGES = [
+    "Salut, j'aurais besoin de 2 fûts de jonquille et 3 cartons de pointe stp",
+    "Bonjour, 4 cartons de insolente svp",
+    "1 fût de boucane et 2 cartons de stout merci",
+    "Hello, 6 bouteilles de gueuze et 2 cartons de lager",
+]
+
+
+class SlowEmbeddingFunction(FakeEmbeddingFunction):
+    """Embedding factice qui bloque le thread comme le ferait le modèle (coût par appel et par texte)"""
+
+    def __init__(self, latency: float, per_text: float = 0.0):
+        self.latency = latency
+        self.per_text = per_text
+
+    def __call__(self, input):
+        time.sleep(self.latency + self.per_text * len(input))
+        return super().__call__(input)
+
+
+class FakeOllama:
+    """Client Ollama asynchrone factice à latence fixe"""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    async def chat(self, model, messages, stream=False, **kwargs):
+        await asyncio.sleep(self.latency)
+        response = {'message': {'content': "Merci pour votre commande !"}}
+        if stream:
+            return self._stream(response)
+        return response
+
+    async def _stream(self, response):
+        yield response
+
+
+class FakeMessage:
+    def __init__(self, text: str):
+        self.text = text
+        self.replies = []
+
+    async def reply_text(self, text, **kwargs):
+        self.replies.append(text)
+        return FakeMessage(text)
+
+    async def edit_text(self, text, **kwargs):
+        self.text = text
+
+
+def build_catalog(path: str, size: int):
+    """Remplit une base ChromaDB avec un catalogue synthétique"""
+    from src.sync_woocommerce import WooCommerceSyncer
+
+    syncer = WooCommerceSyncer.__new__(WooCommerceSyncer)
+    processed = [syncer.process_product(p) for p in generate_products(size)]
+    documents = [syncer.build_document(p) for p in processed]
+    collection = chromadb.PersistentClient(path=path).get_or_create_collection(
+        name="products", embedding_function=FakeEmbeddingFunction()
+    )
+    collection.add(ids=[p['id'] for p in processed], documents=documents,
+                   metadatas=[syncer.compact_metadata(p) for p in processed])
+
+
+async def run_users(telegram_bot, bot, users: int, concurrency: int):
+    """Envoie une commande par utilisateur au même instant, renvoie les latences"""
+    semaphore = asyncio.Semaphore(concurrency)
+    user_id = telegram_bot.AUTHORIZED_USERS[0] if telegram_bot.AUTHORIZED_USERS else 1
+    context = SimpleNamespace(bot_data={'lapaisee_bot': bot}, args=[])
+    start = time.perf_counter()
+
+    async def user(i: int) -> float:
+        update = SimpleNamespace(
+            effective_user=SimpleNamespace(id=user_id, username=f"user{i}", first_name="Test", last_name=None),
+            message=FakeMessage(MESSAGES[i % len(MESSAGES)]),
+        )
+        async with semaphore:
+            await telegram_bot.process_order(update, context)
+        return time.perf_counter() - start
+
+    return await asyncio.gather(*(user(i) for i in range(users)))
+
+
+def percentile(values, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latence du handler de commandes sous charge")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--products", type=int, default=500)
+    parser.add_argument("--llm-latency", type=float, default=2.0)
+    parser.add_argument("--embed-latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    os.environ.update({
+        "CHROMA_PERSIST_DIRECTORY": os.path.join(tmp, "chromadb"),
+        "EMBEDDING_CACHE_PATH": os.path.join(tmp, "embedding_cache.sqlite"),
+        "LLM_SLOTS_DIR": os.path.join(tmp, "llm_slots"),
+        # L'Ollama factice sert toutes les générations en parallèle
+        "LLM_SLOTS": str(args.users),
+    })
+
+    from loguru import logger
+    logger.remove()
+    build_catalog(os.environ["CHROMA_PERSIST_DIRECTORY"], args.products)
+
+    from src.ai.response_cache import ResponseCache
+    from src.bot import telegram_bot
+    logger.remove()
+
+    bot = telegram_bot.LapaiseeBot()
+    bot.products_collection = bot.chroma_client.get_collection(
+        name="products", embedding_function=SlowEmbeddingFunction(args.embed_latency)
+    )
+    bot.ollama_client = FakeOllama(args.llm_latency)
+    # Cache de réponses neutralisé (expiration immédiate) : chaque commande sollicite le LLM
+    bot.response_cache = ResponseCache(ttl=0)
+
+    for label, concurrency in (("une à la fois", 1), ("concurrent", telegram_bot.BOT_CONCURRENT_UPDATES)):
+        latencies = asyncio.run(run_users(telegram_bot, bot, args.users, concurrency))
+        print(f"{label:>14} : p50 {statistics.median(latencies):6.2f}s, p99 {percentile(latencies, 0.99):6.2f}s, "
+              f"total {max(latencies):6.2f}s pour {args.users} utilisateurs")
+
+
+if __name__ == "__main__":
+    main()
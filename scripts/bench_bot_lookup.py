@@ -0,0 +1,75 @@
+"""
+Compare la recherche des articles d'une commande article par article
+(une requête ChromaDB chacun) et en lot (un embedding et une requête pour
+toute la commande), pour des commandes de 1 à 5 lignes.
+
+    python scripts/bench_bot_lookup.py --call-latency 0.02 --per-text 0.003
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from bench_bot_concurrency import SlowEmbeddingFunction, build_catalog
+
+ITEMS = [
+    {'product': 'jonquille', 'container': 'fût'},
+    {'product': 'pointe', 'container': 'carton'},
+    {'product': 'insolente', 'container': 'carton'},
+    {'product': 'gueuze', 'container': 'bouteille'},
+    {'product': 'boucane', 'container': None},
+]
+
+
+def timed(func, repeat: int) -> float:
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recherche des articles d'une commande : une à une ou en lot")
+    parser.add_argument("--products", type=int, default=500)
+    parser.add_argument("--call-latency", type=float, default=0.02, help="Coût fixe d'un appel au modèle")
+    parser.add_argument("--per-text", type=float, default=0.003, help="Coût par texte embeddé")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    os.environ.update({
+        "CHROMA_PERSIST_DIRECTORY": os.path.join(tmp, "chromadb"),
+        "EMBEDDING_CACHE_PATH": os.path.join(tmp, "embedding_cache.sqlite"),
+        "LLM_SLOTS_DIR": os.path.join(tmp, "llm_slots"),
+    })
+
+    from loguru import logger
+    logger.remove()
+    build_catalog(os.environ["CHROMA_PERSIST_DIRECTORY"], args.products)
+
+    from src.bot import telegram_bot
+    logger.remove()
+
+    # Mesure du seul chemin vectoriel : l'index lexical est court-circuité
+    telegram_bot.LEXICAL_MIN_CONFIDENCE = 2.0
+    bot = telegram_bot.LapaiseeBot()
+    bot.products_collection = bot.chroma_client.get_collection(
+        name="products", embedding_function=SlowEmbeddingFunction(args.call_latency, args.per_text)
+    )
+
+    for lines in range(1, len(ITEMS) + 1):
+        items = ITEMS[:lines]
+        one_by_one = timed(lambda: [bot.search_product(i['product'], i['container']) for i in items], args.repeat)
+        batch = timed(lambda: bot.search_products(items), args.repeat)
+        print(f"{lines} ligne(s) : article par article {one_by_one * 1000:6.1f} ms, en lot {batch * 1000:6.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
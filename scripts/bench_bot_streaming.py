@@ -0,0 +1,134 @@
+"""
+Mesure le délai avant le premier texte utile affiché par le bot, avec un
+backend Ollama factice qui émet un bloc <think> puis la réponse, token par
+token, chacun découpé au hasard (balises coupées comprises). Compare la réponse
+complète (generate_response), le mode streaming (send_streamed_response) et une
+réponse servie par le cache, et vérifie que le raisonnement n'apparaît jamais
+dans les messages édités.
+
+    python scripts/bench_bot_streaming.py --think-tokens 400 --answer-tokens 150 --token-rate 100
+"""
+
+import argparse
+import asyncio
+import random
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+ORDER = {'items': [], 'greeting': True, 'polite': True, 'original_text': "2 fûts de jonquille"}
+STOCK_CHECK = [{
+    'item': {'quantity': 2, 'container': 'fût', 'product': 'jonquille'},
+    'product': {'name': "Jonquille Fût 20L", 'stock_quantity': 5},
+    'available': True,
+    'message': "✅ Jonquille Fût 20L: 5 en stock (demande: 2)",
+}]
+
+
+class FakeStreamingOllama:
+    """Émet `<think>...</think>` puis la réponse à `token_rate` tokens par seconde"""
+
+    def __init__(self, think_tokens: int, answer_tokens: int, token_rate: float, seed: int = 1):
+        self.answer = " ".join(f"réponse{i}" for i in range(answer_tokens))
+        self.raw = "<think>\n" + " ".join(f"raisonnement{i}" for i in range(think_tokens)) + "\n</think>\n\n" + self.answer
+        self.tokens = len(re.findall(r'\S+\s*', self.raw))
+        self.token_rate = token_rate
+        self.rng = random.Random(seed)
+
+    def chunks(self):
+        """Le texte brut token par token, chaque token coupé en 1 à 3 morceaux"""
+        for token in re.findall(r'\S+\s*', self.raw):
+            cuts = sorted(self.rng.sample(range(1, len(token)), min(2, len(token) - 1))) if len(token) > 1 else []
+            bounds = [0, *cuts, len(token)]
+            yield [token[start:end] for start, end in zip(bounds, bounds[1:])]
+
+    async def chat(self, model, messages, stream=False, **kwargs):
+        if not stream:
+            await asyncio.sleep(self.tokens / self.token_rate)
+            return {'message': {'content': self.raw}}
+        return self._stream()
+
+    async def _stream(self):
+        for pieces in self.chunks():
+            await asyncio.sleep(1 / self.token_rate)
+            for piece in pieces:
+                yield {'message': {'content': piece}}
+
+
+class RecordingMessage:
+    """Message Telegram factice qui horodate chaque édition"""
+
+    def __init__(self, start: float):
+        self.start = start
+        self.edits = []
+
+    async def edit_text(self, text, **kwargs):
+        self.edits.append((time.perf_counter() - self.start, text))
+
+    async def reply_text(self, text, **kwargs):
+        self.edits.append((time.perf_counter() - self.start, text))
+
+
+async def run(bot, backend):
+    from src.ai.response_cache import ResponseCache
+
+    bot.ollama_client = backend
+    # Pas de cache (expiration immédiate) pour comparer les deux modes de génération
+    bot.response_cache = ResponseCache(ttl=0)
+
+    start = time.perf_counter()
+    full = await bot.generate_response(ORDER, STOCK_CHECK)
+    blocking = time.perf_counter() - start
+
+    message = RecordingMessage(time.perf_counter())
+    await bot.send_streamed_response(message, ORDER, STOCK_CHECK)
+
+    # Même commande une seconde fois, avec le cache de réponses
+    bot.response_cache = ResponseCache()
+    await bot.send_streamed_response(RecordingMessage(time.perf_counter()), ORDER, STOCK_CHECK)
+    cached = RecordingMessage(time.perf_counter())
+    await bot.send_streamed_response(cached, ORDER, STOCK_CHECK)
+    return full, blocking, message.edits, cached.edits
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Délai avant le premier texte utile, avec ou sans streaming")
+    parser.add_argument("--think-tokens", type=int, default=400)
+    parser.add_argument("--answer-tokens", type=int, default=150)
+    parser.add_argument("--token-rate", type=float, default=100.0, help="Tokens générés par seconde")
+    parser.add_argument("--edit-interval", type=float, default=1.0)
+    args = parser.parse_args()
+
+    from loguru import logger
+    logger.remove()
+    from src.bot import telegram_bot
+    from src.ai.llm_scheduler import LLMScheduler
+    from src.bot.telegram_bot import LapaiseeBot
+    logger.remove()
+
+    telegram_bot.BOT_STREAM_EDIT_INTERVAL = args.edit_interval
+    # Seules les méthodes de génération sont utilisées : pas de ChromaDB
+    bot = LapaiseeBot.__new__(LapaiseeBot)
+    bot.llm_scheduler = LLMScheduler(slots_dir=tempfile.mkdtemp())
+    backend = FakeStreamingOllama(args.think_tokens, args.answer_tokens, args.token_rate)
+
+    full, blocking, edits, cached_edits = asyncio.run(run(bot, backend))
+
+    leaked = [text for _, text in edits if 'raisonnement' in text or '<think' in text or 'think>' in text]
+    final_ok = edits and edits[-1][1] == backend.answer and full == backend.answer \
+        and cached_edits[-1][1] == backend.answer
+
+    print(f"Réponse complète : premier texte après {blocking:6.2f}s")
+    print(f"Streaming        : premier texte après {edits[0][0]:6.2f}s, dernier après {edits[-1][0]:6.2f}s, "
+          f"{len(edits)} éditions")
+    print(f"Réponse en cache : premier texte après {cached_edits[0][0] * 1000:6.2f}ms")
+    print(f"Raisonnement affiché : {'oui' if leaked else 'non'}, texte final identique : {'oui' if final_ok else 'non'}")
+    sys.exit(0 if final_ok and not leaked else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Analyses de l'onglet « Analyses » calculées sur tout le catalogue, comparées
+à l'ancienne approche (20 résultats de recherche vectorielle sur « stock »
+confiés au LLM) : temps de calcul, et part des vrais résultats que les 20
+documents récupérés contenaient.
+
+    python scripts/bench_catalog_analytics.py --products 2000
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import chromadb
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from bench_bot_concurrency import SlowEmbeddingFunction, build_catalog
+
+
+def timed(function, repeat: int = 20) -> float:
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyses du stock : pandas contre recherche vectorielle")
+    parser.add_argument("--products", type=int, default=2000)
+    parser.add_argument("--embed-latency", type=float, default=0.03)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    os.environ.update({
+        "CATALOG_VERSION_FILE": os.path.join(tmp, "catalog_version.json"),
+        "CATALOG_VERSION_CHECK_SECONDS": "0",
+    })
+
+    from loguru import logger
+    logger.remove()
+    build_catalog(os.path.join(tmp, "chromadb"), args.products)
+
+    from src.ai.catalog_analytics import CatalogAnalytics
+    from src.utils.catalog_version import bump_catalog_version
+
+    collection = chromadb.PersistentClient(path=os.path.join(tmp, "chromadb")).get_collection(
+        name="products", embedding_function=SlowEmbeddingFunction(args.embed_latency)
+    )
+    analytics = CatalogAnalytics(collection)
+
+    start = time.perf_counter()
+    analytics.frame()
+    print(f"Chargement du catalogue : {len(analytics.frame())} produits en {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    analyses = {
+        'top 5 stock': lambda: analytics.top_stock(5),
+        'ruptures': analytics.out_of_stock,
+        'stock bas': analytics.low_stock,
+        'clean disponibles': lambda: analytics.available('clean'),
+        'wild disponibles': lambda: analytics.available('wild'),
+        'par gamme': analytics.gamme_breakdown,
+    }
+    for label, analysis in analyses.items():
+        print(f"{label:18} : {len(analysis()):5} lignes en {timed(analysis) * 1000:6.2f} ms")
+
+    # Ancienne approche : le LLM ne voyait que 20 documents proches de "stock" / "rupture stock"
+    for label, query, expected in (
+        ('top 5 stock', "stock", set(analytics.top_stock(5).index)),
+        ('ruptures', "rupture stock", set(analytics.out_of_stock().index)),
+    ):
+        start = time.perf_counter()
+        seen = set(collection.query(query_texts=[query], n_results=20)['ids'][0])
+        elapsed = time.perf_counter() - start
+        print(f"Recherche vectorielle « {query} » ({elapsed * 1000:.0f} ms avant le LLM) : "
+              f"{len(seen & expected)}/{len(expected)} des vrais résultats « {label} » dans le contexte")
+
+    bump_catalog_version("bench")
+    start = time.perf_counter()
+    analytics.top_stock(5)
+    print(f"Après une synchro : rechargement + analyse en {(time.perf_counter() - start) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
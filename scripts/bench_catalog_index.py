@@ -0,0 +1,142 @@
+"""
+Latence et exactitude de l'index lexical du catalogue sur les messages de
+src/bot/test_parser.py (plus quelques SKU, alias et fautes de frappe),
+comparées à la recherche vectorielle seule.
+
+    python scripts/bench_catalog_index.py --products 500
+    python scripts/bench_catalog_index.py --real-embeddings   # exactitude du repli vectoriel réel
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from bench_bot_concurrency import SlowEmbeddingFunction, build_catalog
+
+# Mot attendu dans le nom du produit trouvé, par requête extraite des messages
+# (None : produit absent du catalogue synthétique, le repli vectoriel est attendu)
+EXPECTED = {
+    'jonquille': 'jonquille',
+    'pointe': 'pointe',
+    'wild': 'wild',
+    '12 canettes de ipa svp': 'ipa',
+    'stout pour demain': 'stout',
+    'bizule merci': None,
+}
+
+# Requêtes supplémentaires : (texte, contenant, mot attendu)
+EXTRA_QUERIES = [
+    ('LAP-00042', None, 'sku'),
+    ('jonquile', 'fût', 'jonquille'),
+    ('goap', None, 'get oat and play'),
+    ('insolante', 'carton', 'insolente'),
+    ('double ipa', None, 'insolente'),
+    ('gueuze', 'bouteille', 'gueuze'),
+    ('ipa fumée', None, 'boucane'),
+    ('maousse', None, 'maousse'),
+]
+
+
+def timed(func, repeat: int) -> float:
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Index lexical du catalogue : latence et exactitude")
+    parser.add_argument("--products", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--real-embeddings", action="store_true",
+                        help="Repli vectoriel avec le vrai modèle (sinon embedding factice)")
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    os.environ.update({
+        "CHROMA_PERSIST_DIRECTORY": os.path.join(tmp, "chromadb"),
+        "EMBEDDING_CACHE_PATH": os.path.join(tmp, "embedding_cache.sqlite"),
+        "LLM_SLOTS_DIR": os.path.join(tmp, "llm_slots"),
+        "CATALOG_VERSION_FILE": os.path.join(tmp, "catalog_version.json"),
+    })
+
+    from loguru import logger
+    logger.remove()
+
+    from src.ai.catalog_index import CatalogIndex, normalize
+    from src.bot import telegram_bot
+    from src.bot.test_parser import TEST_MESSAGES
+    from src.ai.embedding_cache import get_embedding_function
+    logger.remove()
+
+    if args.real_embeddings:
+        import chromadb
+        from src.sync_woocommerce import WooCommerceSyncer
+        from stub_woocommerce_server import generate_products
+
+        syncer = WooCommerceSyncer.__new__(WooCommerceSyncer)
+        processed = [syncer.process_product(p) for p in generate_products(args.products)]
+        chromadb.PersistentClient(path=os.environ["CHROMA_PERSIST_DIRECTORY"]).get_or_create_collection(
+            name="products", embedding_function=get_embedding_function()
+        ).add(ids=[p['id'] for p in processed], documents=[syncer.build_document(p) for p in processed],
+              metadatas=[syncer.compact_metadata(p) for p in processed])
+    else:
+        build_catalog(os.environ["CHROMA_PERSIST_DIRECTORY"], args.products)
+
+    bot = telegram_bot.LapaiseeBot()
+    if not args.real_embeddings:
+        bot.products_collection = bot.chroma_client.get_collection(
+            name="products", embedding_function=SlowEmbeddingFunction(0.02, 0.003)
+        )
+    index = CatalogIndex(bot.products_collection)
+    bot.catalog_index = index
+
+    sku_name = normalize(bot.products_collection.get(ids=['42'])['metadatas'][0]['name'])
+    cases = []
+    for message in TEST_MESSAGES:
+        for item in bot.parse_order(message)['items']:
+            cases.append((item['product'], item['container'], EXPECTED.get(item['product'])))
+    cases += [(query, container, sku_name if expected == 'sku' else expected)
+              for query, container, expected in EXTRA_QUERIES]
+
+    build = timed(lambda: index.refresh(force=True), 5)
+    print(f"Construction de l'index ({args.products} produits) : {build * 1000:.1f} ms\n")
+
+    lexical_ok = vector_ok = answered = 0
+    lexical_times = []
+    vector_times = []
+    for query, container, expected in cases:
+        lexical_times.append(timed(lambda: index.lookup(query), args.repeat))
+        candidates, confidence = index.lookup(query)
+        found = bot.filter_by_container(candidates, container)
+        lexical_hit = bool(found) and confidence >= telegram_bot.LEXICAL_MIN_CONFIDENCE
+        answered += lexical_hit
+
+        vector_times.append(timed(lambda: bot.products_collection.query(
+            query_texts=[bot.build_query(query, container)], n_results=5), 3))
+        vector = bot.filter_by_container(bot.products_collection.query(
+            query_texts=[bot.build_query(query, container)], n_results=5)['metadatas'][0], container)
+
+        top = normalize(found[0]['name']) if lexical_hit else None
+        ok = (expected is None and not lexical_hit) or (expected is not None and top is not None and expected in top)
+        lexical_ok += ok
+        vector_ok += bool(vector) and expected is not None and expected in normalize(vector[0]['name'])
+        print(f"{'✅' if ok else '❌'} {query!r:28} ({container or '-':9}) -> "
+              f"{found[0]['name'] if lexical_hit else 'repli vectoriel':30} confiance {confidence:.2f}")
+
+    print(f"\nIndex lexical : {lexical_ok}/{len(cases)} corrects, {answered}/{len(cases)} sans repli, "
+          f"latence médiane {statistics.median(lexical_times) * 1e6:.0f} µs")
+    print(f"Vectoriel seul : {vector_ok}/{len(cases)} corrects"
+          f"{'' if args.real_embeddings else ' (embedding factice, non significatif)'}, "
+          f"latence médiane {statistics.median(vector_times) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Vérifie que ProductClassifier produit exactement la même sortie que l'ancien
+WooCommerceSyncer.classify_product (copie figée ci-dessous), puis compare les
+débits sur un catalogue synthétique.
+
+    python scripts/bench_classifier.py --products 100000
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from src.ai.product_classifier import PRODUCT_CLASSIFIER
+from stub_woocommerce_server import generate_products
+
+# Noms qui exercent les chevauchements et priorités entre règles
+EDGE_NAMES = [
+    "Carton 24x Wild", "carton 12 x Pointe", "Jonquille KeyKeg", "FÛT Lambic", "fut de stout",
+    "Carton de 24 Gueuze 33cl", "6x 75cl Mixte", "carton 6 Spontané", "Pale Ale 440ml",
+    "Wild 750ml", "112x IPA", "Carton 12x 24x", "Pilsner", "", "Insolente", "Lager 330ml",
+    "STOUT 44CL", "carton 24 canettes", "Gueuze 24 x 33cl", "keg 12x", "İstanbul IPA 12x",
+]
+
+
+def legacy_classify_product(product):
+    """Copie figée de WooCommerceSyncer.classify_product avant la table de règles"""
+    name = product.get('name', '').lower()
+    categories = [cat['name'].lower() for cat in product.get('categories', [])]
+
+    classification = {
+        'type': 'unknown',
+        'format': 'unknown',
+        'gamme': 'unknown',
+        'container_type': 'unknown'
+    }
+
+    if any(term in name for term in ['ipa', 'lager', 'stout', 'pilsner', 'pale ale', 'jonquille', 'pointe']):
+        classification['gamme'] = 'clean'
+        classification['container_type'] = 'canette'
+    elif any(term in name for term in ['wild', 'spontané', 'mixte', 'lambic', 'gueuze']):
+        classification['gamme'] = 'wild'
+        classification['container_type'] = 'bouteille'
+
+    if 'fût' in name or 'fut' in name or 'keg' in name:
+        classification['format'] = 'fût 20L'
+        classification['container_type'] = 'fût'
+    elif '12x' in name.lower() or '12 x' in name.lower():
+        classification['format'] = 'carton 12 canettes 44cl'
+        classification['container_type'] = 'carton'
+        classification['gamme'] = 'clean'
+    elif '24x' in name.lower() or '24 x' in name.lower() or 'carton de 24' in name.lower():
+        classification['format'] = 'carton 24 bouteilles 33cl'
+        classification['container_type'] = 'carton'
+    elif '12x' in name.lower() or '12 x' in name.lower() or 'carton 12' in name.lower():
+        classification['format'] = 'carton 12 canettes 44cl'
+    elif '24x' in name.lower() or '24 x' in name.lower() or 'carton 24' in name.lower() or 'carton de 24' in name.lower():
+        classification['format'] = 'carton 24 bouteilles 33cl'
+    elif '6x' in name or 'carton 6' in name:
+        classification['format'] = 'carton 6 bouteilles 75cl'
+    elif '75cl' in name or '750ml' in name:
+        classification['format'] = 'bouteille 75cl'
+    elif '33cl' in name or '330ml' in name:
+        classification['format'] = 'bouteille 33cl'
+    elif '44cl' in name or '440ml' in name:
+        classification['format'] = 'canette 44cl'
+
+    return classification
+
+
+def synthetic_names(count: int):
+    """Noms du catalogue factice, mélangés de fragments pour varier les combinaisons"""
+    rng = random.Random(7)
+    names = [p['name'] for p in generate_products(count)]
+    fragments = [" carton", " 12 x", " 24x", " keg", " 6x", " 330ml", " de 24", ""]
+    return [name + rng.choice(fragments) for name in names] + EDGE_NAMES
+
+
+def check_golden(names) -> int:
+    """Compare les trois chemins de classification à la référence, renvoie le nombre d'écarts"""
+    batch = PRODUCT_CLASSIFIER.classify_many(names)
+    errors = 0
+    for name, batched in zip(names, batch):
+        expected = legacy_classify_product({'name': name})
+        single = PRODUCT_CLASSIFIER.classify({'name': name})
+        if single != expected or batched != expected:
+            errors += 1
+            if errors <= 10:
+                print(f"ÉCART '{name}': attendu {expected}, obtenu {single} / {batched}")
+    return errors
+
+
+def timed(label: str, func, count: int) -> float:
+    start = time.perf_counter()
+    func()
+    duration = time.perf_counter() - start
+    print(f"{label:<28} {duration:6.2f}s  {count / duration:>10,.0f} noms/s")
+    return duration
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Golden test et benchmark du classifieur")
+    parser.add_argument("--products", type=int, default=100000)
+    parser.add_argument("--page-size", type=int, default=100)
+    args = parser.parse_args()
+
+    names = synthetic_names(args.products)
+    errors = check_golden(names)
+    print(f"Golden: {len(names) - errors}/{len(names)} identiques")
+
+    products = [{'name': name} for name in names]
+    pages = [names[i:i + args.page_size] for i in range(0, len(names), args.page_size)]
+
+    legacy = timed("Ancien classify_product", lambda: [legacy_classify_product(p) for p in products], len(names))
+    single = timed("ProductClassifier.classify", lambda: [PRODUCT_CLASSIFIER.classify(p) for p in products], len(names))
+    batch = timed("classify_many (par page)", lambda: [PRODUCT_CLASSIFIER.classify_many(p) for p in pages], len(names))
+    print(f"Accélération : x{legacy / single:.1f} unitaire, x{legacy / batch:.1f} par page")
+
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Compare la récupération séquentielle des pages produits (ancienne boucle
+jusqu'à la page vide) au WooCommerceFetcher concurrent, contre le serveur
+WooCommerce factice.
+
+    python scripts/bench_fetch.py --products 2000 --latency 0.3
+"""
+
+import argparse
+import sys
+import threading
+import time
+from pathlib import Path
+
+import requests
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from src.connectors.woocommerce_client import WooCommerceFetcher
+from stub_woocommerce_server import generate_products, make_server
+
+
+def fetch_sequential(base_url: str) -> int:
+    """Reproduit l'ancienne boucle : une page après l'autre jusqu'à une page vide"""
+    count = 0
+    page = 1
+    while True:
+        response = requests.get(f"{base_url}/wp-json/wc/v3/products",
+                                params={"per_page": 100, "page": page, "status": "any"}, timeout=30)
+        products = response.json()
+        if not products:
+            break
+        count += len(products)
+        page += 1
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la récupération des produits")
+    parser.add_argument("--products", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+
+    server = make_server(generate_products(args.products), args.latency)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    start = time.perf_counter()
+    sequential_count = fetch_sequential(base_url)
+    sequential = time.perf_counter() - start
+
+    fetcher = WooCommerceFetcher(url=base_url, consumer_key="ck", consumer_secret="cs",
+                                 max_workers=args.workers)
+    start = time.perf_counter()
+    concurrent_count = len(fetcher.get_all("products", {"status": "any"}))
+    concurrent = time.perf_counter() - start
+
+    server.shutdown()
+
+    print(f"Séquentiel : {sequential_count} produits en {sequential:.2f}s")
+    print(f"Concurrent : {concurrent_count} produits en {concurrent:.2f}s ({args.workers} workers)")
+    print(f"Accélération : x{sequential / concurrent:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Latence des réponses aux commandes quand des analyses occupent déjà Ollama :
+un backend factice sert une génération à la fois, dans l'ordre d'arrivée (comme
+Ollama sur la machine). Des analyses sont lancées, puis des commandes arrivent.
+Compare les appels directs et le passage par LLMScheduler (priorités et
+échéance des commandes, avec repli sur la réponse de secours).
+
+    python scripts/bench_llm_scheduler.py --analyses 4 --orders 3 --service 0.5 --order-deadline 1.5
+"""
+
+import argparse
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from src.ai.llm_scheduler import LLMDeadlineExceeded, LLMScheduler, Priority
+
+
+class SerialBackend:
+    """Ollama factice : une génération de `service` secondes à la fois, premier arrivé premier servi"""
+
+    def __init__(self, service: float):
+        self.service = service
+        self._cond = threading.Condition()
+        self._next = 0
+        self._serving = 0
+
+    def generate(self):
+        with self._cond:
+            ticket = self._next
+            self._next += 1
+            while ticket != self._serving:
+                self._cond.wait()
+        time.sleep(self.service)
+        with self._cond:
+            self._serving += 1
+            self._cond.notify_all()
+
+
+def run(args, scheduler: LLMScheduler = None):
+    """Latences des commandes et des analyses, nombre de replis"""
+    backend = SerialBackend(args.service)
+    latencies = {'order': [], 'analysis': []}
+    fallbacks = []
+
+    def request(kind: str, priority: Priority, deadline: float):
+        start = time.perf_counter()
+        try:
+            if scheduler is None:
+                backend.generate()
+            else:
+                with scheduler.slot(priority, deadline):
+                    backend.generate()
+        except LLMDeadlineExceeded:
+            fallbacks.append(kind)
+        latencies[kind].append(time.perf_counter() - start)
+
+    threads = [
+        threading.Thread(target=request, args=('analysis', Priority.ANALYSIS, 3600))
+        for _ in range(args.analyses)
+    ]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.01)
+
+    time.sleep(args.service / 2)
+    for _ in range(args.orders):
+        thread = threading.Thread(target=request, args=('order', Priority.ORDER, args.order_deadline))
+        thread.start()
+        threads.append(thread)
+        time.sleep(0.01)
+
+    for thread in threads:
+        thread.join()
+    return latencies, fallbacks
+
+
+def report(label: str, latencies, fallbacks):
+    orders = latencies['order']
+    print(f"{label:22} commandes : p50 {statistics.median(orders):5.2f}s, max {max(orders):5.2f}s, "
+          f"{fallbacks.count('order')} replis · analyses : max {max(latencies['analysis']):5.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Commandes clients face aux analyses, avec ou sans ordonnanceur LLM")
+    parser.add_argument("--analyses", type=int, default=4)
+    parser.add_argument("--orders", type=int, default=3)
+    parser.add_argument("--service", type=float, default=0.5, help="Durée d'une génération (s)")
+    parser.add_argument("--order-deadline", type=float, default=1.5, help="Échéance d'une commande (s)")
+    args = parser.parse_args()
+
+    report("appels directs", *run(args))
+
+    scheduler = LLMScheduler(slots=1, slots_dir=tempfile.mkdtemp(), poll_interval=0.01)
+    report("ordonnanceur", *run(args, scheduler))
+    print(f"Métriques : {scheduler.metrics()['classes']}")
+
+    # Échéance intenable : les commandes basculent sur la réponse de secours
+    args.order_deadline = args.service / 4
+    report("échéance trop courte", *run(args, LLMScheduler(slots=1, slots_dir=tempfile.mkdtemp(), poll_interval=0.01)))
+
+
+if __name__ == "__main__":
+    main()
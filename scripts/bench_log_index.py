@@ -0,0 +1,135 @@
+"""
+Lecture des logs : l'ancien bouton (readlines du fichier de synchro) et un
+filtrage « erreurs du bot de la dernière heure » par lecture complète de tous
+les fichiers, comparés à la lecture à reculons et à la recherche indexée
+(src/utils/log_index.py), sur des logs loguru synthétiques avec archives de
+rotation.
+
+    python scripts/bench_log_index.py --archives 3 --size-mb 10
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+MESSAGES = {
+    'INFO': ["Message reçu de {user}: 2 cartons de Jonquille", "Page {n}: 100 produits",
+             "Réponse envoyée en {n} ms", "Stock rafraîchi: {n} produits mis à jour"],
+    'WARNING': ["Ollama lent ({n} ms), réponse de secours", "Produit {n} sans format"],
+    'ERROR': ["Erreur génération réponse: timeout après {n}s", "Erreur API products page {n}: 502"],
+}
+
+
+def write_logs(path: Path, start: datetime, end: datetime, size: int, rng: random.Random):
+    """Fichier loguru d'environ `size` octets couvrant [start, end]"""
+    lines = []
+    written = 0
+    while written < size:
+        lines.append(None)
+        written += 110
+    step = (end - start) / len(lines)
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(len(lines)):
+            moment = start + step * i
+            level = rng.choices(('INFO', 'WARNING', 'ERROR'), weights=(95, 4, 1))[0]
+            message = rng.choice(MESSAGES[level]).format(user=rng.randint(1, 500), n=rng.randint(1, 9999))
+            f.write(f"{moment:%Y-%m-%d %H:%M:%S}.{moment.microsecond // 1000:03d} | {level:<8} | "
+                    f"src.bot.telegram_bot:handle_message:{rng.randint(100, 900)} - {message}\n")
+            if level == 'ERROR' and rng.random() < 0.3:
+                f.write("Traceback (most recent call last):\n  File \"telegram_bot.py\", line 1\nTimeoutError\n")
+    os.utime(path, (end.timestamp(), end.timestamp()))
+
+
+def build_logs(root: Path, archives: int, size: int):
+    rng = random.Random(42)
+    now = datetime.now()
+    for stem in ('telegram_bot', 'sync_woocommerce'):
+        end = now
+        # Fichier actif : les dernières heures ; archives : les jours précédents
+        for i in range(archives + 1):
+            start = end - timedelta(hours=6)
+            name = f"{stem}.log" if i == 0 else f"{stem}.{end:%Y-%m-%d_%H-%M-%S_%f}.log"
+            write_logs(root / name, start, end, size, rng)
+            end = start
+
+
+def full_scan(paths, since: datetime, level: str):
+    """Filtrage sans index : toutes les lignes de tous les fichiers"""
+    results = []
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                if f"| {level}" in line[:40] and datetime.strptime(line[:23], "%Y-%m-%d %H:%M:%S.%f") >= since:
+                    results.append(line)
+    return results
+
+
+def timed(function, repeat: int = 5) -> float:
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Logs : lecture complète contre lecture indexée")
+    parser.add_argument("--archives", type=int, default=3)
+    parser.add_argument("--size-mb", type=float, default=10)
+    args = parser.parse_args()
+
+    tmp = Path(tempfile.mkdtemp())
+    os.environ["LOG_DIR"] = str(tmp)
+    build_logs(tmp, args.archives, int(args.size_mb * 1024 * 1024))
+    total = sum(path.stat().st_size for path in tmp.glob("*.log"))
+    print(f"{len(list(tmp.glob('*.log')))} fichiers, {total / 1024 / 1024:.0f} Mo")
+
+    from src.utils import log_index
+
+    def legacy_tail():
+        with open(tmp / "sync_woocommerce.log", "r") as f:
+            return f.readlines()[-20:]
+
+    print(f"20 dernières lignes, readlines      : {timed(legacy_tail) * 1000:8.2f} ms")
+    print(f"20 dernières lignes, à reculons     : "
+          f"{timed(lambda: log_index.tail(tmp / 'sync_woocommerce.log', 20)) * 1000:8.2f} ms")
+
+    since = datetime.now() - timedelta(hours=1)
+    bot_files = log_index.log_files('bot')
+    start = time.perf_counter()
+    expected = full_scan(bot_files, since, 'ERROR')
+    print(f"Erreurs du bot (1 h), lecture complète : {(time.perf_counter() - start) * 1000:8.2f} ms "
+          f"({len(expected)} résultats)")
+
+    query = lambda: log_index.search(['bot'], levels=['ERROR'], since=since, limit=1000)
+    start = time.perf_counter()
+    query()
+    print(f"Construction des index (une fois)    : {(time.perf_counter() - start) * 1000:8.2f} ms")
+    results = query()
+    print(f"Erreurs du bot (1 h), index          : {timed(query) * 1000:8.2f} ms ({len(results)} résultats)")
+
+    everything = lambda: log_index.search(levels=['WARNING', 'ERROR'], limit=50)
+    print(f"50 derniers avertissements/erreurs, tous composants : {timed(everything) * 1000:8.2f} ms")
+
+    # Le fichier actif grandit : seule la fin est indexée
+    with open(tmp / "telegram_bot.log", "a", encoding='utf-8') as f:
+        moment = datetime.now()
+        f.write(f"{moment:%Y-%m-%d %H:%M:%S}.000 | ERROR    | src.bot.telegram_bot:main:1 - Nouvelle erreur\n")
+    start = time.perf_counter()
+    latest = query()
+    print(f"Après une nouvelle ligne             : {(time.perf_counter() - start) * 1000:8.2f} ms "
+          f"(dernier : {latest[0].message})")
+    sys.exit(0 if len(results) == len(expected) and latest[0].message == "Nouvelle erreur" else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Compare la taille et la latence des résultats de requête ChromaDB entre
+l'ancien schéma de métadonnées (descriptions HTML brutes, nombres en chaînes)
+et le schéma compact (descriptions dans le store de détails).
+
+    python scripts/bench_metadata_payload.py --products 5000 --queries 200
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import chromadb
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from bench_sync_memory import FakeEmbeddingFunction
+from stub_woocommerce_server import generate_products
+
+QUERIES = ["IPA en stock", "bières en fût", "carton de canettes", "Jonquille", "wild bouteille 75cl",
+           "Pointe 12x", "stout", "gueuze", "keg", "lager du lac"]
+
+# Paragraphe type d'une fiche produit WooCommerce
+DESCRIPTION_PARAGRAPH = ("<p>Brassée à L'Apaisée avec des malts suisses et des houblons "
+                         "sélectionnés.<br/>Notes d'agrumes, <strong>amertume franche</strong>, "
+                         "finale sèche.</p>\n")
+
+
+def legacy_metadata(product: dict, classification: dict) -> dict:
+    """Métadonnées telles qu'écrites avant le schéma compact"""
+    metadata = {
+        'id': str(product['id']),
+        'name': product['name'],
+        'sku': product.get('sku', ''),
+        'price': product.get('price', '0'),
+        'stock_quantity': product.get('stock_quantity', 0),
+        'stock_status': product.get('stock_status', 'unknown'),
+        'categories': ', '.join(cat['name'] for cat in product.get('categories', [])),
+        'description': product.get('description', ''),
+        'short_description': product.get('short_description', ''),
+        **classification,
+        'last_sync': '2024-01-01T00:00:00.000000',
+    }
+    return {key: '' if value is None else value for key, value in metadata.items()}
+
+
+def fill_collection(collection, ids, documents, metadatas, embeddings):
+    for i in range(0, len(ids), 1000):
+        collection.add(ids=ids[i:i + 1000], documents=documents[i:i + 1000],
+                       metadatas=metadatas[i:i + 1000], embeddings=embeddings[i:i + 1000])
+
+
+def measure(collection, queries, n_results):
+    sizes = []
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        results = collection.query(query_texts=[query], n_results=n_results)
+        latencies.append(time.perf_counter() - start)
+        sizes.append(len(json.dumps({key: results[key] for key in ('ids', 'metadatas', 'documents', 'distances')},
+                                    ensure_ascii=False).encode("utf-8")))
+    return statistics.mean(sizes), statistics.median(latencies), sorted(latencies)[int(len(latencies) * 0.99) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Taille et latence des résultats par schéma de métadonnées")
+    parser.add_argument("--products", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--n-results", type=int, default=10)
+    parser.add_argument("--paragraphs", type=int, default=6, help="Paragraphes HTML par description")
+    args = parser.parse_args()
+
+    from loguru import logger
+    logger.remove()
+    from src.sync_woocommerce import WooCommerceSyncer
+    from src.ai.product_classifier import PRODUCT_CLASSIFIER
+
+    products = generate_products(args.products)
+    for product in products:
+        product['description'] += DESCRIPTION_PARAGRAPH * args.paragraphs
+
+    # Méthodes du syncer sans ses connexions (pas d'appel à __init__)
+    syncer = WooCommerceSyncer.__new__(WooCommerceSyncer)
+    embedding_function = FakeEmbeddingFunction()
+    queries = [QUERIES[i % len(QUERIES)] for i in range(args.queries)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        client = chromadb.PersistentClient(path=tmp)
+        layouts = {}
+        ids = [str(p['id']) for p in products]
+        classifications = PRODUCT_CLASSIFIER.classify_many([p['name'] for p in products])
+        processed = [syncer.process_product(p, c) for p, c in zip(products, classifications)]
+        documents = [syncer.build_document(p) for p in processed]
+        embeddings = embedding_function(documents)
+
+        layouts['ancien'] = [legacy_metadata(p, c) for p, c in zip(products, classifications)]
+        layouts['compact'] = [syncer.compact_metadata(p) for p in processed]
+
+        for name, metadatas in layouts.items():
+            collection = client.create_collection(name=f"products_{name}", embedding_function=embedding_function)
+            fill_collection(collection, ids, documents, metadatas, embeddings)
+            size, p50, p99 = measure(collection, queries, args.n_results)
+            print(f"{name:>8} : {size / 1024:7.1f} Ko par requête, latence p50 {p50 * 1000:6.1f} ms, "
+                  f"p99 {p99 * 1000:6.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""
+Taille des prompts Ollama avant et après le constructeur de prompts
+(src/ai/prompt_builder.py) : question du chat (5 produits + 3 documents de
+contexte, puis 20 produits sous un budget serré), reformulation d'une analyse
+(20 lignes) et réponse à une commande du bot. Tokens estimés par section et
+temps de traitement du prompt estimé pour un débit de `--prefill-rate`
+tokens/s (modèle 7B sur CPU).
+
+    python scripts/bench_prompt_builder.py --budget 600 --prefill-rate 40
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import chromadb
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from bench_bot_concurrency import FakeEmbeddingFunction, build_catalog
+
+
+class ContextCapture:
+    """Collection de contexte qui garde les documents de add_brewery_context"""
+
+    def __init__(self):
+        self.documents = []
+
+    def get(self, ids, include):
+        return {'ids': [], 'documents': []}
+
+    def upsert(self, ids, documents, metadatas):
+        self.documents = documents
+
+
+def legacy_generate_context(products_results, context_results):
+    """Ancien generate_context de l'interface"""
+    context = "Contexte de la brasserie L'Apaisée:\n\n"
+    if context_results['documents'][0]:
+        context += "Informations générales:\n"
+        for doc in context_results['documents'][0]:
+            context += f"- {doc}\n"
+        context += "\n"
+    if products_results['documents'][0]:
+        context += "Produits pertinents:\n"
+        for i, metadata in enumerate(products_results['metadatas'][0]):
+            context += f"\n{i+1}. {metadata['name']}\n"
+            context += f"   - Format: {metadata.get('format', 'Non spécifié')}\n"
+            context += f"   - Stock: {metadata.get('stock_quantity', 0)} unités\n"
+            context += f"   - Prix: {metadata.get('price', 'N/A')}€\n"
+            context += f"   - Gamme: {metadata.get('gamme', 'Non classifié')}\n"
+    return context
+
+
+def legacy_query_prompt(question: str, context: str) -> str:
+    """Ancien prompt de query_llm"""
+    return f"""Tu es l'assistant AI de la brasserie L'Apaisée en Suisse. Tu connais parfaitement les produits,
+    les stocks et le fonctionnement de la brasserie.
+
+    RÈGLES IMPORTANTES:
+    1. Tous les prix sont en CHF (francs suisses), JAMAIS en euros
+    2. Les bières clean (IPA, Jonquille, Pointe, etc.) sont TOUJOURS en canettes 44cl
+    3. Les bières wild sont en bouteilles
+    4. Les cartons de canettes contiennent 12 unités
+    5. Quand on demande le stock, calcule le total: unités + (cartons × 12)
+
+    {context}
+
+    Question: {question}
+
+    Réponds de manière précise. Pour les stocks, donne toujours:
+    - Le nombre total de canettes/bouteilles disponibles
+    - Le détail (X unités + Y cartons)
+    - Utilise CHF pour les prix"""
+
+
+def legacy_bot_prompt(order, stock_check) -> str:
+    """Ancien build_prompt du bot"""
+    return f"""
+        Tu es l'assistant de la brasserie L'Apaisée. Un client a envoyé cette commande: "{order['original_text']}"
+
+        Résultats de la vérification des stocks:
+        {chr(10).join([item['message'] for item in stock_check])}
+
+        Règles:
+        - Sois amical et professionnel
+        - Si le client a été poli, remercie-le
+        - Confirme ce qui est disponible
+        - Propose des alternatives pour ce qui manque
+        - Termine par demander confirmation
+        - Utilise des émojis avec modération
+        - Mentionne les prix en CHF
+        """
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Taille des prompts avant et après le budget de tokens")
+    parser.add_argument("--products", type=int, default=500)
+    parser.add_argument("--budget", type=int, default=600, help="Budget du chat à 20 produits")
+    parser.add_argument("--prefill-rate", type=float, default=40, help="Tokens de prompt traités par seconde")
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    os.environ.update({
+        "CATALOG_VERSION_FILE": os.path.join(tmp, "catalog_version.json"),
+        "CATALOG_VERSION_CHECK_SECONDS": "0",
+        "LLM_SLOTS_DIR": os.path.join(tmp, "llm_slots"),
+    })
+
+    from loguru import logger
+    logger.remove()
+    build_catalog(os.path.join(tmp, "chromadb"), args.products)
+
+    from src.ai.catalog_analytics import CatalogAnalytics
+    from src.ai.prompt_builder import PromptBuilder, estimate_tokens
+    from src.bot.telegram_bot import LapaiseeBot, UNIT
+    from src.sync_woocommerce import WooCommerceSyncer
+
+    client = chromadb.PersistentClient(path=os.path.join(tmp, "chromadb"))
+    products = client.get_collection(name="products", embedding_function=FakeEmbeddingFunction())
+    context = client.get_or_create_collection(name="brewery_context", embedding_function=FakeEmbeddingFunction())
+    syncer = WooCommerceSyncer.__new__(WooCommerceSyncer)
+    syncer.context_collection = ContextCapture()
+    syncer.add_brewery_context()
+    documents = syncer.context_collection.documents
+    context.add(ids=[f"context_{i}" for i in range(len(documents))], documents=documents)
+
+    # Constantes et fonctions de l'interface, sans lancer Streamlit
+    rules = ("Tu es l'assistant AI de la brasserie L'Apaisée (Suisse), tu connais ses produits et ses stocks.\n"
+             "Règles:\n- prix en CHF (francs suisses), jamais en euros\n"
+             "- bières clean (IPA, Jonquille, Pointe...) : canettes 44cl, cartons de 12\n"
+             "- bières wild : bouteilles\n- stock total = unités + cartons × 12")
+    answer = ("Réponds précisément. Pour un stock, donne le total de canettes/bouteilles "
+              "et le détail (X unités + Y cartons), prix en CHF.")
+    columns = [('name', 'Produit'), ('format', 'Format'), ('stock_quantity', 'Stock'),
+               ('price', 'Prix CHF'), ('gamme', 'Gamme')]
+
+    def report(label: str, legacy: str, prompt: PromptBuilder):
+        before, after = estimate_tokens(legacy), prompt.report()['total']
+        print(f"{label:28} {before:6} -> {after:6} tokens ({1 - after / before:4.0%} de moins), "
+              f"prompt ~{before / args.prefill_rate:5.1f}s -> ~{after / args.prefill_rate:5.1f}s")
+        print(f"{'':28} {prompt.summary()}")
+
+    question = "Combien de cartons de Jonquille reste-t-il ?"
+    for n_results, budget in ((5, None), (20, args.budget)):
+        products_results = products.query(query_texts=[question], n_results=n_results)
+        context_results = context.query(query_texts=[question], n_results=3)
+        prompt = PromptBuilder(budget=budget).add_text('règles', rules, required=True)
+        prompt.add_table('produits', "Produits pertinents:", products_results['metadatas'][0], columns,
+                         products_results['distances'][0])
+        prompt.add_snippets('contexte', "Informations générales:", context_results['documents'][0],
+                            context_results['distances'][0])
+        prompt.add_text('question', f"Question: {question}\n{answer}", required=True)
+        label = f"Chat ({n_results} produits" + (f", budget {budget})" if budget else ")")
+        report(label, legacy_query_prompt(question, legacy_generate_context(products_results, context_results)),
+               prompt)
+
+    question = "Quels produits sont en stock bas ?"
+    table = CatalogAnalytics(products).low_stock().head(20)
+    prompt = PromptBuilder().add_text('règles', rules, required=True)
+    prompt.add_table('résultat', "Résultat exact, calculé sur tout le catalogue:",
+                     table.to_dict('records'), [(column, column) for column in table.columns])
+    prompt.add_text('question', f"Question: {question}\n{answer}", required=True)
+    report("Analyse (20 lignes)", legacy_query_prompt(
+        question, f"Résultat exact, calculé sur tout le catalogue:\n{table.to_string(index=False)}"
+    ), prompt)
+
+    metadatas = products.get(limit=3, include=['metadatas'])['metadatas']
+    order = {'original_text': "Bonjour, 2 cartons de Jonquille, 1 fût de Pointe et 6 Boucane svp, merci !"}
+    stock_check = [
+        {'item': {'product': 'jonquille', 'container': 'carton', 'quantity': 2}, 'product': metadatas[0],
+         'available': True, 'message': f"✅ {metadatas[0]['name']}: 40 en stock (demande: 2)"},
+        {'item': {'product': 'pointe', 'container': 'fût', 'quantity': 1}, 'product': metadatas[1],
+         'available': False, 'message': f"❌ {metadatas[1]['name']}: rupture de stock (demande: 1)"},
+        {'item': {'product': 'boucane', 'container': UNIT, 'quantity': 6}, 'product': None,
+         'available': False, 'message': "❌ Produit non trouvé: boucane (unité)"},
+    ]
+    bot = LapaiseeBot.__new__(LapaiseeBot)
+    legacy = legacy_bot_prompt(order, stock_check)
+    after = estimate_tokens(bot.build_prompt(order, stock_check))
+    before = estimate_tokens(legacy)
+    print(f"{'Commande du bot (3 articles)':28} {before:6} -> {after:6} tokens, "
+          f"avec format et prix CHF de chaque article (absents de l'ancien prompt)")
+
+
+if __name__ == "__main__":
+    main()
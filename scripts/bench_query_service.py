@@ -0,0 +1,180 @@
+"""
+Service de recherche partagé (src/ai/query_service.py) : le service tourne
+sous uvicorn dans ce processus, avec un embedding factice bloquant, sur TCP
+puis sur socket Unix. Mesure la latence d'une recherche avec le pool de
+connexions keep-alive et avec une connexion neuve par requête, une recherche
+groupée (batch-search) contre autant de recherches séparées, puis le démarrage
+à froid d'un client léger contre l'ouverture de ChromaDB dans le processus
+(chargement du modèle d'embedding non compris). Vérifie enfin qu'une écriture
+faite par un autre processus est visible dès la nouvelle version du catalogue.
+
+    python scripts/bench_query_service.py --products 2000 --requests 200 --batch 8
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from bench_bot_concurrency import MESSAGES, SlowEmbeddingFunction, build_catalog
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# Démarrage à froid d'un processus qui ouvre ChromaDB lui-même
+LOCAL_COLD_START = """
+import sys, time
+start = time.perf_counter()
+sys.path[:0] = [{root!r}, {scripts!r}]
+import chromadb
+from bench_sync_memory import FakeEmbeddingFunction
+collection = chromadb.PersistentClient(path={path!r}).get_collection(
+    name="products", embedding_function=FakeEmbeddingFunction())
+collection.query(query_texts=["jonquille"], n_results=5)
+print(time.perf_counter() - start)
+"""
+
+# Démarrage à froid d'un client léger
+REMOTE_COLD_START = """
+import sys, time
+start = time.perf_counter()
+sys.path.insert(0, {root!r})
+from src.ai.query_client import QueryServiceClient
+QueryServiceClient({url!r}).collection("products").query(query_texts=["jonquille"], n_results=5)
+print(time.perf_counter() - start)
+"""
+
+# Écriture dans ChromaDB par un autre processus (synchro, webhooks)
+EXTERNAL_WRITE = """
+import sys
+sys.path[:0] = [{root!r}, {scripts!r}]
+import chromadb
+from bench_sync_memory import FakeEmbeddingFunction
+from src.utils.catalog_version import bump_catalog_version
+collection = chromadb.PersistentClient(path={path!r}).get_collection(
+    name="products", embedding_function=FakeEmbeddingFunction())
+collection.add(ids=["bench-new"], documents=[{document!r}], metadatas=[{{"name": "Nouveauté du bench"}}])
+bump_catalog_version("bench")
+"""
+
+
+def start_service(app, **config):
+    """Lance uvicorn dans un thread, rend le serveur une fois prêt"""
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(app, log_level="warning", **config))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError("Le service de recherche n'a pas démarré")
+        time.sleep(0.01)
+    return server
+
+
+def latencies(call, requests: int):
+    values = []
+    for i in range(requests):
+        start = time.perf_counter()
+        call(i)
+        values.append(time.perf_counter() - start)
+    return values
+
+
+def describe(values) -> str:
+    ordered = sorted(values)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    return f"p50 {statistics.median(values) * 1000:6.2f} ms, p99 {p99 * 1000:6.2f} ms"
+
+
+def cold_start(script: str, runs: int) -> float:
+    """Durée médiane (import compris) mesurée dans un processus neuf"""
+    values = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "-c", script], check=True, capture_output=True, text=True)
+        values.append(float(output.stdout.strip().splitlines()[-1]))
+    return statistics.median(values)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latence du service de recherche partagé")
+    parser.add_argument("--products", type=int, default=2000)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--batch", type=int, default=8, help="Requêtes par recherche groupée")
+    parser.add_argument("--embed-latency", type=float, default=0.01, help="Coût fixe d'un appel au modèle (s)")
+    parser.add_argument("--embed-per-text", type=float, default=0.002, help="Coût par texte embeddé (s)")
+    parser.add_argument("--cold-runs", type=int, default=3)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    chroma_path = os.path.join(tmp, "chromadb")
+    os.environ.update({
+        "CHROMA_PERSIST_DIRECTORY": chroma_path,
+        "CATALOG_VERSION_FILE": os.path.join(tmp, "catalog_version.json"),
+        "CATALOG_VERSION_CHECK_SECONDS": "0",
+        "LOG_DIR": os.path.join(tmp, "logs"),
+    })
+
+    from loguru import logger
+    logger.remove()
+    build_catalog(chroma_path, args.products)
+
+    from src.ai.query_client import QueryServiceClient
+    from src.ai.query_service import QueryEngine, create_app
+
+    app = create_app(engine_factory=lambda: QueryEngine(
+        persist_directory=chroma_path,
+        embedding_function=SlowEmbeddingFunction(args.embed_latency, args.embed_per_text),
+    ))
+    socket_path = os.path.join(tmp, "query.sock")
+    start_service(app, host="127.0.0.1", port=8093)
+    start_service(app, uds=socket_path)
+    urls = {'TCP': "http://127.0.0.1:8093", 'Unix': f"unix://{socket_path}"}
+
+    print(f"Catalogue: {args.products} produits, embedding {args.embed_latency * 1000:.0f} ms "
+          f"+ {args.embed_per_text * 1000:.0f} ms/texte\n")
+
+    def search(client):
+        return lambda i: client.search("products", MESSAGES[i % len(MESSAGES)], n_results=5)
+
+    def stock(client):
+        return lambda i: client.stock([str(i % args.products + 1), str((i + args.products // 2) % args.products + 1)])
+
+    for transport, url in urls.items():
+        pooled = QueryServiceClient(url)
+        print(f"{transport}:")
+        print(f"  recherche, pool keep-alive      {describe(latencies(search(pooled), args.requests))}")
+        print(f"  recherche, connexion neuve      "
+              f"{describe(latencies(lambda i: search(QueryServiceClient(url))(i), args.requests))}")
+        print(f"  stock (2 ids), pool keep-alive  {describe(latencies(stock(pooled), args.requests))}")
+
+    client = QueryServiceClient(urls['Unix'])
+    queries = [MESSAGES[i % len(MESSAGES)] + f" #{i}" for i in range(args.batch)]
+    rounds = max(1, args.requests // args.batch)
+    separate = latencies(lambda _: [client.search("products", query, n_results=5) for query in queries], rounds)
+    grouped = latencies(lambda _: client.batch_search("products", queries, n_results=5), rounds)
+    print(f"\n{args.batch} requêtes séparées           {describe(separate)}")
+    print(f"{args.batch} requêtes en une batch-search {describe(grouped)}")
+
+    local = cold_start(LOCAL_COLD_START.format(
+        root=str(ROOT), scripts=str(ROOT / "scripts"), path=chroma_path), args.cold_runs)
+    remote = cold_start(REMOTE_COLD_START.format(root=str(ROOT), url=urls['Unix']), args.cold_runs)
+    print(f"\nDémarrage à froid, ChromaDB dans le processus: {local * 1000:7.0f} ms (+ chargement du modèle)")
+    print(f"Démarrage à froid, client léger:               {remote * 1000:7.0f} ms")
+
+    document = "Bière de test ajoutée par un autre processus, houblon bench unique"
+    subprocess.run([sys.executable, "-c", EXTERNAL_WRITE.format(
+        root=str(ROOT), scripts=str(ROOT / "scripts"), path=chroma_path, document=document)], check=True)
+    top = client.search("products", document, n_results=1)['ids'][0]
+    health = client.health()
+    print(f"\nÉcriture d'un autre processus visible: {'oui' if top == ['bench-new'] else 'NON'} "
+          f"(réouvertures: {health['reopens']}, requêtes: {health['requests']})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Coût des recherches d'un rerun Streamlit, avec et sans le cache de recherche :
+chaque rerun refait la recherche de l'onglet Produits, les recherches des
+quatre analyses et celles d'une question du chat, sur un catalogue synthétique
+avec un embedding factice bloquant. Vérifie ensuite qu'une nouvelle version du
+catalogue invalide le cache.
+
+    python scripts/bench_retrieval_cache.py --reruns 50 --embed-latency 0.03
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import chromadb
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from bench_bot_concurrency import SlowEmbeddingFunction, build_catalog
+
+# (requête, n_results) d'un rerun : onglet Produits, analyses, question du chat
+RERUN_QUERIES = [
+    ("jonquille", 10),
+    ("stock", 20), ("rupture stock", 20), ("clean IPA lager stout", 20),
+    ("wild fermentation mixte spontanée", 20),
+    ("Combien de cartons de pointe reste-t-il ?", 5),
+]
+
+
+def timed_reruns(search, collection, reruns: int):
+    durations = []
+    for _ in range(reruns):
+        start = time.perf_counter()
+        for query, n_results in RERUN_QUERIES:
+            search(collection, query, n_results)
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recherches d'un rerun Streamlit avec et sans cache")
+    parser.add_argument("--reruns", type=int, default=50)
+    parser.add_argument("--products", type=int, default=500)
+    parser.add_argument("--embed-latency", type=float, default=0.03)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    os.environ.update({
+        "CATALOG_VERSION_FILE": os.path.join(tmp, "catalog_version.json"),
+        "CATALOG_VERSION_CHECK_SECONDS": "0",
+    })
+
+    from loguru import logger
+    logger.remove()
+    build_catalog(os.path.join(tmp, "chromadb"), args.products)
+
+    from src.ai.retrieval_cache import RetrievalCache
+    from src.utils.catalog_version import bump_catalog_version
+
+    collection = chromadb.PersistentClient(path=os.path.join(tmp, "chromadb")).get_collection(
+        name="products", embedding_function=SlowEmbeddingFunction(args.embed_latency)
+    )
+    cache = RetrievalCache()
+
+    direct = timed_reruns(lambda c, q, n: c.query(query_texts=[q], n_results=n), collection, args.reruns)
+    cached = timed_reruns(cache.query, collection, args.reruns)
+    print(f"Sans cache : {statistics.median(direct) * 1000:8.2f} ms par rerun")
+    print(f"Avec cache : {statistics.median(cached) * 1000:8.2f} ms par rerun "
+          f"(premier rerun {cached[0] * 1000:.0f} ms)")
+
+    bump_catalog_version("bench")
+    start = time.perf_counter()
+    timed_reruns(cache.query, collection, 1)
+    print(f"Après une synchro : {(time.perf_counter() - start) * 1000:.0f} ms (recherches refaites)")
+    stats = cache.stats()
+    print(f"Cache : {stats['hits']} hits / {stats['misses']} misses ({stats['hit_rate']:.0%}), "
+          f"{stats['entries']} entrées, {stats['invalidations']} invalidation(s)")
+    sys.exit(0 if stats['invalidations'] == 1 else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Jobs de synchro en arrière-plan contre le serveur WooCommerce factice : coût
+du lancement et d'un rafraîchissement de la sidebar (jobs actifs, progression,
+historique) pendant que le job tourne, refus d'un second job sur la même
+cible, puis bilan dans l'historique.
+
+    python scripts/bench_sync_jobs.py --products 3000 --latency 0.3
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from stub_woocommerce_server import generate_products, make_server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Jobs de synchro en arrière-plan")
+    parser.add_argument("--products", type=int, default=3000)
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--job", default="stock", choices=["stock", "products"])
+    args = parser.parse_args()
+
+    server = make_server(generate_products(args.products), latency=args.latency)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    tmp = tempfile.mkdtemp()
+    os.environ.update({
+        "WOOCOMMERCE_URL": f"http://127.0.0.1:{server.server_address[1]}",
+        "WOOCOMMERCE_KEY": "ck",
+        "WOOCOMMERCE_SECRET": "cs",
+        "WOOCOMMERCE_MAX_WORKERS": "2",
+        "CHROMA_PERSIST_DIRECTORY": os.path.join(tmp, "chromadb"),
+        "SYNC_STATE_FILE": os.path.join(tmp, "sync_state.json"),
+        "SYNC_RUNS_DIR": os.path.join(tmp, "sync_runs"),
+        "CATALOG_VERSION_FILE": os.path.join(tmp, "catalog_version.json"),
+        "EMBEDDING_CACHE_PATH": os.path.join(tmp, "embedding_cache.sqlite"),
+        "PRODUCT_DETAILS_PATH": os.path.join(tmp, "product_details.sqlite"),
+        "JOBS_DIR": os.path.join(tmp, "jobs"),
+    })
+
+    from src.utils.jobs import JobAlreadyRunning, JobRunner
+
+    runner = JobRunner()
+    start = time.perf_counter()
+    job_id = runner.start(args.job)
+    print(f"Lancement : {(time.perf_counter() - start) * 1000:.1f} ms (la sidebar rend la main aussitôt)")
+
+    try:
+        runner.start(args.job)
+        print("Second lancement accepté : ERREUR")
+    except JobAlreadyRunning as e:
+        print(f"Second lancement refusé : {e}")
+
+    polls = []
+    last = None
+    while True:
+        start = time.perf_counter()
+        active = runner.active()
+        progress = runner.progress(job_id)
+        runner.history(limit=5)
+        polls.append(time.perf_counter() - start)
+        if progress and progress != last:
+            print(f"  page {progress['page']}/{progress['total_pages']}")
+            last = progress
+        if not active:
+            break
+        time.sleep(0.5)
+
+    print(f"Rafraîchissement de la sidebar : {statistics.median(polls) * 1000:.2f} ms (médiane sur {len(polls)})")
+    job = runner.history(limit=1)[0]
+    print(f"Historique : {job['label']} {job['status']} en {job['duration']}s {job['error'] or ''}")
+    server.shutdown()
+    sys.exit(0 if job['status'] == 'completed' else 1)
+
+
+if __name__ == "__main__":
+    main()
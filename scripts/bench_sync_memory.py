@@ -0,0 +1,86 @@
+"""
+Mesure le pic mémoire (tracemalloc) de la synchro en flux pour des catalogues
+de tailles croissantes, contre le serveur WooCommerce factice et un modèle
+d'embedding factice. Le pic doit rester à peu près constant.
+
+    python scripts/bench_sync_memory.py --sizes 1000 5000 20000
+"""
+
+import argparse
+import hashlib
+import os
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from stub_woocommerce_server import generate_products, make_server
+
+
+class FakeEmbeddingFunction:
+    """Vecteurs déterministes de 384 dimensions, sans modèle"""
+
+    def __call__(self, input):
+        vectors = []
+        for text in input:
+            seed = int.from_bytes(hashlib.md5(text.encode("utf-8")).digest()[:4], "little")
+            vectors.append(np.random.default_rng(seed).random(384, dtype=np.float32).tolist())
+        return vectors
+
+
+def run_sync(size: int, batch_size: int):
+    server = make_server(generate_products(size), latency=0.01)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ.update({
+            "WOOCOMMERCE_URL": f"http://127.0.0.1:{server.server_address[1]}",
+            "WOOCOMMERCE_KEY": "ck",
+            "WOOCOMMERCE_SECRET": "cs",
+            "CHROMA_PERSIST_DIRECTORY": os.path.join(tmp, "chromadb"),
+            "SYNC_STATE_FILE": os.path.join(tmp, "sync_state.json"),
+            "SYNC_RUNS_DIR": os.path.join(tmp, "sync_runs"),
+            "SYNC_BATCH_SIZE": str(batch_size),
+        })
+        from src import sync_woocommerce
+        from src.ai.embedding_cache import CachedEmbeddingFunction
+
+        sync_woocommerce.SYNC_BATCH_SIZE = batch_size
+        syncer = sync_woocommerce.WooCommerceSyncer()
+        syncer.embedding_function = CachedEmbeddingFunction(
+            path=os.path.join(tmp, "embedding_cache.sqlite"),
+            embedding_function=FakeEmbeddingFunction()
+        )
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        syncer.sync_products(full=True)
+        duration = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    server.shutdown()
+    return duration, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pic mémoire de la synchro en flux")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 20000])
+    parser.add_argument("--batch-size", type=int, default=64)
+    args = parser.parse_args()
+
+    from loguru import logger
+    logger.remove()
+
+    for size in args.sizes:
+        duration, peak = run_sync(size, args.batch_size)
+        print(f"{size:>7} produits : {duration:6.2f}s, pic mémoire Python {peak / 1024 / 1024:6.1f} Mo")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Débit du traitement en lot d'un export WhatsApp : génère un export factice
+(commandes du corpus de test, bavardage, médias, messages sur plusieurs
+lignes), un catalogue synthétique et un embedding factice bloquant, puis
+compare un seul worker et un pool.
+
+    python scripts/bench_whatsapp_import.py --messages 20000 --workers 8
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from bench_bot_concurrency import SlowEmbeddingFunction, build_catalog
+
+CHATTER = [
+    "Merci pour la livraison de la semaine dernière !",
+    "On passe vers 17h demain ?",
+    "Tu as des nouveautés en ce moment ?",
+    "Top, merci 👍",
+    "La facture est partie ce matin",
+]
+
+
+def generate_export(path: str, count: int, seed: int = 1):
+    """Export au format Android, jour en premier"""
+    from src.bot.test_parser import LABELLED_CORPUS
+
+    rng = random.Random(seed)
+    orders = [text for text, items in LABELLED_CORPUS if items]
+    moment = datetime(2026, 10, 5, 8, 0)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f"{moment:%d/%m/%Y, %H:%M} - Les messages et les appels sont chiffrés de bout en bout.\n")
+        for i in range(count):
+            moment += timedelta(seconds=rng.randint(5, 120))
+            author = rng.choice(["Bar du Lac", "Xavier", "Café Central", "Épicerie Fine"])
+            draw = rng.random()
+            if draw < 0.5:
+                text = rng.choice(orders)
+            elif draw < 0.55:
+                text = "<Médias omis>"
+            elif draw < 0.6:
+                text = f"{rng.choice(orders)}\n{rng.choice(CHATTER)}"
+            else:
+                text = rng.choice(CHATTER)
+            f.write(f"{moment:%d/%m/%Y, %H:%M} - {author}: {text}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Débit de l'import d'un export WhatsApp")
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--products", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--embed-latency", type=float, default=0.02)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    os.environ.update({
+        "CHROMA_PERSIST_DIRECTORY": os.path.join(tmp, "chromadb"),
+        "EMBEDDING_CACHE_PATH": os.path.join(tmp, "embedding_cache.sqlite"),
+        "CATALOG_VERSION_FILE": os.path.join(tmp, "catalog_version.json"),
+        "LLM_SLOTS_DIR": os.path.join(tmp, "llm_slots"),
+    })
+
+    from loguru import logger
+    logger.remove()
+    build_catalog(os.environ["CHROMA_PERSIST_DIRECTORY"], args.products)
+
+    from src.bot.telegram_bot import LapaiseeBot
+    from src.bot.whatsapp_import import WhatsAppImporter, load_export, write_results
+    logger.remove()
+
+    export = os.path.join(tmp, "export.txt")
+    generate_export(export, args.messages)
+    start = time.perf_counter()
+    messages = load_export(export)
+    print(f"Export : {len(messages)} messages texte lus en {time.perf_counter() - start:.2f}s")
+
+    bot = LapaiseeBot()
+    bot.products_collection = bot.chroma_client.get_collection(
+        name="products", embedding_function=SlowEmbeddingFunction(args.embed_latency, per_text=0.001)
+    )
+
+    for workers in (1, args.workers):
+        importer = WhatsAppImporter(bot, workers=workers)
+        start = time.perf_counter()
+        results = importer.run(messages)
+        elapsed = time.perf_counter() - start
+        items = sum(len(result['stock_check']) for result in results)
+        print(f"{workers:2} worker(s) : {len(results)} commandes, {items} articles en {elapsed:6.2f}s "
+              f"({len(messages) / elapsed:8.0f} messages/s)")
+
+    start = time.perf_counter()
+    write_results(results, os.path.join(tmp, "import.jsonl"))
+    write_results(results, os.path.join(tmp, "import.csv"))
+    print(f"Écriture JSONL + CSV en {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Rejoue des mises à jour Telegram (JSON d'Update) contre l'endpoint webhook du
+bot, pour mesurer le débit des handlers sans Telegram.
+
+Les mises à jour viennent d'un fichier JSONL enregistré (un objet Update par
+ligne) ou sont générées à partir du corpus de commandes de test. Le débit est
+mesuré jusqu'à ce que le worker ait traité toutes les mises à jour
+(/telegram/stats).
+
+Contre un bot déjà lancé (Bot API factice, voir scripts/stub_telegram_api.py) :
+
+    TELEGRAM_API_BASE_URL=http://127.0.0.1:8081 TELEGRAM_WEBHOOK_SECRET=replay \\
+        uvicorn src.bot.telegram_webhook:app --port 8002
+    python scripts/replay_telegram_updates.py --url http://127.0.0.1:8002 --secret replay --updates 200
+
+Tout en local (Bot API, catalogue, embedding et Ollama factices) :
+
+    python scripts/replay_telegram_updates.py --serve --updates 200 --concurrent-updates 16
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import requests
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+def load_updates(path: str):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def synthetic_updates(count: int, user_id: int, chats: int):
+    """Messages du corpus de test envoyés depuis `chats` conversations différentes"""
+    from src.bot.test_parser import LABELLED_CORPUS
+
+    messages = [text for text, items in LABELLED_CORPUS if items]
+    now = int(time.time())
+    return [{
+        "update_id": i + 1,
+        "message": {
+            "message_id": i + 1,
+            "date": now,
+            "chat": {"id": 10_000 + i % chats, "type": "private"},
+            "from": {"id": user_id, "is_bot": False, "first_name": "Replay", "username": f"replay{i % chats}"},
+            "text": messages[i % len(messages)],
+        },
+    } for i in range(count)]
+
+
+def serve_locally(args) -> tuple:
+    """Lance la Bot API factice et l'app webhook dans ce processus, renvoie (url, secret, url Bot API)"""
+    import uvicorn
+    from stub_telegram_api import make_server
+
+    api = make_server(args.api_latency)
+    threading.Thread(target=api.serve_forever, daemon=True).start()
+    api_url = f"http://127.0.0.1:{api.server_address[1]}"
+
+    tmp = tempfile.mkdtemp()
+    os.environ.update({
+        "TELEGRAM_BOT_TOKEN": "123456:replay",
+        "TELEGRAM_WEBHOOK_SECRET": "replay",
+        "TELEGRAM_API_BASE_URL": api_url,
+        "BOT_CONCURRENT_UPDATES": str(args.concurrent_updates),
+        "CHROMA_PERSIST_DIRECTORY": os.path.join(tmp, "chromadb"),
+        "EMBEDDING_CACHE_PATH": os.path.join(tmp, "embedding_cache.sqlite"),
+        "CATALOG_VERSION_FILE": os.path.join(tmp, "catalog_version.json"),
+        "LLM_SLOTS_DIR": os.path.join(tmp, "llm_slots"),
+        # L'Ollama factice sert toutes les générations en parallèle
+        "LLM_SLOTS": str(args.concurrent_updates),
+    })
+
+    from loguru import logger
+    logger.remove()
+    from bench_bot_concurrency import FakeOllama, SlowEmbeddingFunction, build_catalog
+    build_catalog(os.environ["CHROMA_PERSIST_DIRECTORY"], args.products)
+
+    from src.ai.response_cache import ResponseCache
+    from src.bot import telegram_bot
+    from src.bot.telegram_webhook import app
+    logger.remove()
+    telegram_bot.BOT_STREAM_EDIT_INTERVAL = 0.2
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=args.port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+
+    bot = app.state.application.bot_data['lapaisee_bot']
+    bot.products_collection = bot.chroma_client.get_collection(
+        name="products", embedding_function=SlowEmbeddingFunction(args.embed_latency)
+    )
+    bot.ollama_client = FakeOllama(args.llm_latency)
+    # Cache de réponses neutralisé : chaque commande sollicite le LLM
+    bot.response_cache = ResponseCache(ttl=0)
+    return f"http://127.0.0.1:{args.port}", "replay", api_url
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rejeu de mises à jour Telegram sur le webhook du bot")
+    parser.add_argument("--url", default="http://127.0.0.1:8002")
+    parser.add_argument("--secret", default=os.getenv("TELEGRAM_WEBHOOK_SECRET", ""))
+    parser.add_argument("--file", help="Fichier JSONL de mises à jour enregistrées")
+    parser.add_argument("--updates", type=int, default=200)
+    parser.add_argument("--chats", type=int, default=20, help="Conversations distinctes (mode synthétique)")
+    parser.add_argument("--user-id", type=int, help="Expéditeur (défaut : premier utilisateur autorisé)")
+    parser.add_argument("--concurrency", type=int, default=16, help="Requêtes HTTP simultanées")
+    parser.add_argument("--timeout", type=float, default=300, help="Attente maximale du traitement (s)")
+    local = parser.add_argument_group("mode --serve")
+    local.add_argument("--serve", action="store_true", help="Lance Bot API factice et webhook en local")
+    local.add_argument("--port", type=int, default=8002)
+    local.add_argument("--concurrent-updates", type=int, default=16)
+    local.add_argument("--products", type=int, default=300)
+    local.add_argument("--llm-latency", type=float, default=0.5)
+    local.add_argument("--embed-latency", type=float, default=0.02)
+    local.add_argument("--api-latency", type=float, default=0.02)
+    args = parser.parse_args()
+
+    api_url = None
+    if args.serve:
+        args.url, args.secret, api_url = serve_locally(args)
+
+    if args.file:
+        updates = load_updates(args.file)
+    else:
+        user_id = args.user_id
+        if user_id is None:
+            from src.bot.telegram_bot import AUTHORIZED_USERS
+            user_id = AUTHORIZED_USERS[0] if AUTHORIZED_USERS else 1
+        updates = synthetic_updates(args.updates, user_id, args.chats)
+
+    session = requests.Session()
+    session.mount("http://", requests.adapters.HTTPAdapter(pool_maxsize=args.concurrency))
+    base_url = args.url.rstrip('/')
+    endpoint = f"{base_url}/telegram/webhook"
+    baseline = session.get(f"{base_url}/telegram/stats").json()['processed']
+
+    def send(update):
+        start = time.perf_counter()
+        response = session.post(endpoint, json=update, headers={SECRET_HEADER: args.secret})
+        return response.status_code, time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        results = list(executor.map(send, updates))
+    posted = time.perf_counter() - start
+
+    accepted = sum(1 for status, _ in results if status == 200)
+    stats = session.get(f"{base_url}/telegram/stats").json()
+    while stats['processed'] - baseline < accepted and time.perf_counter() - start < args.timeout:
+        time.sleep(0.05)
+        stats = session.get(f"{base_url}/telegram/stats").json()
+    processed = time.perf_counter() - start
+
+    latencies = sorted(latency for _, latency in results)
+    done = stats['processed'] - baseline
+    print(f"{len(updates)} mises à jour postées en {posted:.2f}s, {len(updates) - accepted} refusées")
+    print(f"Accusé de réception p50 {statistics.median(latencies) * 1000:.1f} ms, "
+          f"p99 {latencies[int(len(latencies) * 0.99) - 1] * 1000:.1f} ms")
+    print(f"{done} traitées en {processed:.2f}s ({done / processed:.1f} mises à jour/s)")
+    print(f"Worker: {stats}")
+    if api_url:
+        print(f"Bot API: {session.get(f'{api_url}/stats').json()}")
+    sys.exit(0 if done >= accepted else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Rejoue des webhooks WooCommerce signés contre le récepteur local, pour le
+tester en charge.
+
+Les payloads viennent d'un fichier JSONL enregistré (une ligne
+{"topic": "product.updated", "payload": {...}}) ou, à défaut, de rafales
+générées à partir du catalogue factice.
+
+    uvicorn src.connectors.woocommerce_webhooks:app --port 8001
+    python scripts/replay_webhooks.py --url http://127.0.0.1:8001 --products 200 --burst 5
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import requests
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from src.connectors.woocommerce_webhooks import compute_signature
+from stub_woocommerce_server import generate_products
+
+
+def load_events(path: str):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def synthetic_events(products: int, burst: int):
+    """Chaque produit reçoit `burst` mises à jour de stock successives, mélangées"""
+    rng = random.Random(1)
+    events = []
+    for product in generate_products(products):
+        for _ in range(burst):
+            updated = dict(product, stock_quantity=rng.randint(0, 200))
+            events.append({"topic": "product.updated", "payload": updated})
+    rng.shuffle(events)
+    return events
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rejeu de webhooks WooCommerce")
+    parser.add_argument("--url", default="http://127.0.0.1:8001")
+    parser.add_argument("--file", help="Fichier JSONL de webhooks enregistrés")
+    parser.add_argument("--products", type=int, default=200)
+    parser.add_argument("--burst", type=int, default=5, help="Événements par produit (mode synthétique)")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--secret", default=os.getenv("WOOCOMMERCE_WEBHOOK_SECRET", ""))
+    args = parser.parse_args()
+
+    events = load_events(args.file) if args.file else synthetic_events(args.products, args.burst)
+    session = requests.Session()
+    session.mount("http://", requests.adapters.HTTPAdapter(pool_maxsize=args.concurrency))
+    base_url = args.url.rstrip('/')
+    endpoint = f"{base_url}/webhooks/woocommerce"
+
+    def send(event):
+        body = json.dumps(event["payload"]).encode("utf-8")
+        start = time.perf_counter()
+        response = session.post(endpoint, data=body, headers={
+            "Content-Type": "application/json",
+            "X-WC-Webhook-Topic": event["topic"],
+            "X-WC-Webhook-Signature": compute_signature(body, args.secret),
+        })
+        return response.status_code, time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        results = list(executor.map(send, events))
+    duration = time.perf_counter() - start
+
+    latencies = sorted(latency for _, latency in results)
+    errors = sum(1 for status, _ in results if status != 200)
+    print(f"{len(events)} webhooks en {duration:.2f}s ({len(events) / duration:.0f}/s), {errors} erreurs")
+    print(f"Latence p50 {statistics.median(latencies) * 1000:.1f} ms, "
+          f"p99 {latencies[int(len(latencies) * 0.99) - 1] * 1000:.1f} ms")
+
+    time.sleep(1)
+    print(f"Récepteur: {session.get(f'{base_url}/webhooks/stats').json()}")
+
+
+if __name__ == "__main__":
+    main()
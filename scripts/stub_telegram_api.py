@@ -0,0 +1,101 @@
+"""
+Bot API Telegram factice pour tester le bot hors ligne.
+
+Répond à /bot<token>/<méthode> comme api.telegram.org : getMe, sendMessage,
+editMessageText (messages renvoyés avec leur texte), les autres méthodes
+renvoient true. GET /stats donne le nombre d'appels par méthode.
+
+    python scripts/stub_telegram_api.py --port 8081 --latency 0.05
+    TELEGRAM_API_BASE_URL=http://127.0.0.1:8081 python src/bot/telegram_bot.py --mode webhook
+"""
+
+import argparse
+import itertools
+import json
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl
+
+BOT_USER = {"id": 1, "is_bot": True, "first_name": "Lapaisee", "username": "lapaisee_bot"}
+
+
+def make_handler(latency: float):
+    calls = Counter()
+    lock = threading.Lock()
+    message_ids = itertools.count(1)
+
+    def message(params: dict) -> dict:
+        return {
+            "message_id": int(params.get("message_id") or next(message_ids)),
+            "date": int(time.time()),
+            "chat": {"id": int(params.get("chat_id", 0)), "type": "private"},
+            "from": BOT_USER,
+            "text": params.get("text", ""),
+        }
+
+    class StubHandler(BaseHTTPRequestHandler):
+        """Un appel de méthode par requête POST"""
+
+        def _send(self, payload: dict):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/stats":
+                with lock:
+                    self._send(dict(calls))
+                return
+            self.send_error(404)
+
+        def do_POST(self):
+            method = self.path.rstrip("/").rsplit("/", 1)[-1]
+            raw = self.rfile.read(int(self.headers.get("Content-Length", 0))).decode("utf-8")
+            if self.headers.get("Content-Type", "").startswith("application/json"):
+                params = json.loads(raw or "{}")
+            else:
+                params = dict(parse_qsl(raw))
+
+            time.sleep(latency)
+            with lock:
+                calls[method] += 1
+
+            if method == "getMe":
+                result = BOT_USER
+            elif method in ("sendMessage", "editMessageText"):
+                result = message(params)
+            else:
+                result = True
+            self._send({"ok": True, "result": result})
+
+        def log_message(self, format, *args):
+            pass
+
+    return StubHandler
+
+
+def make_server(latency: float = 0.05, port: int = 0) -> ThreadingHTTPServer:
+    """Crée le serveur (port 0 = port libre choisi par l'OS)"""
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(latency))
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bot API Telegram factice")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency", type=float, default=0.05, help="Latence par appel (s)")
+    args = parser.parse_args()
+
+    server = make_server(args.latency, args.port)
+    print(f"Bot API factice sur http://127.0.0.1:{server.server_address[1]}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Serveur WooCommerce factice pour mesurer la synchro hors ligne.
+
+Sert /wp-json/wc/v3/products avec pagination, en-têtes X-WP-Total /
+X-WP-TotalPages et une latence artificielle par requête.
+
+    python scripts/stub_woocommerce_server.py --products 2000 --latency 0.3
+"""
+
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+BEERS_CLEAN = ["Jonquille", "Pointe", "Insolente", "Get Oat and Play", "Boucane", "Maousse IPA",
+               "Lager du Lac", "Stout Nocturne", "Pilsner Blonde", "Pale Ale Solaire"]
+BEERS_WILD = ["Wild Mûre", "Spontané Abricot", "Mixte Cerise", "Lambic Rhubarbe", "Gueuze Maison"]
+FORMATS_CLEAN = ["Fût 20L", "12x 44cl", "Carton 12 canettes", "canette 44cl", "KeyKeg 20L", "440ml"]
+FORMATS_WILD = ["75cl", "33cl", "24x 33cl", "6x 75cl", "carton de 24", "750ml", "Fût KeyKeg"]
+
+
+def generate_products(count: int, seed: int = 42) -> list:
+    """Génère un catalogue synthétique ressemblant à celui de L'Apaisée"""
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    products = []
+
+    for i in range(1, count + 1):
+        if rng.random() < 0.7:
+            name = f"{rng.choice(BEERS_CLEAN)} {rng.choice(FORMATS_CLEAN)}"
+            category = "Clean"
+        else:
+            name = f"{rng.choice(BEERS_WILD)} {rng.choice(FORMATS_WILD)}"
+            category = "Wild"
+        stock = rng.choice([0, 0, 3, 12, 24, 48, 120, None])
+
+        products.append({
+            "id": i,
+            "name": name,
+            "sku": f"LAP-{i:05d}",
+            "price": f"{rng.uniform(3, 180):.2f}",
+            "stock_quantity": stock,
+            "stock_status": "instock" if stock else "outofstock",
+            "categories": [{"id": 1 if category == "Clean" else 2, "name": category}],
+            "description": f"<p>{name}, brassée à L'Apaisée.<br/>Lot {i}</p>",
+            "short_description": f"<p>{name}</p>",
+            "date_modified_gmt": (now - timedelta(minutes=rng.randint(0, 60 * 24 * 30))).isoformat(timespec="seconds"),
+        })
+
+    return products
+
+
+def make_handler(products: list, latency: float):
+    """Construit le handler HTTP servant le catalogue donné"""
+
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            params = {k: v[0] for k, v in parse_qs(url.query).items()}
+
+            if not url.path.rstrip("/").endswith("/products"):
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+
+            time.sleep(latency)
+
+            items = products
+            if params.get("modified_after"):
+                items = [p for p in items if p["date_modified_gmt"] > params["modified_after"]]
+            if params.get("_fields"):
+                fields = params["_fields"].split(",")
+                items = [{k: p[k] for k in fields if k in p} for p in items]
+
+            per_page = int(params.get("per_page", 10))
+            page = int(params.get("page", 1))
+            total_pages = max(1, -(-len(items) // per_page))
+            body = json.dumps(items[(page - 1) * per_page:page * per_page]).encode("utf-8")
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("X-WP-Total", str(len(items)))
+            self.send_header("X-WP-TotalPages", str(total_pages))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return StubHandler
+
+
+def make_server(products: list, latency: float = 0.2, port: int = 0) -> ThreadingHTTPServer:
+    """Crée le serveur (port 0 = port libre choisi par l'OS)"""
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(products, latency))
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serveur WooCommerce factice")
+    parser.add_argument("--products", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=0.2, help="Latence par requête (s)")
+    parser.add_argument("--port", type=int, default=8089)
+    args = parser.parse_args()
+
+    server = make_server(generate_products(args.products), args.latency, args.port)
+    print(f"WooCommerce factice sur http://127.0.0.1:{args.port} ({args.products} produits)")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
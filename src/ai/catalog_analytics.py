@@ -0,0 +1,116 @@
+"""
+Analyses du stock calculées sur tout le catalogue (pandas), sans recherche
+vectorielle ni LLM
+"""
+
+import os
+import threading
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from src.utils.catalog_version import CatalogVersionWatcher
+from src.utils.stock import AVAILABLE_STATUSES
+
+COLUMNS = ['name', 'sku', 'price', 'stock_quantity', 'manage_stock', 'stock_status', 'gamme', 'format',
+           'container_type']
+
+# Colonnes affichées dans les tableaux
+DISPLAY_COLUMNS = ['name', 'format', 'stock_quantity', 'units', 'price']
+
+
+def build_frame(ids, metadatas) -> pd.DataFrame:
+    """Tableau du catalogue : stock et prix numériques, unités par article déduites du format"""
+    frame = pd.DataFrame(list(metadatas), index=pd.Index(ids, name='id'), columns=COLUMNS)
+    frame['name'] = frame['name'].fillna('').astype(str)
+    for column in ('gamme', 'format', 'container_type', 'stock_status'):
+        frame[column] = frame[column].fillna('unknown').astype(str)
+    # Stock non géré (manage_stock=False, ou quantité vide avant ce drapeau) :
+    # pas de quantité (NaN), la disponibilité vient de stock_status
+    legacy_managed = frame['stock_quantity'].notna() & (frame['stock_quantity'] != '')
+    managed = frame['manage_stock'].where(frame['manage_stock'].notna(), legacy_managed).astype(bool)
+    frame['manage_stock'] = managed
+    quantity = pd.to_numeric(frame['stock_quantity'], errors='coerce')
+    frame['stock_quantity'] = quantity.fillna(0).where(managed)
+    frame['price'] = pd.to_numeric(frame['price'], errors='coerce')
+
+    # "carton 12 canettes 44cl" -> 12 unités par article, 1 pour tout le reste
+    per_item = frame['format'].str.extract(r'carton (\d+)', expand=False).astype(float)
+    frame['units_per_item'] = per_item.fillna(1.0)
+    frame['units'] = frame['stock_quantity'] * frame['units_per_item']
+    available = np.where(managed, frame['stock_quantity'] > 0, frame['stock_status'].isin(AVAILABLE_STATUSES))
+    frame['out_of_stock'] = ~available | (frame['stock_status'] == 'outofstock').to_numpy()
+    return frame
+
+
+class CatalogAnalytics:
+    """
+    Catalogue complet chargé une fois par version (voir
+    src/utils/catalog_version.py) ; chaque analyse est une opération vectorisée
+    sur le tableau en mémoire.
+    """
+
+    def __init__(self, collection, watcher: CatalogVersionWatcher = None):
+        self.collection = collection
+        self.watcher = watcher or CatalogVersionWatcher()
+        self._lock = threading.Lock()
+        self._frame: Optional[pd.DataFrame] = None
+        self._version = None
+
+    def frame(self, force: bool = False) -> pd.DataFrame:
+        """Tableau à jour, rechargé depuis ChromaDB (métadonnées seules) si le catalogue a changé"""
+        version = self.watcher.current()
+        if self._frame is not None and self._version == version and not force:
+            return self._frame
+
+        with self._lock:
+            if self._frame is None or self._version != version or force:
+                records = self.collection.get(include=['metadatas'])
+                self._frame = build_frame(records['ids'], records['metadatas'])
+                self._version = version
+                logger.info(f"Analyses: {len(self._frame)} produits chargés (version {version})")
+            return self._frame
+
+    def top_stock(self, n: int = 5) -> pd.DataFrame:
+        """Produits avec le plus d'unités en stock"""
+        frame = self.frame()
+        return frame.loc[~frame['out_of_stock']].nlargest(n, 'units')[DISPLAY_COLUMNS]
+
+    def out_of_stock(self) -> pd.DataFrame:
+        """Produits en rupture"""
+        frame = self.frame()
+        return frame.loc[frame['out_of_stock']].sort_values('name')[DISPLAY_COLUMNS]
+
+    def low_stock(self, threshold: int = None, keg_threshold: int = None) -> pd.DataFrame:
+        """Produits en stock, mais sous le seuil d'unités (ou de fûts)"""
+        frame = self.frame()
+        # Seuils par défaut : en canettes / bouteilles, et en fûts
+        if threshold is None:
+            threshold = int(os.getenv("ANALYTICS_LOW_STOCK_UNITS", "24"))
+        if keg_threshold is None:
+            keg_threshold = int(os.getenv("ANALYTICS_LOW_STOCK_KEGS", "2"))
+        limits = np.where(frame['container_type'] == 'fût', keg_threshold, threshold)
+        mask = ~frame['out_of_stock'] & (frame['units'] <= limits)
+        return frame.loc[mask].sort_values('units')[DISPLAY_COLUMNS]
+
+    def available(self, gamme: str) -> pd.DataFrame:
+        """Produits disponibles d'une gamme (clean, wild), du plus au moins en stock"""
+        frame = self.frame()
+        mask = (frame['gamme'] == gamme) & ~frame['out_of_stock']
+        return frame.loc[mask].sort_values('units', ascending=False, na_position='last')[DISPLAY_COLUMNS]
+
+    def gamme_breakdown(self) -> pd.DataFrame:
+        """Produits, produits disponibles, ruptures et unités en stock par gamme"""
+        frame = self.frame()
+        grouped = frame.assign(
+            in_stock=~frame['out_of_stock'],
+            units_in_stock=np.where(frame['out_of_stock'], 0.0, frame['units'].fillna(0.0)),
+        ).groupby('gamme')
+        return pd.DataFrame({
+            'produits': grouped.size(),
+            'disponibles': grouped['in_stock'].sum(),
+            'ruptures': grouped['out_of_stock'].sum(),
+            'unités': grouped['units_in_stock'].sum().astype(int),
+        }).sort_values('unités', ascending=False)
@@ -0,0 +1,202 @@
+"""
+Index lexical du catalogue en mémoire : noms normalisés, SKU, alias et
+correspondance approchée par trigrammes. Répond aux recherches par nom exact
+ou presque sans passer par l'embedding ; la recherche vectorielle ne sert plus
+qu'en repli quand la confiance lexicale est faible.
+"""
+
+import json
+import math
+import os
+import re
+import threading
+import unicodedata
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from loguru import logger
+
+from src.utils.catalog_version import CatalogVersionWatcher
+from src.utils.stock import is_in_stock
+
+# Mots sans valeur pour identifier un produit
+STOPWORDS = frozenset("""
+    a au aux avec de des du d en et l la le les un une pour par sur stp svp merci
+    s il te vous plait please thanks demain aujourd hui besoin voudrais veux
+""".split())
+
+
+def fuzzy_min_similarity() -> float:
+    """Similarité trigramme minimale pour corriger un mot inconnu"""
+    return float(os.getenv("CATALOG_FUZZY_MIN_SIMILARITY", "0.45"))
+
+
+def normalize(text: str) -> str:
+    """Minuscules, sans accents ni ponctuation, espaces compactés"""
+    text = unicodedata.normalize('NFKD', text.lower())
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return ' '.join(re.sub(r'[^a-z0-9]+', ' ', text).split())
+
+
+def stem(token: str) -> str:
+    """Retire le pluriel (fûts -> fut, canettes -> canette)"""
+    if len(token) > 3 and token.endswith(('s', 'x')) and not token.endswith('ss') and not token[:-1].isdigit():
+        return token[:-1]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    return [stem(token) for token in normalize(text).split()]
+
+
+def trigrams(token: str) -> Set[str]:
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def load_aliases(path: str = None) -> Dict[str, str]:
+    """Table d'alias {alias: nom canonique}, normalisée (vide si le fichier est absent)"""
+    path = Path(path or os.getenv("PRODUCT_ALIASES_FILE", "./config/product_aliases.json"))
+    try:
+        aliases = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return {normalize(alias): normalize(target) for alias, target in aliases.items() if not alias.startswith('_')}
+
+
+class CatalogSnapshot:
+    """Structures de l'index pour une version du catalogue (jamais modifiées après construction)"""
+
+    def __init__(self, ids: List[str], metadatas: List[Dict], version: Optional[str]):
+        self.version = version
+        self.metadatas = metadatas
+        self.by_sku: Dict[str, int] = {}
+        self.postings: Dict[str, Set[int]] = defaultdict(set)
+        self.name_lengths: List[int] = []
+
+        for i, metadata in enumerate(metadatas):
+            tokens = set(tokenize(metadata.get('name', '')))
+            self.name_lengths.append(len(tokens))
+            for token in tokens:
+                self.postings[token].add(i)
+            sku = normalize(str(metadata.get('sku', ''))).replace(' ', '')
+            if sku:
+                self.by_sku[sku] = i
+
+        # Les mots rares identifient mieux un produit que "carton" ou "44cl"
+        total = max(len(metadatas), 1)
+        self.idf = {token: math.log(1 + total / len(entries)) for token, entries in self.postings.items()}
+        # Poids d'un mot absent du catalogue : aussi distinctif qu'un mot unique
+        self.unknown_idf = math.log(1 + total)
+
+        self.trigram_postings: Dict[str, Set[str]] = defaultdict(set)
+        for token in self.postings:
+            for trigram in trigrams(token):
+                self.trigram_postings[trigram].add(token)
+        self.fuzzy_cache: Dict[str, Optional[Tuple[str, float]]] = {}
+
+    def match_token(self, token: str) -> Optional[Tuple[str, float]]:
+        """Mot du vocabulaire correspondant (exact ou approché) et similarité"""
+        if token in self.postings:
+            return token, 1.0
+        if len(token) < 4 or token.isdigit():
+            return None
+        if token in self.fuzzy_cache:
+            return self.fuzzy_cache[token]
+
+        grams = trigrams(token)
+        counts: Dict[str, int] = defaultdict(int)
+        for gram in grams:
+            for candidate in self.trigram_postings.get(gram, ()):
+                counts[candidate] += 1
+
+        min_similarity = fuzzy_min_similarity()
+        best = None
+        for candidate, shared in counts.items():
+            similarity = shared / (len(grams) + len(trigrams(candidate)) - shared)
+            if similarity >= min_similarity and (best is None or similarity > best[1]):
+                best = (candidate, similarity)
+
+        self.fuzzy_cache[token] = best
+        return best
+
+
+class CatalogIndex:
+    """
+    Index lexical reconstruit quand la version du catalogue change (voir
+    src/utils/catalog_version.py). La reconstruction lit les métadonnées de
+    ChromaDB sans embedding ; les recherches en cours gardent l'ancien instantané.
+    """
+
+    def __init__(self, collection, aliases_path: str = None, watcher: CatalogVersionWatcher = None):
+        self.collection = collection
+        self.aliases = load_aliases(aliases_path)
+        # Alias les plus longs d'abord ("double ipa" avant "ipa")
+        self._alias_pattern = re.compile(
+            r'\b(' + '|'.join(re.escape(a) for a in sorted(self.aliases, key=len, reverse=True)) + r')\b'
+        ) if self.aliases else None
+        self.watcher = watcher or CatalogVersionWatcher()
+        self._lock = threading.Lock()
+        self._snapshot: Optional[CatalogSnapshot] = None
+
+    def refresh(self, force: bool = False) -> CatalogSnapshot:
+        """Instantané à jour, reconstruit si le catalogue a changé"""
+        version = self.watcher.current()
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.version == version and not force:
+            return snapshot
+
+        with self._lock:
+            if self._snapshot is None or self._snapshot.version != version or force:
+                records = self.collection.get(include=['metadatas'])
+                self._snapshot = CatalogSnapshot(records['ids'], records['metadatas'], version)
+                logger.info(f"Index du catalogue reconstruit: {len(records['ids'])} produits (version {version})")
+            return self._snapshot
+
+    def expand_aliases(self, text: str) -> str:
+        text = normalize(text)
+        if self._alias_pattern is None:
+            return text
+        return self._alias_pattern.sub(lambda m: self.aliases[m.group(1)], text)
+
+    def lookup(self, query: str) -> Tuple[List[Dict], float]:
+        """
+        Produits correspondant à la requête, du meilleur au moins bon, et
+        confiance entre 0 et 1. Les candidats contiennent tous le mot le plus
+        distinctif de la requête ; les mots inconnus du catalogue ne filtrent
+        pas les candidats mais abaissent la confiance.
+        """
+        snapshot = self.refresh()
+        text = self.expand_aliases(query)
+
+        sku = text.replace(' ', '')
+        if sku in snapshot.by_sku:
+            return [snapshot.metadatas[snapshot.by_sku[sku]]], 1.0
+
+        matches = []
+        unmatched = 0
+        for token in text.split():
+            if token in STOPWORDS:
+                continue
+            match = snapshot.match_token(stem(token))
+            if match:
+                matches.append(match)
+            else:
+                unmatched += 1
+        if not matches:
+            return [], 0.0
+
+        # Le mot le plus distinctif délimite les candidats
+        anchor = max(matches, key=lambda m: snapshot.idf[m[0]] * m[1])[0]
+        ideal = sum(snapshot.idf[token] for token, _ in matches) + unmatched * snapshot.unknown_idf
+
+        scored = []
+        for i in snapshot.postings[anchor]:
+            score = sum(snapshot.idf[token] * similarity for token, similarity in matches
+                        if i in snapshot.postings[token])
+            scored.append((-score, not is_in_stock(snapshot.metadatas[i]), snapshot.name_lengths[i], i))
+        scored.sort()
+
+        confidence = -scored[0][0] / ideal
+        return [snapshot.metadatas[i] for _, _, _, i in scored], confidence
@@ -0,0 +1,203 @@
+"""
+Cache disque des embeddings, partagé par la synchro, le bot et l'interface
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
+from chromadb.utils import embedding_functions
+from loguru import logger
+
+DEFAULT_MODEL = "paraphrase-multilingual-MiniLM-L12-v2"
+
+# Nombre maximum de paramètres par requête SQLite
+SQL_CHUNK = 500
+
+# Un hit ne rafraîchit last_access que si la valeur a plus de TOUCH_INTERVAL secondes
+TOUCH_INTERVAL = 3600
+
+# Rafraîchissements accumulés en mémoire au plus FLUSH_INTERVAL secondes avant écriture
+FLUSH_INTERVAL = 60
+
+# Nombre d'insertions entre deux comptages de la table pour l'éviction
+EVICT_CHECK_EVERY = 1000
+
+
+def normalize_text(text: str) -> str:
+    """Normalise un texte avant hachage (Unicode NFC, espaces compactés)"""
+    return ' '.join(unicodedata.normalize('NFC', text).split())
+
+
+class CachedEmbeddingFunction(EmbeddingFunction):
+    """
+    Enveloppe une fonction d'embedding avec un cache SQLite clé (modèle, hash du texte).
+
+    Les vecteurs sont stockés en blobs float32, l'éviction est LRU au-delà de
+    max_entries. Le modèle n'est chargé qu'au premier texte absent du cache.
+
+    Les hits ne coûtent pas d'écriture : last_access (précis à TOUCH_INTERVAL
+    près) n'est rafraîchi que pour les entrées anciennes, par lots, et la
+    table n'est comptée pour l'éviction que toutes les EVICT_CHECK_EVERY insertions.
+    """
+
+    def __init__(self, model_name: str = DEFAULT_MODEL, path: str = None,
+                 max_entries: int = None, embedding_function: Optional[EmbeddingFunction] = None):
+        self.model_name = model_name
+        self.max_entries = max_entries or int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "200000"))
+        self._embedding_function = embedding_function
+        self._lock = threading.Lock()
+        self._model_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._pending_touch: Set[str] = set()
+        self._last_flush = time.monotonic()
+        # Le premier lot inséré déclenche un comptage
+        self._inserted_since_check = EVICT_CHECK_EVERY
+
+        path = Path(path or os.getenv("EMBEDDING_CACHE_PATH", "./data/embedding_cache.sqlite"))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                key TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (model, key)
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_access ON embeddings (last_access)")
+        self._conn.commit()
+
+    @property
+    def embedding_function(self) -> EmbeddingFunction:
+        """Fonction d'embedding réelle, chargée à la demande"""
+        if self._embedding_function is None:
+            with self._model_lock:
+                if self._embedding_function is None:
+                    logger.info(f"Chargement du modèle d'embedding {self.model_name}")
+                    self._embedding_function = embedding_functions.SentenceTransformerEmbeddingFunction(
+                        model_name=self.model_name
+                    )
+        return self._embedding_function
+
+    def key(self, text: str) -> str:
+        """Clé de cache d'un texte normalisé"""
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def __call__(self, input: Documents) -> Embeddings:
+        texts = [normalize_text(text) for text in input]
+        keys = [self.key(text) for text in texts]
+
+        # Le verrou ne protège que la connexion SQLite : le passage du modèle
+        # se fait hors verrou pour ne pas sérialiser les threads de recherche
+        with self._lock:
+            found, stale = self._load(keys)
+
+            # Un seul passage du modèle pour tous les textes absents (dédoublonnés)
+            missing: Dict[str, str] = {}
+            for key, text in zip(keys, texts):
+                if key not in found:
+                    missing.setdefault(key, text)
+
+            self.hits += len(keys) - sum(1 for key in keys if key not in found)
+            self.misses += len(missing)
+
+            self._pending_touch.update(stale)
+            if self._pending_touch and time.monotonic() - self._last_flush >= FLUSH_INTERVAL:
+                self._flush_touches()
+                self._conn.commit()
+
+        if missing:
+            vectors = self.embedding_function(list(missing.values()))
+            computed = {key: np.asarray(vector, dtype=np.float32) for key, vector in zip(missing, vectors)}
+            found.update(computed)
+
+            with self._lock:
+                # Rafraîchir les hits en attente avant une éventuelle éviction
+                self._flush_touches()
+                self._store(computed)
+                self._conn.commit()
+
+        return [found[key].tolist() for key in keys]
+
+    def _load(self, keys: List[str]) -> Tuple[Dict[str, np.ndarray], List[str]]:
+        """Vecteurs en cache, et clés dont last_access a plus de TOUCH_INTERVAL secondes"""
+        unique = list(set(keys))
+        found = {}
+        stale = []
+        stale_before = time.time() - TOUCH_INTERVAL
+        for i in range(0, len(unique), SQL_CHUNK):
+            chunk = unique[i:i + SQL_CHUNK]
+            rows = self._conn.execute(
+                f"SELECT key, vector, last_access FROM embeddings "
+                f"WHERE model = ? AND key IN ({','.join('?' * len(chunk))})",
+                [self.model_name, *chunk]
+            ).fetchall()
+            for key, blob, last_access in rows:
+                found[key] = np.frombuffer(blob, dtype=np.float32)
+                if last_access < stale_before:
+                    stale.append(key)
+        return found, stale
+
+    def _store(self, vectors: Dict[str, np.ndarray]):
+        now = time.time()
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO embeddings (model, key, vector, last_access) VALUES (?, ?, ?, ?)",
+            [(self.model_name, key, vector.tobytes(), now) for key, vector in vectors.items()]
+        )
+        self._inserted_since_check += len(vectors)
+        if self._inserted_since_check >= EVICT_CHECK_EVERY:
+            self._evict()
+            self._inserted_since_check = 0
+
+    def _flush_touches(self):
+        """Écrit en un lot les last_access des hits accumulés"""
+        self._last_flush = time.monotonic()
+        if not self._pending_touch:
+            return
+        now = time.time()
+        self._conn.executemany(
+            "UPDATE embeddings SET last_access = ? WHERE model = ? AND key = ?",
+            [(now, self.model_name, key) for key in self._pending_touch]
+        )
+        self._pending_touch.clear()
+
+    def _evict(self):
+        count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM embeddings WHERE rowid IN "
+                "(SELECT rowid FROM embeddings ORDER BY last_access LIMIT ?)",
+                (excess,)
+            )
+            logger.debug(f"Cache d'embeddings: {excess} entrées évincées")
+
+    def stats(self) -> Dict[str, float]:
+        """Compteurs de hits/misses depuis le démarrage du processus"""
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+        }
+
+
+_shared: Dict[str, CachedEmbeddingFunction] = {}
+
+
+def get_embedding_function(model_name: str = DEFAULT_MODEL) -> CachedEmbeddingFunction:
+    """Fonction d'embedding avec cache, partagée dans le processus"""
+    if model_name not in _shared:
+        _shared[model_name] = CachedEmbeddingFunction(model_name=model_name)
+    return _shared[model_name]
@@ -0,0 +1,262 @@
+"""
+Admission des générations Ollama : pool de créneaux borné, partagé entre
+processus (bot, interface Streamlit), avec classes de priorité et échéances
+
+Ollama ne sert correctement qu'une génération deepseek-r1 à la fois sur la
+machine : chaque appel prend un créneau. Les demandes en attente sont servies
+par priorité (commandes clients, puis chat, puis analyses) puis par ordre
+d'arrivée. L'échéance d'une demande porte sur le début de la génération : une
+demande abandonne quand l'attente prévue des demandes devant elle dépasse le
+temps restant, et l'appelant bascule sur sa réponse de secours.
+
+Les créneaux sont des fichiers verrouillés par flock et la file d'attente un
+répertoire de tickets, dans LLM_SLOTS_DIR : un processus arrêté libère ses
+créneaux, ses tickets sont ignorés.
+"""
+
+import asyncio
+import fcntl
+import os
+import threading
+import time
+import uuid
+from contextlib import asynccontextmanager, contextmanager
+from enum import IntEnum
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class Priority(IntEnum):
+    ORDER = 0
+    CHAT = 1
+    ANALYSIS = 2
+
+
+# Échéances par défaut (secondes entre la demande et le début de la génération)
+DEFAULT_DEADLINES = {
+    Priority.ORDER: ("LLM_DEADLINE_ORDER_SECONDS", 60),
+    Priority.CHAT: ("LLM_DEADLINE_CHAT_SECONDS", 120),
+    Priority.ANALYSIS: ("LLM_DEADLINE_ANALYSIS_SECONDS", 300),
+}
+
+
+def default_deadline(priority: Priority) -> float:
+    """Échéance d'une classe, lue dans l'environnement à chaque demande"""
+    name, default = DEFAULT_DEADLINES[priority]
+    return float(os.getenv(name, str(default)))
+
+# Poids de la dernière durée observée dans la moyenne mobile des générations
+EWMA_ALPHA = 0.3
+
+
+class LLMDeadlineExceeded(Exception):
+    """Pas de créneau LLM avant l'échéance de la demande"""
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class LLMScheduler:
+    """
+    Pool de `slots` créneaux de génération.
+
+    `slot(priority)` (threads) et `aslot(priority)` (asyncio) attendent leur
+    tour : une demande n'entre que si moins de `slots` demandes plus
+    prioritaires (ou de même priorité mais plus anciennes) attendent encore.
+    Elle lève LLMDeadlineExceeded dès que le temps restant avant son échéance
+    est inférieur à l'attente prévue : durée habituelle des générations des
+    demandes placées devant elle, réparties sur les `slots` créneaux.
+    """
+
+    def __init__(self, slots: int = None, slots_dir: str = None, poll_interval: float = 0.05):
+        self.slots = slots or int(os.getenv("LLM_SLOTS", "1"))
+        self.root = Path(slots_dir or os.getenv("LLM_SLOTS_DIR", "./data/llm_slots"))
+        self.queue_dir = self.root / "queue"
+        self.queue_dir.mkdir(parents=True, exist_ok=True)
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._stats = {
+            priority: {'admitted': 0, 'rejected': 0, 'wait': 0.0, 'service': None}
+            for priority in Priority
+        }
+
+    # --- File d'attente partagée -------------------------------------------------
+
+    def _enqueue(self, priority: Priority) -> Path:
+        ticket = self.queue_dir / f"{int(priority)}-{time.time_ns():020d}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        ticket.touch()
+        return ticket
+
+    def _tickets(self) -> List[Tuple[int, int, Path]]:
+        """Tickets des processus vivants, triés par (priorité, arrivée) ; les autres sont supprimés"""
+        tickets = []
+        for path in self.queue_dir.iterdir():
+            try:
+                priority, arrival, pid, _ = path.name.split('-')
+                priority, arrival, pid = int(priority), int(arrival), int(pid)
+            except ValueError:
+                continue
+            if not _pid_alive(pid):
+                path.unlink(missing_ok=True)
+                continue
+            tickets.append((priority, arrival, path))
+        return sorted(tickets)
+
+    def _try_acquire(self, ticket: Path) -> Tuple[Optional[int], float]:
+        """
+        Descripteur d'un créneau libre si le ticket fait partie des `slots` premiers,
+        et attente prévue avant son tour (générations des demandes devant lui)
+        """
+        tickets = self._tickets()
+        ahead = next((i for i, (_, _, path) in enumerate(tickets) if path == ticket), len(tickets))
+        if ahead >= self.slots:
+            return None, self._expected_wait(tickets[:ahead])
+
+        for index in range(self.slots):
+            fd = os.open(self.root / f"slot{index}.lock", os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return fd, 0.0
+            except BlockingIOError:
+                os.close(fd)
+        return None, 0.0
+
+    async def _atry_acquire(self, ticket: Path) -> Tuple[Optional[int], float]:
+        """_try_acquire dans un thread : le parcours de la file et les os.kill ne bloquent pas la boucle"""
+        task = asyncio.ensure_future(asyncio.to_thread(self._try_acquire, ticket))
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            # Un créneau obtenu après l'annulation doit quand même être rendu
+            def release_orphan(done: asyncio.Future):
+                if not done.cancelled() and done.exception() is None and done.result()[0] is not None:
+                    self._release(done.result()[0])
+            task.add_done_callback(release_orphan)
+            raise
+
+    def _release(self, fd: int):
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+    # --- Échéances et métriques --------------------------------------------------
+
+    def expected_service(self, priority: Priority) -> float:
+        """Durée moyenne récente d'une génération de cette classe (0 si inconnue)"""
+        return self._stats[priority]['service'] or 0.0
+
+    def _expected_wait(self, ahead: List[Tuple[int, int, Path]]) -> float:
+        """Attente prévue derrière les demandes `ahead`, servies `slots` par `slots`"""
+        total = sum(self.expected_service(Priority(priority)) for priority, _, _ in ahead
+                    if priority in Priority._value2member_map_)
+        return total / self.slots
+
+    def _should_give_up(self, deadline_at: float, expected_wait: float) -> bool:
+        remaining = deadline_at - time.monotonic()
+        return remaining <= 0 or remaining < expected_wait
+
+    def _record(self, priority: Priority, admitted: bool, wait: float, service: float = None):
+        with self._lock:
+            stats = self._stats[priority]
+            if not admitted:
+                stats['rejected'] += 1
+                return
+            stats['admitted'] += 1
+            stats['wait'] += wait
+            if service is not None:
+                previous = stats['service']
+                stats['service'] = service if previous is None else (1 - EWMA_ALPHA) * previous + EWMA_ALPHA * service
+
+    def queue_depth(self) -> Dict[str, int]:
+        """Demandes en attente par classe, tous processus confondus"""
+        depth = {priority.name.lower(): 0 for priority in Priority}
+        for priority, _, _ in self._tickets():
+            if priority in Priority._value2member_map_:
+                depth[Priority(priority).name.lower()] += 1
+        return depth
+
+    def metrics(self) -> Dict[str, Any]:
+        """File d'attente partagée et compteurs de ce processus"""
+        with self._lock:
+            classes = {
+                priority.name.lower(): {
+                    'admitted': stats['admitted'],
+                    'rejected': stats['rejected'],
+                    'avg_wait': stats['wait'] / stats['admitted'] if stats['admitted'] else 0.0,
+                    'avg_service': stats['service'] or 0.0,
+                }
+                for priority, stats in self._stats.items()
+            }
+        return {'slots': self.slots, 'queued': self.queue_depth(), 'classes': classes}
+
+    # --- Admission ---------------------------------------------------------------
+
+    def _deadline_at(self, priority: Priority, deadline: Optional[float]) -> float:
+        return time.monotonic() + (deadline if deadline is not None else default_deadline(priority))
+
+    @contextmanager
+    def slot(self, priority: Priority, deadline: float = None):
+        """Réserve un créneau (version bloquante, pour les threads Streamlit)"""
+        deadline_at = self._deadline_at(priority, deadline)
+        requested = time.monotonic()
+        ticket = self._enqueue(priority)
+        fd = None
+        try:
+            while fd is None:
+                fd, expected_wait = self._try_acquire(ticket)
+                if fd is None:
+                    if self._should_give_up(deadline_at, expected_wait):
+                        self._record(priority, False, 0.0)
+                        raise LLMDeadlineExceeded(f"Pas de créneau LLM ({priority.name.lower()}) avant l'échéance")
+                    time.sleep(self.poll_interval)
+        finally:
+            ticket.unlink(missing_ok=True)
+
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._release(fd)
+            self._record(priority, True, started - requested, time.monotonic() - started)
+
+    @asynccontextmanager
+    async def aslot(self, priority: Priority, deadline: float = None):
+        """Réserve un créneau sans bloquer la boucle asyncio"""
+        deadline_at = self._deadline_at(priority, deadline)
+        requested = time.monotonic()
+        ticket = await asyncio.to_thread(self._enqueue, priority)
+        fd = None
+        try:
+            while fd is None:
+                fd, expected_wait = await self._atry_acquire(ticket)
+                if fd is None:
+                    if self._should_give_up(deadline_at, expected_wait):
+                        self._record(priority, False, 0.0)
+                        raise LLMDeadlineExceeded(f"Pas de créneau LLM ({priority.name.lower()}) avant l'échéance")
+                    await asyncio.sleep(self.poll_interval)
+        finally:
+            ticket.unlink(missing_ok=True)
+
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._release(fd)
+            self._record(priority, True, started - requested, time.monotonic() - started)
+
+
+_scheduler: Optional[LLMScheduler] = None
+
+
+def get_llm_scheduler() -> LLMScheduler:
+    """Ordonnanceur partagé par le processus"""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = LLMScheduler()
+    return _scheduler
@@ -0,0 +1,58 @@
+"""
+Filtrage au fil de l'eau du raisonnement <think>...</think> des modèles deepseek-r1
+"""
+
+
+class ThinkFilter:
+    """
+    Retire les blocs <think>...</think> d'un flux de tokens. Une balise peut
+    arriver coupée entre deux morceaux : la fin du tampon qui pourrait être le
+    début d'une balise est retenue jusqu'au morceau suivant.
+    """
+
+    OPEN = '<think>'
+    CLOSE = '</think>'
+
+    def __init__(self):
+        self._buffer = ''
+        self._thinking = False
+
+    @staticmethod
+    def _partial_tag(text: str, tag: str) -> int:
+        """Longueur du plus long début de balise qui termine le texte"""
+        for length in range(min(len(tag) - 1, len(text)), 0, -1):
+            if text.endswith(tag[:length]):
+                return length
+        return 0
+
+    def feed(self, chunk: str) -> str:
+        """Ajoute un morceau du flux et renvoie la partie visible déjà sûre"""
+        self._buffer += chunk
+        visible = []
+        while True:
+            tag = self.CLOSE if self._thinking else self.OPEN
+            position = self._buffer.find(tag)
+            if position >= 0:
+                if not self._thinking:
+                    visible.append(self._buffer[:position])
+                self._buffer = self._buffer[position + len(tag):]
+                self._thinking = not self._thinking
+                continue
+
+            keep = self._partial_tag(self._buffer, tag)
+            if not self._thinking:
+                visible.append(self._buffer[:len(self._buffer) - keep])
+            self._buffer = self._buffer[len(self._buffer) - keep:]
+            return ''.join(visible)
+
+    def flush(self) -> str:
+        """Fin du flux : renvoie le reste visible (rien si un bloc <think> n'est pas fermé)"""
+        rest = '' if self._thinking else self._buffer
+        self._buffer = ''
+        return rest
+
+
+def strip_think(text: str) -> str:
+    """Retire le raisonnement d'une réponse complète"""
+    think = ThinkFilter()
+    return (think.feed(text) + think.flush()).strip()
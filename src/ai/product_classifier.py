@@ -0,0 +1,153 @@
+"""
+Classification des produits par table de règles compilée en un seul automate
+"""
+
+import re
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+Rule = Tuple[Tuple[str, ...], Dict[str, str]]
+
+# Gamme et contenant déduits du nom (la première règle qui matche gagne)
+GAMME_RULES: Sequence[Rule] = (
+    (('ipa', 'lager', 'stout', 'pilsner', 'pale ale', 'jonquille', 'pointe'),
+     {'gamme': 'clean', 'container_type': 'canette'}),
+    (('wild', 'spontané', 'mixte', 'lambic', 'gueuze'),
+     {'gamme': 'wild', 'container_type': 'bouteille'}),
+)
+
+# Formats, par ordre de priorité (appliqués après la gamme, peuvent la corriger)
+FORMAT_RULES: Sequence[Rule] = (
+    (('fût', 'fut', 'keg'),
+     {'format': 'fût 20L', 'container_type': 'fût'}),
+    # 12x AVANT les autres formats : les 12x sont toujours des canettes donc clean
+    (('12x', '12 x'),
+     {'format': 'carton 12 canettes 44cl', 'container_type': 'carton', 'gamme': 'clean'}),
+    (('24x', '24 x', 'carton de 24'),
+     {'format': 'carton 24 bouteilles 33cl', 'container_type': 'carton'}),
+    (('carton 12',),
+     {'format': 'carton 12 canettes 44cl'}),
+    (('carton 24',),
+     {'format': 'carton 24 bouteilles 33cl'}),
+    (('6x', 'carton 6'),
+     {'format': 'carton 6 bouteilles 75cl'}),
+    (('75cl', '750ml'),
+     {'format': 'bouteille 75cl'}),
+    (('33cl', '330ml'),
+     {'format': 'bouteille 33cl'}),
+    (('44cl', '440ml'),
+     {'format': 'canette 44cl'}),
+)
+
+DEFAULT_CLASSIFICATION = {
+    'type': 'unknown',
+    'format': 'unknown',
+    'gamme': 'unknown',
+    'container_type': 'unknown'
+}
+
+
+def _trie_pattern(terms: Iterable[str]) -> str:
+    """
+    Construit une alternance factorisée par préfixes communs, ex.
+    ["12x", "12 x", "24x"] -> "(?:12(?:\\ x|x)|24x)". Les options gourmandes
+    font préférer le terme le plus long à une même position.
+    """
+    trie: Dict[str, dict] = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node: Dict[str, dict]) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        if '' in node:
+            body = f'(?:{body})?'
+        return body
+
+    return build(trie)
+
+
+class ProductClassifier:
+    """
+    Compile les règles en une seule alternance regex évaluée en une passe.
+
+    Pour garder la sémantique de `term in name` malgré le balayage sans
+    chevauchement de la regex, l'alternance contient aussi les termes fusionnés
+    deux à deux (ex. "carton 24" + "24x" -> "carton 24x"), testés du plus
+    long au plus court grâce à une alternance factorisée en trie. Chaque terme du
+    motif déclenche toutes les règles dont un terme y est contenu. Le résultat
+    est mémorisé par suite de termes trouvés.
+    """
+
+    def __init__(self, gamme_rules: Sequence[Rule] = GAMME_RULES,
+                 format_rules: Sequence[Rule] = FORMAT_RULES):
+        self.groups = (tuple(gamme_rules), tuple(format_rules))
+
+        # terme de base -> [(groupe, index de règle)]
+        base: Dict[str, List[Tuple[int, int]]] = {}
+        for group_index, rules in enumerate(self.groups):
+            for rule_index, (terms, _) in enumerate(rules):
+                for term in terms:
+                    base.setdefault(term, []).append((group_index, rule_index))
+
+        # Fusions de deux termes qui se chevauchent (les chaînes de trois termes
+        # ou plus n'apparaissent pas dans des noms de produits réels)
+        terms = set(base) | {a + b[k:]
+                             for a in base for b in base if a != b
+                             for k in range(1, min(len(a), len(b)))
+                             if a[-k:] == b[:k]}
+
+        self._targets = {
+            term: [target for term_base, targets in base.items() if term_base in term for target in targets]
+            for term in terms
+        }
+        self._pattern = re.compile('\n|' + _trie_pattern(terms))
+        self._resolved: Dict[Tuple[str, ...], Dict[str, str]] = {}
+
+    def _resolve(self, matched: Iterable[str]) -> Dict[str, str]:
+        key = tuple(matched)
+        classification = self._resolved.get(key)
+        if classification is None:
+            best = [None] * len(self.groups)
+            for term in key:
+                for group_index, rule_index in self._targets[term]:
+                    if best[group_index] is None or rule_index < best[group_index]:
+                        best[group_index] = rule_index
+
+            classification = dict(DEFAULT_CLASSIFICATION)
+            for group_index, rule_index in enumerate(best):
+                if rule_index is not None:
+                    classification.update(self.groups[group_index][rule_index][1])
+            self._resolved[key] = classification
+
+        return dict(classification)
+
+    def classify_name(self, name: str) -> Dict[str, str]:
+        """Classifie un nom de produit"""
+        return self._resolve(self._pattern.findall(name.lower().replace('\n', '\0')))
+
+    def classify(self, product: Dict[str, Any]) -> Dict[str, str]:
+        """Classifie un produit WooCommerce"""
+        return self.classify_name(product.get('name', '') or '')
+
+    def classify_many(self, names: Sequence[str]) -> List[Dict[str, str]]:
+        """Classifie une page de noms en un seul balayage du texte concaténé"""
+        # Les sauts de ligne séparent les noms dans le flux des termes trouvés
+        text = '\n'.join(name.lower().replace('\n', '\0') for name in names)
+        results = []
+        current: List[str] = []
+        for term in self._pattern.findall(text):
+            if term == '\n':
+                results.append(self._resolve(current))
+                current = []
+            else:
+                current.append(term)
+        results.append(self._resolve(current))
+        return results if names else []
+
+
+PRODUCT_CLASSIFIER = ProductClassifier()
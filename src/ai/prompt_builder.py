@@ -0,0 +1,194 @@
+"""
+Construction des prompts Ollama sous un budget de tokens
+"""
+
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# En dessous, un élément trop long n'est pas tronqué mais abandonné
+MIN_TRUNCATED_TOKENS = 24
+
+TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+# Retours à la ligne et indentation : une espace simple est absorbée par le mot suivant, pas un bloc
+WHITESPACE_RE = re.compile(r"\n\s*|\s{2,}")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimation du nombre de tokens (BPE) : un token par ponctuation, un par
+    tranche de 4 caractères d'un mot, un par tranche de 8 espaces d'un
+    retour à la ligne ou d'une indentation. Les comptes exacts de chaque
+    génération (`prompt_eval_count` d'Ollama) sont journalisés pour recaler
+    l'estimation.
+    """
+    words = sum(-(-len(piece) // 4) for piece in TOKEN_RE.findall(text))
+    return words + sum(-(-len(run) // 8) for run in WHITESPACE_RE.findall(text))
+
+
+def compact(text: str) -> str:
+    """Espaces et indentation réduits, lignes vides supprimées"""
+    return '\n'.join(' '.join(line.split()) for line in text.splitlines() if line.strip())
+
+
+def _dedupe_key(line: str) -> str:
+    return ' '.join(TOKEN_RE.findall(line.lower()))
+
+
+@dataclass
+class Section:
+    name: str
+    title: str = ''
+    # Éléments dans l'ordre de pertinence (documents, lignes de texte ou de tableau)
+    items: List[str] = field(default_factory=list)
+    required: bool = False
+    kept: List[str] = field(default_factory=list)
+    tokens: int = 0
+    dropped: int = 0
+    truncated: int = 0
+
+    def render(self) -> str:
+        if not self.kept:
+            return ''
+        return '\n'.join(([self.title] if self.title else []) + self.kept)
+
+
+class PromptBuilder:
+    """
+    Prompt assemblé section par section. Les sections obligatoires (règles,
+    question) sont toujours incluses ; les sections de contexte sont
+    compactées, dédoublonnées ligne à ligne, triées par pertinence puis
+    remplies dans l'ordre d'ajout jusqu'au budget. Le rendu garde l'ordre
+    d'ajout des sections et `report()` donne les tokens de chacune.
+    """
+
+    def __init__(self, budget: int = None, counter: Callable[[str], int] = estimate_tokens):
+        # Budget par défaut (le modèle 7B sur CPU traite le prompt token par token)
+        self.budget = budget or int(os.getenv("PROMPT_TOKEN_BUDGET", "1200"))
+        self.count = counter
+        self.sections: List[Section] = []
+        self._built = False
+
+    def add_text(self, name: str, text: str, required: bool = False, title: str = '') -> 'PromptBuilder':
+        """Texte libre ; obligatoire, il est gardé entier, sinon ses lignes remplissent le budget"""
+        self.sections.append(Section(name, title, compact(text).splitlines(), required=required))
+        self._built = False
+        return self
+
+    def add_snippets(self, name: str, title: str, snippets: Iterable[str],
+                     distances: Optional[Sequence[float]] = None) -> 'PromptBuilder':
+        """Documents de contexte (résultats ChromaDB), du plus au moins proche si les distances sont données"""
+        snippets = list(snippets or [])
+        order = range(len(snippets))
+        if distances is not None:
+            order = sorted(order, key=lambda i: distances[i])
+        # Un élément par document ; ses lignes sont dédoublonnées une à une puis mises bout à bout
+        items = [compact(snippets[i]) for i in order]
+        self.sections.append(Section(name, title, [item for item in items if item]))
+        self._built = False
+        return self
+
+    def add_table(self, name: str, title: str, rows: Iterable[Dict[str, Any]],
+                  columns: Sequence[Tuple[str, str]],
+                  distances: Optional[Sequence[float]] = None) -> 'PromptBuilder':
+        """Lignes de tableau compactes `a | b | c` sous un en-tête unique, dans l'ordre de pertinence"""
+        rows = list(rows or [])
+        order = range(len(rows))
+        if distances is not None:
+            order = sorted(order, key=lambda i: distances[i])
+        header = ' | '.join(label for _, label in columns)
+        items = [' | '.join(_cell(rows[i].get(key)) for key, _ in columns) for i in order]
+        self.sections.append(Section(name, f"{title}\n{header}" if title else header, items))
+        self._built = False
+        return self
+
+    def _allocate(self):
+        """Obligatoires d'abord, puis le contexte dans l'ordre d'ajout jusqu'au budget"""
+        seen = set()
+        remaining = self.budget
+        for section in self.sections:
+            section.kept, section.dropped, section.truncated = [], 0, 0
+
+        for section in [s for s in self.sections if s.required]:
+            section.kept = list(section.items)
+            section.tokens = self.count(section.render()) if section.kept else 0
+            remaining -= section.tokens
+            seen.update(_dedupe_key(line) for line in section.items)
+
+        for section in [s for s in self.sections if not s.required]:
+            title_tokens = self.count(section.title) if section.title else 0
+            used = 0
+            for item in section.items:
+                lines = [line for line in item.split('\n') if _dedupe_key(line) not in seen]
+                if not lines:
+                    continue
+                item = ' '.join(lines)
+                cost = self.count(item) + 1
+                available = remaining - used - (0 if section.kept else title_tokens)
+                if cost > available:
+                    # Budget atteint : le premier élément qui déborde est tronqué s'il reste de la place,
+                    # les suivants (moins pertinents) sont abandonnés
+                    if available >= MIN_TRUNCATED_TOKENS:
+                        section.kept.append(self._truncate(item, available - 2))
+                        section.truncated = 1
+                    break
+                seen.update(_dedupe_key(line) for line in lines)
+                section.kept.append(item)
+                used += cost
+            section.tokens = self.count(section.render()) if section.kept else 0
+            remaining -= section.tokens
+            # Doublons complets compris
+            section.dropped = len(section.items) - len(section.kept)
+        self._built = True
+
+    def _truncate(self, item: str, tokens: int) -> str:
+        """Coupe un élément à peu près à `tokens` tokens, sur une limite de mot"""
+        words = item.split(' ')
+        kept = []
+        for word in words:
+            if self.count(' '.join(kept + [word])) > tokens - 1:
+                break
+            kept.append(word)
+        return ' '.join(kept) + ' …'
+
+    def build(self, include: Iterable[str] = None) -> str:
+        """Prompt final (ou seulement les sections `include`), sections séparées par une ligne vide"""
+        if not self._built:
+            self._allocate()
+        include = set(include) if include is not None else None
+        parts = [section.render() for section in self.sections
+                 if include is None or section.name in include]
+        return '\n\n'.join(part for part in parts if part)
+
+    def report(self) -> Dict[str, Any]:
+        """Tokens estimés par section, total et budget ; éléments abandonnés ou tronqués par section"""
+        if not self._built:
+            self._allocate()
+        return {
+            'budget': self.budget,
+            'total': self.count(self.build()),
+            'sections': {
+                section.name: {'tokens': section.tokens, 'kept': len(section.kept),
+                               'dropped': section.dropped, 'truncated': section.truncated}
+                for section in self.sections
+            },
+        }
+
+    def summary(self) -> str:
+        """Rapport sur une ligne, pour les logs"""
+        report = self.report()
+        sections = ', '.join(
+            f"{name} {values['tokens']}" + (f" (-{values['dropped']})" if values['dropped'] else '')
+            for name, values in report['sections'].items()
+        )
+        return f"{report['total']}/{report['budget']} tokens estimés: {sections}"
+
+
+def _cell(value: Any) -> str:
+    # NaN (stock non géré dans les tableaux pandas) compris
+    if value is None or value == '' or value != value:
+        return '-'
+    if isinstance(value, float):
+        return f"{value:g}"
+    return ' '.join(str(value).split())
@@ -0,0 +1,222 @@
+"""
+Client du service de recherche (src/ai/query_service.py)
+
+Connexions HTTP keep-alive en pool, sur TCP ou sur socket Unix, et adaptateurs
+qui imitent ce que le bot, l'interface et la synchro utilisent de ChromaDB :
+`RemoteCollection` (query, get, count) et `RemoteEmbeddingFunction`. Quand
+QUERY_SERVICE_URL est défini, ils remplacent le client ChromaDB et le modèle
+d'embedding de chaque processus.
+"""
+
+import http.client
+import json
+import os
+import queue
+import socket
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from loguru import logger
+
+
+def query_service_url() -> str:
+    """
+    http://127.0.0.1:8003 ou unix:///tmp/lapaisee-query.sock ; vide = ChromaDB
+    local dans chaque processus. Lu à l'appel, après le load_dotenv des points d'entrée.
+    """
+    return os.getenv("QUERY_SERVICE_URL", "")
+
+
+class QueryServiceError(Exception):
+    """Erreur du service de recherche (injoignable ou réponse en erreur)"""
+
+
+def parse_service_url(url: str) -> Tuple[str, str, int, str]:
+    """(schéma, hôte, port, chemin du socket) d'une URL http:// ou unix://"""
+    parsed = urlparse(url)
+    if parsed.scheme == "unix":
+        return "unix", "localhost", 0, parsed.path
+    if parsed.scheme != "http":
+        raise ValueError(f"URL du service de recherche non supportée: {url}")
+    return "http", parsed.hostname or "127.0.0.1", parsed.port or 80, ""
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTPConnection sur un socket Unix"""
+
+    def __init__(self, socket_path: str, timeout: float = None):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class QueryServiceClient:
+    """
+    Client thread-safe : jusqu'à `pool_size` connexions gardées ouvertes et
+    réutilisées. Une connexion fermée par le serveur entre deux requêtes est
+    remplacée et la requête rejouée une fois.
+    """
+
+    def __init__(self, url: str = None, pool_size: int = None, timeout: float = None):
+        self.url = url or query_service_url()
+        self.scheme, self.host, self.port, self.socket_path = parse_service_url(self.url)
+        self.timeout = timeout or float(os.getenv("QUERY_SERVICE_TIMEOUT", "30"))
+        self._pool: "queue.LifoQueue[http.client.HTTPConnection]" = queue.LifoQueue(
+            maxsize=pool_size or int(os.getenv("QUERY_SERVICE_POOL_SIZE", "8"))
+        )
+        # Dernière réponse de /health (horodatage, contenu) pour health(max_age)
+        self._health: Optional[Tuple[float, Dict[str, Any]]] = None
+
+    def _connect(self) -> http.client.HTTPConnection:
+        if self.scheme == "unix":
+            return UnixHTTPConnection(self.socket_path, timeout=self.timeout)
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def _acquire(self) -> Tuple[http.client.HTTPConnection, bool]:
+        """(connexion, réutilisée ?)"""
+        try:
+            return self._pool.get_nowait(), True
+        except queue.Empty:
+            return self._connect(), False
+
+    def _release(self, connection: http.client.HTTPConnection):
+        try:
+            self._pool.put_nowait(connection)
+        except queue.Full:
+            connection.close()
+
+    def request(self, method: str, path: str, payload: Any = None) -> Any:
+        """Requête JSON, réponse décodée"""
+        body = json.dumps(payload).encode("utf-8") if payload is not None else None
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        connection, reused = self._acquire()
+        while True:
+            try:
+                connection.request(method, path, body=body, headers=headers)
+                response = connection.getresponse()
+                data = response.read()
+                break
+            except (http.client.HTTPException, ConnectionError) as e:
+                connection.close()
+                if not reused:
+                    raise QueryServiceError(f"Service de recherche injoignable ({self.url}): {e}") from e
+                # Connexion keep-alive fermée côté serveur : une nouvelle, une seule fois
+                connection, reused = self._connect(), False
+            except OSError as e:
+                connection.close()
+                raise QueryServiceError(f"Service de recherche injoignable ({self.url}): {e}") from e
+
+        if response.status != 200:
+            connection.close()
+            raise QueryServiceError(f"{method} {path}: {response.status} {data[:200]!r}")
+        self._release(connection)
+        return json.loads(data)
+
+    def search(self, collection: str, query: str, n_results: int = 10,
+               where: Optional[Dict] = None, include: List[str] = None) -> Dict[str, Any]:
+        payload = {'query': query, 'n_results': n_results, 'where': where}
+        if include is not None:
+            payload['include'] = include
+        return self.request("POST", f"/collections/{collection}/search", payload)
+
+    def batch_search(self, collection: str, queries: List[str], n_results: int = 10,
+                     where: Optional[Dict] = None, include: List[str] = None) -> Dict[str, Any]:
+        payload = {'queries': queries, 'n_results': n_results, 'where': where}
+        if include is not None:
+            payload['include'] = include
+        return self.request("POST", f"/collections/{collection}/batch-search", payload)
+
+    def get(self, collection: str, ids: List[str] = None, where: Optional[Dict] = None,
+            limit: int = None, include: List[str] = None) -> Dict[str, Any]:
+        payload = {'ids': ids, 'where': where, 'limit': limit}
+        if include is not None:
+            payload['include'] = include
+        return self.request("POST", f"/collections/{collection}/get", payload)
+
+    def count(self, collection: str) -> int:
+        return self.request("GET", f"/collections/{collection}/count")['count']
+
+    def stock(self, ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Stock et prix actuels par id produit"""
+        return self.request("POST", "/stock", {'ids': [str(product_id) for product_id in ids]})
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        return self.request("POST", "/embed", {'texts': texts})['embeddings']
+
+    def health(self, max_age: float = 0) -> Dict[str, Any]:
+        """État du service ; la réponse précédente sert tant qu'elle a moins de max_age secondes"""
+        cached = self._health
+        if cached is not None and time.monotonic() - cached[0] < max_age:
+            return cached[1]
+        health = self.request("GET", "/health")
+        self._health = (time.monotonic(), health)
+        return health
+
+    def collection(self, name: str) -> 'RemoteCollection':
+        return RemoteCollection(self, name)
+
+
+class RemoteCollection:
+    """Sous-ensemble de l'API Collection de ChromaDB servi par le service de recherche"""
+
+    def __init__(self, client: QueryServiceClient, name: str):
+        self.client = client
+        self.name = name
+
+    def query(self, query_texts: List[str], n_results: int = 10, where: Optional[Dict] = None,
+              include: List[str] = None) -> Dict[str, Any]:
+        if len(query_texts) == 1:
+            return self.client.search(self.name, query_texts[0], n_results, where, include)
+        return self.client.batch_search(self.name, list(query_texts), n_results, where, include)
+
+    def get(self, ids: List[str] = None, where: Optional[Dict] = None, limit: int = None,
+            include: List[str] = None) -> Dict[str, Any]:
+        return self.client.get(self.name, ids, where, limit, include)
+
+    def count(self) -> int:
+        return self.client.count(self.name)
+
+
+class RemoteEmbeddingFunction:
+    """Fonction d'embedding ChromaDB qui délègue au modèle (et au cache) du service"""
+
+    def __init__(self, client: QueryServiceClient = None):
+        self.client = client or get_query_client()
+
+    def __call__(self, input: List[str]) -> List[List[float]]:
+        return self.client.embed(list(input))
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Statistiques du cache d'embeddings du service (à zéro s'il est injoignable),
+        rafraîchies au plus toutes les QUERY_SERVICE_STATS_TTL secondes
+        """
+        try:
+            stats = self.client.health(max_age=float(os.getenv("QUERY_SERVICE_STATS_TTL", "30"))).get('embedding_cache')
+        except QueryServiceError as e:
+            logger.warning(f"Statistiques du service de recherche indisponibles: {e}")
+            stats = None
+        return stats or {'hits': 0, 'misses': 0, 'hit_rate': 0.0}
+
+
+_client: Optional[QueryServiceClient] = None
+_client_lock = threading.Lock()
+
+
+def get_query_client() -> Optional[QueryServiceClient]:
+    """Client partagé dans le processus, None si QUERY_SERVICE_URL n'est pas défini"""
+    global _client
+    url = query_service_url()
+    if not url:
+        return None
+    with _client_lock:
+        if _client is None:
+            _client = QueryServiceClient(url)
+            logger.info(f"Recherches déléguées au service {url}")
+        return _client
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Service de recherche local : un seul processus charge le modèle d'embedding
+et ouvre ChromaDB, le bot, l'interface et la synchro l'interrogent en HTTP
+(TCP ou socket Unix) via src/ai/query_client.py.
+
+Les index vectoriels d'un client ChromaDB ne voient pas les écritures faites
+par un autre processus : le service rouvre sa base à chaque nouvelle version
+du catalogue (synchro, stock, webhooks, contexte).
+
+    python src/ai/query_service.py                       # QUERY_SERVICE_URL de .env
+    uvicorn src.ai.query_service:app --uds /tmp/lapaisee-query.sock --workers 2
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from chromadb.api import ServerAPI
+from chromadb.config import Settings, System
+from dotenv import load_dotenv
+from fastapi import FastAPI, HTTPException, Response
+from loguru import logger
+from pydantic import BaseModel
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from src.ai.embedding_cache import get_embedding_function
+from src.utils.catalog_version import CatalogVersionWatcher
+
+load_dotenv()
+logger.add("data/logs/query_service.log", rotation="10 MB")
+
+COLLECTIONS = ("products", "brewery_context")
+DEFAULT_INCLUDE = ["metadatas", "documents", "distances"]
+
+# Champs renvoyés par l'endpoint de stock
+STOCK_FIELDS = ("name", "sku", "format", "stock_quantity", "stock_status", "manage_stock", "price")
+
+
+class SearchRequest(BaseModel):
+    query: str
+    n_results: int = 10
+    where: Optional[Dict[str, Any]] = None
+    include: List[str] = DEFAULT_INCLUDE
+
+
+class BatchSearchRequest(BaseModel):
+    queries: List[str]
+    n_results: int = 10
+    where: Optional[Dict[str, Any]] = None
+    include: List[str] = DEFAULT_INCLUDE
+
+
+class GetRequest(BaseModel):
+    ids: Optional[List[str]] = None
+    where: Optional[Dict[str, Any]] = None
+    limit: Optional[int] = None
+    include: List[str] = ["metadatas"]
+
+
+class StockRequest(BaseModel):
+    ids: List[str]
+
+
+class EmbedRequest(BaseModel):
+    texts: List[str]
+
+
+class QueryEngine:
+    """Client ChromaDB et fonction d'embedding du service, rouverts quand le catalogue change"""
+
+    def __init__(self, persist_directory: str = None, embedding_function=None,
+                 watcher: CatalogVersionWatcher = None):
+        self.persist_directory = persist_directory or os.getenv("CHROMA_PERSIST_DIRECTORY", "./data/chromadb")
+        self.embedding_function = embedding_function or get_embedding_function()
+        self.watcher = watcher or CatalogVersionWatcher()
+        self._lock = threading.Lock()
+        self._collections: Dict[str, Any] = {}
+        self._version = None
+        self._system: Optional[System] = None
+        # Système de la version précédente, arrêté à la réouverture suivante
+        self._retired: Optional[System] = None
+        self.reopens = 0
+
+    @property
+    def version(self):
+        """Version du catalogue des collections ouvertes"""
+        return self._version
+
+    def collection(self, name: str):
+        """Collection à jour ; les requêtes en cours gardent l'ancienne jusqu'à leur fin"""
+        if name not in COLLECTIONS:
+            raise HTTPException(status_code=404, detail=f"Collection inconnue: {name}")
+        version = self.watcher.current()
+        if not self._collections or self._version != version:
+            with self._lock:
+                if not self._collections or self._version != version:
+                    self._open(version)
+        return self._collections[name]
+
+    def _open(self, version):
+        """
+        Ouvre un système ChromaDB propre au service (hors du cache partagé
+        de chromadb.PersistentClient) et l'échange sous verrou avec le précédent.
+        Le système remplacé sert encore aux requêtes en cours ; il n'est arrêté
+        qu'à la réouverture suivante.
+        """
+        system = System(Settings(is_persistent=True, persist_directory=self.persist_directory,
+                                 anonymized_telemetry=False))
+        api = system.instance(ServerAPI)
+        system.start()
+        collections = {
+            name: api.get_or_create_collection(name=name, embedding_function=self.embedding_function)
+            for name in COLLECTIONS
+        }
+
+        if self._retired is not None:
+            self._retired.stop()
+        if self._system is not None:
+            self.reopens += 1
+        self._retired, self._system = self._system, system
+        self._collections = collections
+        self._version = version
+        logger.info(f"Service de recherche: ChromaDB ouvert (version {version})")
+
+
+def _json(data: Any) -> Response:
+    # Résultats ChromaDB déjà sérialisables : pas de passage par jsonable_encoder
+    return Response(json.dumps(data, ensure_ascii=False), media_type="application/json")
+
+
+def create_app(engine_factory=QueryEngine) -> FastAPI:
+    """App du service ; `engine_factory` permet d'injecter une autre fonction d'embedding (benchs)"""
+    service = FastAPI(title="L'Apaisée - service de recherche")
+
+    @service.on_event("startup")
+    def startup():
+        service.state.engine = engine_factory()
+        service.state.stats = {'search': 0, 'batch_search': 0, 'get': 0, 'stock': 0, 'embed': 0}
+        # Modèle et index chargés avant la première requête
+        service.state.engine.collection("products")
+        logger.info("Service de recherche démarré")
+
+    def engine() -> QueryEngine:
+        return service.state.engine
+
+    # Routes synchrones : exécutées dans le pool de threads de FastAPI, la boucle reste libre
+    @service.post("/collections/{name}/search")
+    def search(name: str, request: SearchRequest):
+        service.state.stats['search'] += 1
+        return _json(engine().collection(name).query(
+            query_texts=[request.query], n_results=request.n_results,
+            where=request.where, include=request.include
+        ))
+
+    @service.post("/collections/{name}/batch-search")
+    def batch_search(name: str, request: BatchSearchRequest):
+        """Plusieurs requêtes, embeddées en un seul lot"""
+        service.state.stats['batch_search'] += 1
+        if not request.queries:
+            return _json({'ids': [], 'metadatas': [], 'documents': [], 'distances': []})
+        return _json(engine().collection(name).query(
+            query_texts=request.queries, n_results=request.n_results,
+            where=request.where, include=request.include
+        ))
+
+    @service.post("/collections/{name}/get")
+    def get(name: str, request: GetRequest):
+        service.state.stats['get'] += 1
+        return _json(engine().collection(name).get(
+            ids=request.ids, where=request.where, limit=request.limit, include=request.include
+        ))
+
+    @service.get("/collections/{name}/count")
+    def count(name: str):
+        return {'count': engine().collection(name).count()}
+
+    @service.post("/stock")
+    def stock(request: StockRequest):
+        """Stock et prix actuels de produits, par id (métadonnées seules, sans embedding)"""
+        service.state.stats['stock'] += 1
+        # Une commande peut citer deux fois le même produit, ChromaDB refuse les doublons
+        ids = list(dict.fromkeys(request.ids))
+        if not ids:
+            return _json({})
+        records = engine().collection("products").get(ids=ids, include=["metadatas"])
+        return _json({
+            product_id: {field: metadata.get(field) for field in STOCK_FIELDS}
+            for product_id, metadata in zip(records['ids'], records['metadatas'])
+        })
+
+    @service.post("/embed")
+    def embed(request: EmbedRequest):
+        """Embeddings de textes (synchro, webhooks) avec le modèle et le cache du service"""
+        service.state.stats['embed'] += 1
+        embeddings = engine().embedding_function(request.texts)
+        return _json({'embeddings': [list(map(float, vector)) for vector in embeddings]})
+
+    @service.get("/health")
+    def health():
+        stats = getattr(engine().embedding_function, 'stats', None)
+        return {
+            'status': 'ok',
+            'pid': os.getpid(),
+            'catalog_version': engine().version,
+            'reopens': engine().reopens,
+            'requests': service.state.stats,
+            'embedding_cache': stats() if stats else None,
+        }
+
+    return service
+
+
+app = create_app()
+
+
+def main():
+    from src.ai.query_client import parse_service_url
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Service de recherche partagé (modèle d'embedding + ChromaDB)")
+    parser.add_argument("--url", default=os.getenv("QUERY_SERVICE_URL", "http://127.0.0.1:8003"),
+                        help="http://hôte:port ou unix:///chemin/du/socket")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("QUERY_SERVICE_WORKERS", "1")))
+    args = parser.parse_args()
+
+    scheme, host, port, socket_path = parse_service_url(args.url)
+    if scheme == "unix":
+        uvicorn.run("src.ai.query_service:app", uds=socket_path, workers=args.workers)
+    else:
+        uvicorn.run("src.ai.query_service:app", host=host, port=port, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Cache des réponses générées par le LLM pour des commandes identiques
+"""
+
+import hashlib
+import json
+import os
+from typing import Any, Dict, List
+
+from src.ai.catalog_index import normalize
+from src.utils.catalog_version import CatalogVersionWatcher
+from src.utils.versioned_cache import VersionedCache
+
+
+class ResponseCache(VersionedCache):
+    """
+    Réponses indexées par commande normalisée (articles, résultat de la
+    vérification des stocks, salutation et politesse).
+
+    Le cache est vidé dès que la version du catalogue change : une réponse ne
+    cite jamais un stock périmé.
+    """
+
+    def __init__(self, ttl: float = None, max_entries: int = None, watcher: CatalogVersionWatcher = None):
+        super().__init__(
+            ttl=ttl if ttl is not None else float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "86400")),
+            max_entries=max_entries or int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "500")),
+            watcher=watcher
+        )
+
+    def key(self, order: Dict[str, Any], stock_check: List[Dict[str, Any]], model: str = '') -> str:
+        """Clé d'une commande : le texte d'origine n'en fait pas partie, seule son interprétation compte"""
+        payload = {
+            'model': model,
+            'greeting': bool(order.get('greeting')),
+            'polite': bool(order.get('polite')),
+            'items': [
+                [item['item']['quantity'], item['item'].get('container'), normalize(item['item']['product']),
+                 (item['product'] or {}).get('name'), item['available']]
+                for item in stock_check
+            ],
+        }
+        return hashlib.sha256(json.dumps(payload, ensure_ascii=False).encode("utf-8")).hexdigest()
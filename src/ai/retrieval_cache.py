@@ -0,0 +1,35 @@
+"""
+Cache des résultats de recherche ChromaDB de l'interface
+"""
+
+import os
+from typing import Any, Dict
+
+from src.utils.catalog_version import CatalogVersionWatcher
+from src.utils.versioned_cache import VersionedCache
+
+
+class RetrievalCache(VersionedCache):
+    """
+    Résultats de `collection.query` indexés par (collection, requête,
+    n_results). Chaque rerun Streamlit qui repose la même question évite
+    l'embedding et la requête ; une nouvelle version du catalogue vide le cache.
+
+    Les résultats renvoyés sont partagés entre les reruns : ne pas les modifier.
+    """
+
+    def __init__(self, ttl: float = None, max_entries: int = None, watcher: CatalogVersionWatcher = None):
+        super().__init__(
+            ttl=ttl if ttl is not None else float(os.getenv("RETRIEVAL_CACHE_TTL_SECONDS", "3600")),
+            max_entries=max_entries or int(os.getenv("RETRIEVAL_CACHE_MAX_ENTRIES", "256")),
+            watcher=watcher
+        )
+
+    def query(self, collection, query: str, n_results: int) -> Dict[str, Any]:
+        """Résultats de la recherche, depuis le cache si la même requête a déjà été faite"""
+        key = (collection.name, ' '.join(query.split()), n_results)
+        results = self.get(key)
+        if results is None:
+            results = collection.query(query_texts=[query], n_results=n_results)
+            self.put(key, results)
+        return results
@@ -0,0 +1,214 @@
+"""
+Parser de commandes WhatsApp : tokenizer en une passe et petite grammaire
+quantité / contenant / produit, compilés une seule fois au chargement
+"""
+
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Un seul automate pour tout le message : formats (75cl), packs (12x), nombres, mots, séparateurs
+TOKEN_RE = re.compile(r"""
+    (?P<format>\d+(?:[.,]\d+)?\s?(?:cl|ml|l)\b)
+  | (?P<pack>\d+\s?x)(?=\d|\b)
+  | (?P<time>\d{1,2}\s?h\d{0,2})\b
+  | (?P<number>\d+)
+  | (?P<word>[^\W\d_]+)
+  | (?P<sep>[,.;:!?+&/\n])
+""", re.VERBOSE)
+
+NUMBER_WORDS = {
+    'un': 1, 'une': 1, 'deux': 2, 'trois': 3, 'quatre': 4, 'cinq': 5, 'six': 6, 'sept': 7,
+    'huit': 8, 'neuf': 9, 'dix': 10, 'onze': 11, 'douze': 12, 'treize': 13, 'quatorze': 14,
+    'quinze': 15, 'seize': 16, 'vingt': 20, 'trente': 30, 'quarante': 40, 'cinquante': 50,
+    'soixante': 60, 'septante': 70, 'huitante': 80, 'octante': 80, 'nonante': 90,
+    'vingts': 20, 'cent': 100, 'cents': 100,
+}
+
+# Mots suivis d'une unité dans un nombre composé ("vingt-deux", "soixante-dix", "septante-cinq")
+TENS = frozenset((20, 30, 40, 50, 60, 70, 80, 90))
+
+# Un nombre suivi d'un mois est une date ("le 12 mars"), pas une quantité
+MONTHS = frozenset((
+    'janvier', 'février', 'fevrier', 'mars', 'avril', 'mai', 'juin', 'juillet', 'août', 'aout',
+    'septembre', 'octobre', 'novembre', 'décembre', 'decembre',
+    'janv', 'févr', 'fevr', 'avr', 'juil', 'oct', 'nov', 'déc', 'dec',
+))
+
+CONTAINERS = {
+    'fût': 'fût', 'fûts': 'fût', 'fut': 'fût', 'futs': 'fût', 'keg': 'fût', 'kegs': 'fût',
+    'carton': 'carton', 'cartons': 'carton', 'caisse': 'carton', 'caisses': 'carton',
+    'canette': 'canette', 'canettes': 'canette', 'can': 'canette', 'cans': 'canette',
+    'bouteille': 'bouteille', 'bouteilles': 'bouteille',
+}
+
+GREETINGS = frozenset(('salut', 'bonjour', 'hello', 'coucou', 'bonsoir'))
+POLITENESS = frozenset(('merci', 'stp', 'svp', 'plait', 'plaît'))
+
+# Liaisons entre la quantité/le contenant et le produit
+OF_WORDS = frozenset(('de', 'd', 'du', 'des', 'l', 'la', 'le', 'les'))
+
+# Mots qui terminent le nom d'un produit
+STOP_WORDS = frozenset((
+    'et', 'puis', 'plus', 'ainsi', 'pour', 's', 'il', 'te', 'vous', 'please', 'thanks', 'demain',
+    'aujourd', 'ce', 'cette', 'si', 'ciao', 'mais', 'aussi', 'avec', 'sans', 'car', 'a', 'à',
+    'merci', 'stp', 'svp', 'plait', 'plaît', 'x',
+)) | GREETINGS
+
+# Lexique complet, construit une fois : mot -> (type, valeur normalisée)
+LEXICON: Dict[str, Tuple[str, str]] = {
+    **{word: ('stop', word) for word in STOP_WORDS},
+    **{word: ('of', word) for word in OF_WORDS},
+    **{word: ('numword', word) for word in NUMBER_WORDS},
+    **{word: ('month', word) for word in MONTHS},
+    **{word: ('container', container) for word, container in CONTAINERS.items()},
+}
+
+# Longueur maximale d'un nom de produit (en mots)
+MAX_PRODUCT_WORDS = 5
+
+# Contenant d'un article sans contenant ni ellipse possible
+UNIT = 'unité'
+
+Token = Tuple[str, str]
+
+
+class OrderParser:
+    """
+    Reconnaît les articles `QUANTITÉ [CONTENANT] [de] PRODUIT` d'un message :
+
+    - quantités en chiffres ou en lettres, composées comprises ("deux fûts",
+      "vingt-deux canettes", "soixante-dix bouteilles") ;
+    - quantités multiplicatives sans conditionnement ("3 x jonquille", "2x pointe") ;
+    - nombres suivis d'un mois ignorés ("livrer le 12 mars") ;
+    - ellipse du contenant ("2 fûts de jonquille et 1 de pointe" -> 1 fût de pointe) ;
+    - précision de conditionnement ignorée ("3 cartons de 12 canettes de IPA") ;
+    - salutation et politesse détectées pendant la même passe.
+    """
+
+    def tokenize(self, text: str) -> List[Token]:
+        """Découpe un message en (type, valeur) ; les mots du lexique reçoivent leur type"""
+        tokens = []
+        append = tokens.append
+        lexicon = LEXICON
+        for match in TOKEN_RE.finditer(text.lower()):
+            kind = match.lastgroup
+            if kind == 'word':
+                append(lexicon.get(match[0]) or (kind, match[0]))
+            else:
+                append((kind, match[0]))
+        return tokens
+
+    def _number_words(self, tokens: List[Token], i: int) -> Tuple[int, int]:
+        """Valeur du nombre en lettres commençant au token i, composés compris, et index du token suivant"""
+        value = last = NUMBER_WORDS[tokens[i][1]]
+        j = i + 1
+        while j < len(tokens):
+            kind, word = tokens[j]
+            # "vingt et un", "soixante et onze"
+            if (kind, word) == ('stop', 'et') and last in TENS and j + 1 < len(tokens) \
+                    and tokens[j + 1][1] in ('un', 'une', 'onze'):
+                j += 1
+                continue
+            if kind != 'numword':
+                break
+            n = NUMBER_WORDS[word]
+            if n == 100 and value < 10:
+                value, last = value * 100, 100
+            elif n == 20 and last == 4:
+                value, last = value + 76, 80
+            elif (last in TENS and n < 10) or (last in (60, 80) and 10 <= n < 20) \
+                    or (last == 10 and 7 <= n <= 9) or (last == 100 and n < 100):
+                value, last = value + n, n
+            else:
+                # Deux nombres qui ne se composent pas ("deux trois") : seul le dernier compte
+                break
+            j += 1
+        return value, j
+
+    def _quantity(self, tokens: List[Token], i: int) -> Optional[Tuple[int, int]]:
+        """Quantité commençant au token i et index du token suivant, None si ce n'en est pas une"""
+        kind, value = tokens[i]
+        if kind == 'numword':
+            quantity, end = self._number_words(tokens, i)
+        else:
+            quantity, end = int(value.rstrip('x ')), i + 1
+        following = tokens[end][0] if end < len(tokens) else None
+
+        if kind == 'number':
+            return (quantity, end) if following in ('container', 'of', 'word', 'pack', 'format') else None
+        if kind == 'pack':
+            # "3 x jonquille" : un multiplicateur sans conditionnement derrière est une quantité
+            return (quantity, end) if following in ('word', 'of') else None
+        # "un"/"une" ne sont des quantités que devant un contenant ("une caisse", "un de pointe")
+        if end == i + 1 and value in ('un', 'une'):
+            return (1, end) if following in ('container', 'of') else None
+        return (quantity, end) if following in ('container', 'of', 'word') else None
+
+    def parse(self, text: str) -> Dict:
+        """Parse un message de commande (même format que LapaiseeBot.parse_order)"""
+        tokens = self.tokenize(text)
+        values = {value for _, value in tokens}
+        order = {
+            'items': [],
+            'greeting': not GREETINGS.isdisjoint(values),
+            'polite': not POLITENESS.isdisjoint(values),
+            'original_text': text
+        }
+
+        previous_container = None
+        i = 0
+        while i < len(tokens):
+            if tokens[i][0] not in ('number', 'numword', 'pack'):
+                i += 1
+                continue
+            parsed = self._quantity(tokens, i)
+            if parsed is None:
+                i += 1
+                continue
+            quantity, i = parsed
+
+            container = None
+            if i < len(tokens) and tokens[i][0] in ('container', 'pack'):
+                container = tokens[i][1] if tokens[i][0] == 'container' else 'carton'
+                i += 1
+
+            # Formats et liaisons entre contenant et produit ("fûts 20l de", "cartons de 12 canettes de")
+            while i < len(tokens):
+                kind = tokens[i][0]
+                if kind in ('of', 'format', 'pack'):
+                    i += 1
+                elif kind == 'number' and i + 1 < len(tokens) and tokens[i + 1][0] == 'container' and container:
+                    i += 2
+                else:
+                    break
+
+            words = []
+            while i < len(tokens) and tokens[i][0] in ('word', 'format', 'pack', 'of') \
+                    and len(words) < MAX_PRODUCT_WORDS:
+                words.append(tokens[i][1])
+                i += 1
+            while words and tokens[i - 1][0] == 'of':
+                # Une liaison en fin de nom ("jonquille de") n'en fait pas partie
+                words.pop()
+                i -= 1
+
+            if not words:
+                continue
+
+            if container is None:
+                container = previous_container or UNIT
+            previous_container = container if container != UNIT else previous_container
+            order['items'].append({
+                'quantity': quantity,
+                'container': container,
+                'product': ' '.join(words)
+            })
+
+        return order
+
+    def parse_many(self, texts: Iterable[str]) -> List[Dict]:
+        """Parse une série de messages"""
+        return [self.parse(text) for text in texts]
+
+
+ORDER_PARSER = OrderParser()
@@ -0,0 +1,81 @@
+"""
+Message Telegram mis à jour progressivement pendant la génération d'une réponse
+"""
+
+import asyncio
+import time
+from typing import Callable, Optional
+
+from loguru import logger
+from telegram.error import BadRequest, RetryAfter
+
+# Longueur maximale d'un message Telegram
+MAX_MESSAGE_LENGTH = 4096
+
+# Essais d'édition finale avant de renvoyer la réponse dans un nouveau message
+FINAL_EDIT_ATTEMPTS = 3
+
+
+class ProgressiveMessage:
+    """
+    Édite un seul message au plus une fois toutes les `interval` secondes
+    (Telegram limite les éditions par chat), puis le finalise avec le texte
+    complet. Le texte qui dépasse la taille d'un message part en messages suivants.
+    """
+
+    def __init__(self, message, interval: float = 1.0, clock: Callable[[], float] = time.monotonic):
+        self.message = message
+        self.interval = interval
+        self.clock = clock
+        self.edits = 0
+        self._shown = ''
+        self._next_edit = 0.0
+
+    async def _edit(self, text: str) -> Optional[float]:
+        """Édite le message ; renvoie None si c'est fait, sinon le délai imposé (0 si refus définitif)"""
+        try:
+            await self.message.edit_text(text)
+        except RetryAfter as e:
+            # Trop d'éditions : attendre le délai imposé avant la suivante
+            self._next_edit = self.clock() + float(e.retry_after)
+            return float(e.retry_after)
+        except BadRequest as e:
+            logger.warning(f"Édition du message refusée: {e}")
+            return 0.0
+        self._shown = text
+        self.edits += 1
+        return None
+
+    async def _edit_final(self, text: str):
+        """Édite le message avec la réponse complète, en nouveau message si l'édition échoue"""
+        for attempt in range(FINAL_EDIT_ATTEMPTS):
+            retry_after = await self._edit(text)
+            if retry_after is None:
+                return
+            if not retry_after or attempt == FINAL_EDIT_ATTEMPTS - 1:
+                break
+            await asyncio.sleep(retry_after)
+
+        # Ne jamais laisser l'utilisateur sur le texte partiel
+        logger.warning("Édition finale impossible, réponse envoyée dans un nouveau message")
+        await self.message.reply_text(text)
+        self._shown = text
+
+    async def update(self, text: str):
+        """Affiche le texte partiel si le délai depuis la dernière édition est écoulé"""
+        text = text.strip()[:MAX_MESSAGE_LENGTH]
+        now = self.clock()
+        if not text or text == self._shown or now < self._next_edit:
+            return
+        self._next_edit = now + self.interval
+        await self._edit(text)
+
+    async def finalize(self, text: str):
+        """Affiche le texte complet, quel que soit le délai"""
+        text = text.strip()
+        first, rest = text[:MAX_MESSAGE_LENGTH], text[MAX_MESSAGE_LENGTH:]
+        if first and first != self._shown:
+            await self._edit_final(first)
+        while rest:
+            await self.message.reply_text(rest[:MAX_MESSAGE_LENGTH])
+            rest = rest[MAX_MESSAGE_LENGTH:]
@@ -3,31 +3,85 @@
 Bot Telegram pour traiter les commandes WhatsApp de L'Apaisée
 """
 
+import argparse
+import asyncio
 import os
-import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from functools import wraps
-from typing import Dict, List, Tuple
+from pathlib import Path
+from typing import AsyncIterator, Dict, List, Tuple
 from dotenv import load_dotenv
-from telegram import Update
+from telegram import Bot, Update
 from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes
 import chromadb
-from chromadb.utils import embedding_functions
 import ollama
 from loguru import logger
 import warnings
 warnings.filterwarnings('ignore', message='urllib3 v2 only supports OpenSSL')
 
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from src.ai.catalog_index import CatalogIndex
+from src.ai.embedding_cache import get_embedding_function
+from src.ai.llm_scheduler import LLMDeadlineExceeded, Priority, get_llm_scheduler
+from src.ai.llm_stream import ThinkFilter, strip_think
+from src.ai.prompt_builder import PromptBuilder
+from src.ai.query_client import get_query_client
+from src.ai.response_cache import ResponseCache
+from src.bot.order_parser import ORDER_PARSER, UNIT
+from src.bot.progressive_message import ProgressiveMessage
+from src.utils.stock import is_in_stock, stock_label, stock_managed, stock_quantity
+
 # Configuration
 load_dotenv()
 logger.add("data/logs/telegram_bot.log", rotation="10 MB")
 
+# Threads réservés aux recherches ChromaDB (embedding + requête, bloquants)
+BOT_SEARCH_WORKERS = int(os.getenv("BOT_SEARCH_WORKERS", "4"))
+
+# Nombre de mises à jour Telegram traitées en parallèle
+BOT_CONCURRENT_UPDATES = int(os.getenv("BOT_CONCURRENT_UPDATES", "16"))
+
+# Réponses affichées au fil de la génération, éditées au plus une fois par intervalle
+BOT_STREAM_RESPONSES = os.getenv("BOT_STREAM_RESPONSES", "1") == "1"
+BOT_STREAM_EDIT_INTERVAL = float(os.getenv("BOT_STREAM_EDIT_INTERVAL", "1.0"))
+
+# Réception des mises à jour : "polling" (getUpdates) ou "webhook" (app ASGI)
+TELEGRAM_MODE = os.getenv("TELEGRAM_MODE", "polling")
+TELEGRAM_WEBHOOK_URL = os.getenv("TELEGRAM_WEBHOOK_URL", "")
+TELEGRAM_WEBHOOK_WORKERS = int(os.getenv("TELEGRAM_WEBHOOK_WORKERS", "1"))
+# Autre Bot API que api.telegram.org (serveur local, Bot API factice des tests de charge)
+TELEGRAM_API_BASE_URL = os.getenv("TELEGRAM_API_BASE_URL", "").rstrip('/')
+
+# Confiance minimale de l'index lexical avant repli sur la recherche vectorielle
+LEXICAL_MIN_CONFIDENCE = float(os.getenv("LEXICAL_MIN_CONFIDENCE", "0.5"))
+
+
+# Prompt des réponses aux commandes : tableau des articles vérifiés, puis les consignes
+STOCK_PROMPT_COLUMNS = [('demande', 'Demande'), ('name', 'Produit'), ('format', 'Format'),
+                        ('stock_quantity', 'Stock'), ('price', 'Prix CHF'), ('status', 'Statut')]
+BOT_PROMPT_RULES = """Règles:
+- sois amical et professionnel
+- si le client a été poli, remercie-le
+- confirme ce qui est disponible
+- propose des alternatives pour ce qui manque
+- termine en demandant confirmation
+- émojis avec modération
+- prix en CHF"""
+
 
 # Configuration de sécurité
 AUTHORIZED_USERS = [449781603]  # Liste vide = tout le monde autorisé
 # Pour restreindre, ajoutez les user IDs Telegram autorisés :
 # AUTHORIZED_USERS = [123456789, 987654321]  # Remplacez par vos IDs
 
+def log_prompt_eval(response: Dict):
+    """Tokens de prompt réellement traités par Ollama, pour ajuster PROMPT_TOKEN_BUDGET"""
+    if response.get('prompt_eval_count'):
+        logger.info(f"Prompt évalué: {response['prompt_eval_count']} tokens en "
+                    f"{response.get('prompt_eval_duration', 0) / 1e9:.1f}s")
+
 def restricted(func):
     """Décorateur pour restreindre l'accès aux utilisateurs autorisés"""
     @wraps(func)
@@ -59,102 +113,63 @@ def restricted(func):
 class LapaiseeBot:
     def __init__(self):
         """Initialise le bot avec ChromaDB et Ollama"""
-        # ChromaDB
-        self.chroma_client = chromadb.PersistentClient(
-            path=os.getenv("CHROMA_PERSIST_DIRECTORY", "./data/chromadb")
-        )
+        query_client = get_query_client()
+        if query_client:
+            # Service de recherche partagé : ni modèle ni client ChromaDB dans ce processus
+            self.products_collection = query_client.collection("products")
+        else:
+            # ChromaDB
+            self.chroma_client = chromadb.PersistentClient(
+                path=os.getenv("CHROMA_PERSIST_DIRECTORY", "./data/chromadb")
+            )
+            
+            self.embedding_function = get_embedding_function()
+            
+            self.products_collection = self.chroma_client.get_collection(
+                name="products",
+                embedding_function=self.embedding_function
+            )
         
-        self.embedding_function = embedding_functions.SentenceTransformerEmbeddingFunction(
-            model_name="paraphrase-multilingual-MiniLM-L12-v2"
-        )
+        # Index lexical (noms, SKU, alias), reconstruit quand le catalogue change
+        self.catalog_index = CatalogIndex(self.products_collection)
         
-        self.products_collection = self.chroma_client.get_collection(
-            name="products",
-            embedding_function=self.embedding_function
-        )
+        # Les recherches tournent hors de la boucle asyncio, dans un pool borné
+        self.executor = ThreadPoolExecutor(max_workers=BOT_SEARCH_WORKERS, thread_name_prefix="chroma")
         
-        # Patterns pour reconnaître les commandes
-        self.patterns = {
-            'quantity': r'(\d+)\s*(fûts?|bouteilles?|canettes?|cartons?|caisses?)',
-            'product': r'de\s+([\w\s]+?)(?:\s+et|\s*,|\s*\.|$)',
-            'greeting': r'(salut|bonjour|hello|coucou|bonsoir)',
-            'politeness': r'(s\'?il\s*te\s*pla[îi]t|stp|svp|merci)',
-        }
+        # Réponses déjà générées pour des commandes identiques (stock inchangé)
+        self.response_cache = ResponseCache()
+        
+        # Client Ollama asynchrone : une génération longue ne bloque pas les autres chats
+        self.ollama_client = ollama.AsyncClient(host=os.getenv("OLLAMA_BASE_URL"))
+        
+        # Créneaux Ollama partagés avec l'interface : les commandes passent en priorité
+        self.llm_scheduler = get_llm_scheduler()
         
         logger.info("Bot initialisé")
     
     def parse_order(self, text: str) -> Dict:
         """Parse un message de commande WhatsApp"""
         logger.info(f"Parsing: {text}")
-        
-        order = {
-            'items': [],
-            'greeting': bool(re.search(self.patterns['greeting'], text, re.IGNORECASE)),
-            'polite': bool(re.search(self.patterns['politeness'], text, re.IGNORECASE)),
-            'original_text': text
-        }
-        
-        # Nettoyer le texte
-        text = text.lower().strip()
-        
-        # Chercher les quantités et produits
-        # Exemples: "2 fûts de jonquille", "3 cartons de pointe"
-        matches = re.finditer(r'(\d+)\s*(fûts?|bouteilles?|canettes?|cartons?|caisses?)\s*(?:de\s+)?([\w\s]+?)(?:\s+et|\s*,|\s*\.|\s*$|\s+\d)', text)
-        
-        for match in matches:
-            quantity = int(match.group(1))
-            container = match.group(2)
-            product = match.group(3).strip()
-            
-            # Normaliser le type de contenant
-            if 'fût' in container:
-                container_type = 'fût'
-            elif 'carton' in container or 'caisse' in container:
-                container_type = 'carton'
-            elif 'canette' in container:
-                container_type = 'canette'
-            elif 'bouteille' in container:
-                container_type = 'bouteille'
-            else:
-                container_type = container
-            
-            order['items'].append({
-                'quantity': quantity,
-                'container': container_type,
-                'product': product
-            })
-        
-        # Si aucun pattern trouvé, essayer une approche plus simple
-        if not order['items']:
-            # Chercher juste des nombres suivis de mots
-            simple_matches = re.finditer(r'(\d+)\s+([\w\s]+?)(?:\s+et|\s*,|\s*\.|$)', text)
-            for match in simple_matches:
-                order['items'].append({
-                    'quantity': int(match.group(1)),
-                    'container': 'unité',
-                    'product': match.group(2).strip()
-                })
-        
-        return order
+        return ORDER_PARSER.parse(text)
     
-    def search_product(self, product_name: str, container_type: str = None) -> List[Dict]:
-        """Recherche un produit dans ChromaDB"""
-        # Construire la requête
+    def parse_many(self, texts: List[str]) -> List[Dict]:
+        """Parse une série de messages (import d'historiques)"""
+        return ORDER_PARSER.parse_many(texts)
+    
+    def build_query(self, product_name: str, container_type: str = None) -> str:
+        """Construit le texte de requête d'un article"""
         query = product_name
         if container_type == 'carton':
             query += " carton 12x"
         elif container_type == 'fût':
             query += " fût"
-        
-        results = self.products_collection.query(
-            query_texts=[query],
-            n_results=5
-        )
-        
-        # Filtrer par type de contenant si spécifié
+        return query
+    
+    def filter_by_container(self, metadatas: List[Dict], container_type: str = None) -> List[Dict]:
+        """Filtre les résultats par type de contenant si spécifié"""
         filtered_results = []
-        for i, metadata in enumerate(results['metadatas'][0]):
-            if container_type:
+        for metadata in metadatas:
+            if container_type and container_type != UNIT:
                 if container_type == 'carton' and ('12x' in metadata['name'].lower() or 'carton' in metadata['format'].lower()):
                     filtered_results.append(metadata)
                 elif container_type == 'fût' and 'fût' in metadata['format'].lower():
@@ -166,14 +181,57 @@ class LapaiseeBot:
         
         return filtered_results
     
+    def search_product(self, product_name: str, container_type: str = None) -> List[Dict]:
+        """Recherche un produit dans ChromaDB"""
+        return self.search_products([{'product': product_name, 'container': container_type}])[0]
+    
+    def search_products(self, items: List[Dict]) -> List[List[Dict]]:
+        """
+        Recherche tous les articles d'une commande (format de parse_order).
+        
+        L'index lexical répond d'abord ; les articles qu'il ne reconnaît pas
+        avec assez de confiance (ou dont aucun résultat n'a le bon contenant)
+        partent ensemble dans une seule requête vectorielle : un embedding en
+        lot, puis le filtrage par contenant propre à chaque article.
+        """
+        results: List[List[Dict]] = [[] for _ in items]
+        fallback = []
+        for i, item in enumerate(items):
+            candidates, confidence = self.catalog_index.lookup(item['product'])
+            filtered = self.filter_by_container(candidates, item.get('container'))[:5]
+            if filtered and confidence >= LEXICAL_MIN_CONFIDENCE:
+                results[i] = filtered
+            else:
+                fallback.append(i)
+        
+        if fallback:
+            vector_results = self.products_collection.query(
+                query_texts=[self.build_query(items[i]['product'], items[i].get('container')) for i in fallback],
+                n_results=5
+            )
+            for i, metadatas in zip(fallback, vector_results['metadatas']):
+                results[i] = self.filter_by_container(metadatas, items[i].get('container'))
+        
+        return results
+    
+    async def search_product_async(self, product_name: str, container_type: str = None) -> List[Dict]:
+        """search_product exécuté dans le pool de recherche, sans bloquer la boucle asyncio"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.search_product, product_name, container_type)
+    
+    async def search_products_async(self, items: List[Dict]) -> List[List[Dict]]:
+        """search_products exécuté dans le pool de recherche"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.search_products, items)
+    
     def check_stock(self, product: Dict, quantity: int) -> Tuple[bool, str]:
-        """Vérifie si le stock est suffisant"""
-        # Convertir le stock en entier (au cas où c'est une string)
-        try:
-            stock = int(product.get('stock_quantity', 0) or 0)
-        except (ValueError, TypeError):
-            stock = 0
+        """Vérifie si le stock est suffisant (d'après stock_status si la quantité n'est pas suivie)"""
+        if not stock_managed(product):
+            if is_in_stock(product):
+                return True, f"✅ {product['name']}: disponible, stock non suivi (demande: {quantity})"
+            return False, f"❌ {product['name']}: rupture de stock (demande: {quantity})"
         
+        stock = stock_quantity(product)
         available = stock >= quantity
         
         if available:
@@ -186,36 +244,136 @@ class LapaiseeBot:
         
         return available, message
     
-    def generate_response(self, order: Dict, stock_check: List[Dict]) -> str:
-        """Génère une réponse pour le client"""
-        # Construire le contexte pour Ollama
-        context = f"""
-        Tu es l'assistant de la brasserie L'Apaisée. Un client a envoyé cette commande: "{order['original_text']}"
-        
-        Résultats de la vérification des stocks:
-        {chr(10).join([item['message'] for item in stock_check])}
-        
-        Règles:
-        - Sois amical et professionnel
-        - Si le client a été poli, remercie-le
-        - Confirme ce qui est disponible
-        - Propose des alternatives pour ce qui manque
-        - Termine par demander confirmation
-        - Utilise des émojis avec modération
-        - Mentionne les prix en CHF
-        """
+    def build_stock_check(self, items: List[Dict], searches: List[List[Dict]]) -> List[Dict]:
+        """Vérifie le stock de chaque article avec le résultat le plus pertinent de sa recherche"""
+        stock_check = []
+        for item, products in zip(items, searches):
+            if products:
+                product = products[0]  # Prendre le plus pertinent
+                available, message = self.check_stock(product, item['quantity'])
+                stock_check.append({
+                    'item': item,
+                    'product': product,
+                    'available': available,
+                    'message': message
+                })
+            else:
+                stock_check.append({
+                    'item': item,
+                    'product': None,
+                    'available': False,
+                    'message': f"❌ Produit non trouvé: {item['product']} ({item['container']})"
+                })
+        return stock_check
+    
+    def build_prompt(self, order: Dict, stock_check: List[Dict]) -> str:
+        """Construit le contexte pour Ollama (articles en tableau compact, sous PROMPT_TOKEN_BUDGET)"""
+        prompt = PromptBuilder()
+        prompt.add_text(
+            'commande',
+            f"Tu es l'assistant de la brasserie L'Apaisée. Un client a envoyé cette commande: \"{order['original_text']}\"",
+            required=True
+        )
+        prompt.add_table('stock', "Vérification des stocks:",
+                         [self.stock_row(check) for check in stock_check], STOCK_PROMPT_COLUMNS)
+        prompt.add_text('règles', BOT_PROMPT_RULES, required=True)
+        logger.info(f"Prompt commande: {prompt.summary()}")
+        return prompt.build()
+    
+    def stock_row(self, check: Dict) -> Dict:
+        """Ligne du tableau de stock du prompt pour un article vérifié"""
+        item, product = check['item'], check['product'] or {}
+        container = item.get('container')
+        if not product:
+            status = "non trouvé"
+        elif check['available']:
+            status = "disponible"
+        else:
+            # check_stock distingue un stock partiel (⚠️) d'une rupture (❌)
+            status = "insuffisant" if check['message'].startswith('⚠️') else "rupture"
+        return {
+            'demande': f"{item['quantity']} {item['product']}" + (f" ({container})" if container and container != UNIT else ""),
+            'name': product.get('name'),
+            'format': product.get('format'),
+            'stock_quantity': stock_label(product),
+            'price': product.get('price'),
+            'status': status,
+        }
+    
+    async def generate_response(self, order: Dict, stock_check: List[Dict],
+                                priority: Priority = Priority.ORDER) -> str:
+        """Génère une réponse pour le client (complète, sans le raisonnement <think>)"""
+        model = os.getenv("OLLAMA_MODEL", "deepseek-r1:7b")
+        cache_key = self.response_cache.key(order, stock_check, model)
+        cached = self.response_cache.get(cache_key)
+        if cached is not None:
+            return cached
         
         try:
-            response = ollama.chat(
-                model=os.getenv("OLLAMA_MODEL", "deepseek-r1:7b"),
-                messages=[{'role': 'user', 'content': context}]
-            )
-            return response['message']['content']
+            async with self.llm_scheduler.aslot(priority):
+                response = await self.ollama_client.chat(
+                    model=model,
+                    messages=[{'role': 'user', 'content': self.build_prompt(order, stock_check)}]
+                )
+            log_prompt_eval(response)
+            text = strip_think(response['message']['content'])
+            self.response_cache.put(cache_key, text)
+            return text
+        except LLMDeadlineExceeded as e:
+            logger.warning(f"{e}, réponse de secours")
+            return self.generate_fallback_response(order, stock_check)
         except Exception as e:
             logger.error(f"Erreur Ollama: {e}")
             # Réponse de secours
             return self.generate_fallback_response(order, stock_check)
     
+    async def stream_response(self, order: Dict, stock_check: List[Dict]) -> AsyncIterator[str]:
+        """Génère la réponse morceau par morceau, raisonnement <think> filtré au fil de l'eau"""
+        think = ThinkFilter()
+        async with self.llm_scheduler.aslot(Priority.ORDER):
+            stream = await self.ollama_client.chat(
+                model=os.getenv("OLLAMA_MODEL", "deepseek-r1:7b"),
+                messages=[{'role': 'user', 'content': self.build_prompt(order, stock_check)}],
+                stream=True
+            )
+            async for chunk in stream:
+                if chunk.get('done'):
+                    log_prompt_eval(chunk)
+                visible = think.feed(chunk['message']['content'])
+                if visible:
+                    yield visible
+        rest = think.flush()
+        if rest:
+            yield rest
+    
+    async def send_streamed_response(self, message, order: Dict, stock_check: List[Dict]):
+        """Affiche la réponse dans `message` au fil de la génération, puis la finalise"""
+        progressive = ProgressiveMessage(message, interval=BOT_STREAM_EDIT_INTERVAL)
+        cache_key = self.response_cache.key(order, stock_check, os.getenv("OLLAMA_MODEL", "deepseek-r1:7b"))
+        cached = self.response_cache.get(cache_key)
+        if cached is not None:
+            await progressive.finalize(cached)
+            return
+        
+        text = ''
+        try:
+            async for delta in self.stream_response(order, stock_check):
+                text += delta
+                await progressive.update(text)
+        except LLMDeadlineExceeded as e:
+            logger.warning(f"{e}, réponse de secours")
+            text = ''
+        except Exception as e:
+            logger.error(f"Erreur Ollama: {e}")
+            text = ''
+        
+        # Réponse de secours si le flux échoue ou ne contient que du raisonnement
+        if text.strip():
+            self.response_cache.put(cache_key, text.strip())
+        else:
+            text = self.generate_fallback_response(order, stock_check)
+        await progressive.finalize(text)
+    
     def generate_fallback_response(self, order: Dict, stock_check: List[Dict]) -> str:
         """Génère une réponse de secours si Ollama échoue"""
         response = []
@@ -243,6 +401,14 @@ class LapaiseeBot:
         
         return "\n".join(response)
 
+def get_bot(context: ContextTypes.DEFAULT_TYPE) -> LapaiseeBot:
+    """Instance partagée du bot (créée au démarrage, ou à la première utilisation)"""
+    bot = context.bot_data.get('lapaisee_bot')
+    if not bot:
+        bot = LapaiseeBot()
+        context.bot_data['lapaisee_bot'] = bot
+    return bot
+
 # Handlers Telegram
 @restricted
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -259,10 +425,7 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
 @restricted
 async def process_order(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Traite un message de commande"""
-    bot = context.bot_data.get('lapaisee_bot')
-    if not bot:
-        bot = LapaiseeBot()
-        context.bot_data['lapaisee_bot'] = bot
+    bot = get_bot(context)
     
     message = update.message.text
     user = update.effective_user
@@ -280,39 +443,24 @@ async def process_order(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
         return
     
-    # Vérifier les stocks
-    await update.message.reply_text("🔍 Je vérifie les stocks...")
+    # Vérifier les stocks (ce message accueillera la réponse en mode streaming)
+    status_message = await update.message.reply_text("🔍 Je vérifie les stocks...")
     
-    stock_check = []
-    for item in order['items']:
-        # Rechercher le produit
-        products = bot.search_product(item['product'], item['container'])
-        
-        if products:
-            product = products[0]  # Prendre le plus pertinent
-            available, message = bot.check_stock(product, item['quantity'])
-            stock_check.append({
-                'item': item,
-                'product': product,
-                'available': available,
-                'message': message
-            })
-        else:
-            stock_check.append({
-                'item': item,
-                'product': None,
-                'available': False,
-                'message': f"❌ Produit non trouvé: {item['product']} ({item['container']})"
-            })
+    # Rechercher tous les produits en une seule requête
+    searches = await bot.search_products_async(order['items'])
     
-    # Générer la réponse
-    response = bot.generate_response(order, stock_check)
+    stock_check = bot.build_stock_check(order['items'], searches)
     
-    # Envoyer la réponse
-    await update.message.reply_text(response)
+    # Générer et envoyer la réponse
+    if BOT_STREAM_RESPONSES:
+        await bot.send_streamed_response(status_message, order, stock_check)
+    else:
+        response = await bot.generate_response(order, stock_check)
+        await update.message.reply_text(response)
     
     # Log pour suivi
-    logger.info(f"Réponse envoyée pour {len(order['items'])} articles")
+    logger.info(f"Réponse envoyée pour {len(order['items'])} articles (cache: {bot.response_cache.stats()}, "
+                f"file LLM: {bot.llm_scheduler.queue_depth()})")
 
 @restricted
 async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -328,29 +476,28 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         "**Commandes:**\n"
         "/start - Démarrer le bot\n"
         "/help - Afficher cette aide\n"
-        "/stock [produit] - Vérifier le stock d'un produit"
+        "/stock [produit] - Vérifier le stock d'un produit\n"
+        "/cache - Statistiques du cache de réponses"
     )
 
 @restricted
 async def check_stock_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handler pour /stock"""
-    bot = context.bot_data.get('lapaisee_bot')
-    if not bot:
-        bot = LapaiseeBot()
-        context.bot_data['lapaisee_bot'] = bot
+    bot = get_bot(context)
     
     if not context.args:
         await update.message.reply_text("Usage: /stock [nom du produit]")
         return
     
     product_name = ' '.join(context.args)
-    products = bot.search_product(product_name)
+    products = await bot.search_product_async(product_name)
     
     if products:
         response = f"📦 Stock pour '{product_name}':\n\n"
         for p in products[:5]:
             response += f"• {p['name']}\n"
-            response += f"  Stock: {p['stock_quantity']} unités\n"
+            stock = f"{p['stock_quantity']} unités" if stock_managed(p) else stock_label(p)
+            response += f"  Stock: {stock}\n"
             response += f"  Prix: {p['price']} CHF\n\n"
         await update.message.reply_text(response)
     else:
@@ -358,6 +505,17 @@ async def check_stock_command(update: Update, context: ContextTypes.DEFAULT_TYPE
 
 
 
+@restricted
+async def cache_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handler pour /cache : statistiques du cache de réponses"""
+    stats = get_bot(context).response_cache.stats()
+    await update.message.reply_text(
+        f"🗄️ Cache de réponses\n\n"
+        f"Hits: {stats['hits']} / Misses: {stats['misses']} ({stats['hit_rate']:.0%})\n"
+        f"Entrées: {stats['entries']}\n"
+        f"Expirées: {stats['expired']}, invalidations (stock modifié): {stats['invalidations']}"
+    )
+
 async def myid(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Affiche l'ID Telegram de l'utilisateur"""
     user = update.effective_user
@@ -372,25 +530,71 @@ Pour sécuriser le bot, ajoutez cet ID dans AUTHORIZED_USERS"""
     
     await update.message.reply_text(message)
 
+def build_application(token: str, polling: bool = True) -> Application:
+    """Application python-telegram-bot avec ses handlers (polling ou webhook)"""
+    builder = Application.builder().token(token).concurrent_updates(BOT_CONCURRENT_UPDATES)
+    if TELEGRAM_API_BASE_URL:
+        # Bot API locale ou factice (tests de charge sans Telegram)
+        builder = builder.base_url(f"{TELEGRAM_API_BASE_URL}/bot").base_file_url(f"{TELEGRAM_API_BASE_URL}/file/bot")
+    if not polling:
+        # Les mises à jour sont poussées par le webhook : pas d'Updater
+        builder = builder.updater(None)
+    application = builder.build()
+    
+    # Le bot (ChromaDB, modèle d'embedding) est chargé avant le premier message
+    application.bot_data['lapaisee_bot'] = LapaiseeBot()
+    
+    # Ajouter les handlers
+    application.add_handler(CommandHandler("start", start))
+    application.add_handler(CommandHandler("help", help_command))
+    application.add_handler(CommandHandler("stock", check_stock_command))
+    application.add_handler(CommandHandler("cache", cache_command))
+    application.add_handler(CommandHandler("myid", myid))
+    application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, process_order))
+    return application
+
+async def register_webhook(token: str):
+    """Déclare l'URL publique du webhook auprès de Telegram"""
+    bot = Bot(token, base_url=f"{TELEGRAM_API_BASE_URL}/bot") if TELEGRAM_API_BASE_URL else Bot(token)
+    async with bot:
+        await bot.set_webhook(
+            url=TELEGRAM_WEBHOOK_URL,
+            secret_token=os.getenv("TELEGRAM_WEBHOOK_SECRET") or None,
+            max_connections=BOT_CONCURRENT_UPDATES
+        )
+
 def main():
     """Lance le bot"""
+    parser = argparse.ArgumentParser(description="Bot Telegram de L'Apaisée")
+    parser.add_argument("--mode", choices=("polling", "webhook"), default=TELEGRAM_MODE,
+                        help="Réception des mises à jour (TELEGRAM_MODE)")
+    args = parser.parse_args()
+    
     # Token du bot
     token = os.getenv("TELEGRAM_BOT_TOKEN")
     if not token:
         logger.error("TELEGRAM_BOT_TOKEN non défini dans .env")
         return
     
-    # Créer l'application
-    application = Application.builder().token(token).build()
+    if args.mode == "webhook":
+        # Mises à jour reçues par l'app ASGI (src/bot/telegram_webhook.py), un bot par worker
+        import uvicorn
+        if TELEGRAM_WEBHOOK_URL:
+            asyncio.run(register_webhook(token))
+            logger.info(f"Webhook déclaré: {TELEGRAM_WEBHOOK_URL}")
+        logger.info(f"Bot démarré en mode webhook ({TELEGRAM_WEBHOOK_WORKERS} workers)...")
+        uvicorn.run(
+            "src.bot.telegram_webhook:app",
+            host=os.getenv("TELEGRAM_WEBHOOK_HOST", "127.0.0.1"),
+            port=int(os.getenv("TELEGRAM_WEBHOOK_PORT", "8002")),
+            workers=TELEGRAM_WEBHOOK_WORKERS
+        )
+        return
     
-    # Ajouter les handlers
-    application.add_handler(CommandHandler("start", start))
-    application.add_handler(CommandHandler("help", help_command))
-    application.add_handler(CommandHandler("stock", check_stock_command))
-    application.add_handler(CommandHandler("myid", myid))
-    application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, process_order))
+    # Créer l'application (les mises à jour de chats différents se chevauchent)
+    application = build_application(token)
     
-    # Lancer le bot
+    # Lancer le bot (run_polling supprime un éventuel webhook déclaré)
     logger.info("Bot démarré...")
     application.run_polling()
 
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Mode webhook du bot Telegram : les mises à jour sont poussées par Telegram sur
+une app ASGI au lieu d'être récupérées par getUpdates (run_polling).
+
+L'endpoint vérifie le secret, place la mise à jour dans la file de
+l'Application python-telegram-bot et répond aussitôt ; les handlers tournent
+en arrière-plan, BOT_CONCURRENT_UPDATES à la fois. Chaque worker uvicorn a sa
+propre Application (et son propre LapaiseeBot).
+
+    python src/bot/telegram_bot.py --mode webhook
+    uvicorn src.bot.telegram_webhook:app --port 8002 --workers 2
+"""
+
+import os
+import sys
+from pathlib import Path
+
+from dotenv import load_dotenv
+from fastapi import FastAPI, HTTPException, Request
+from loguru import logger
+from telegram import Update
+from telegram.ext import ContextTypes, TypeHandler
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from src.bot.telegram_bot import build_application
+
+load_dotenv()
+
+WEBHOOK_PATH = "/telegram/webhook"
+WEBHOOK_SECRET = os.getenv("TELEGRAM_WEBHOOK_SECRET", "")
+
+# Groupe exécuté après les handlers du bot : compte les mises à jour traitées
+PROCESSED_GROUP = 100
+
+app = FastAPI(title="L'Apaisée - webhook Telegram")
+
+
+async def count_processed(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    app.state.stats['processed'] += 1
+
+
+@app.on_event("startup")
+async def startup():
+    app.state.stats = {'received': 0, 'rejected': 0, 'processed': 0}
+    token = os.getenv("TELEGRAM_BOT_TOKEN")
+    if not token:
+        raise RuntimeError("TELEGRAM_BOT_TOKEN non défini dans .env")
+    if not WEBHOOK_SECRET:
+        logger.warning("TELEGRAM_WEBHOOK_SECRET non défini : toutes les mises à jour seront refusées")
+
+    application = build_application(token, polling=False)
+    application.add_handler(TypeHandler(Update, count_processed), group=PROCESSED_GROUP)
+    await application.initialize()
+    await application.start()
+    app.state.application = application
+    logger.info("Bot démarré en mode webhook")
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    application = app.state.application
+    await application.stop()
+    await application.shutdown()
+
+
+@app.post(WEBHOOK_PATH)
+async def receive_update(request: Request):
+    """Point d'entrée des mises à jour Telegram"""
+    if not WEBHOOK_SECRET or request.headers.get("X-Telegram-Bot-Api-Secret-Token") != WEBHOOK_SECRET:
+        app.state.stats['rejected'] += 1
+        raise HTTPException(status_code=401, detail="Secret invalide")
+
+    application = app.state.application
+    try:
+        update = Update.de_json(await request.json(), application.bot)
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Mise à jour invalide")
+    if update is None:
+        raise HTTPException(status_code=400, detail="Mise à jour invalide")
+
+    app.state.stats['received'] += 1
+    await application.update_queue.put(update)
+    return {"status": "queued"}
+
+
+@app.get("/telegram/stats")
+async def webhook_stats():
+    """Compteurs du worker qui répond"""
+    return {
+        **app.state.stats,
+        'pending': app.state.application.update_queue.qsize(),
+        'pid': os.getpid(),
+    }
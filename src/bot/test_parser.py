@@ -1,32 +1,184 @@
 #!/usr/bin/env python3
 """
-Test du parser de commandes
+Test du parser de commandes : corpus étiqueté, précision et débit
+(parser à tokenizer contre l'ancien parser à expressions régulières)
+
+    python src/bot/test_parser.py --repeat 2000
 """
 
+import argparse
+import re
 import sys
+import time
 sys.path.append('.')
 
-from src.bot.telegram_bot import LapaiseeBot
-
-def test_parser():
-    bot = LapaiseeBot()
-    
-    # Messages de test
-    test_messages = [
-        "Salut Xavier, j'espère que tu vas bien, pourrais-tu nous livrer 2 fûts de jonquille et 1 de pointe. Et dis moi si tu as des nouveautés en ce moment. Ciao!",
-        "Bonjour, je voudrais 3 cartons de 12 canettes de IPA svp",
-        "2 fûts de jonquille, 3 cartons de pointe et 5 bouteilles de wild",
-        "Besoin de 10 canettes de stout pour demain",
-        "Hello! 1 fût IPA + 2 cartons bizule merci"
-    ]
-    
+from src.bot.order_parser import ORDER_PARSER
+
+# Messages de test
+TEST_MESSAGES = [
+    "Salut Xavier, j'espère que tu vas bien, pourrais-tu nous livrer 2 fûts de jonquille et 1 de pointe. Et dis moi si tu as des nouveautés en ce moment. Ciao!",
+    "Bonjour, je voudrais 3 cartons de 12 canettes de IPA svp",
+    "2 fûts de jonquille, 3 cartons de pointe et 5 bouteilles de wild",
+    "Besoin de 10 canettes de stout pour demain",
+    "Hello! 1 fût IPA + 2 cartons bizule merci"
+]
+
+# Corpus étiqueté : message -> articles attendus (quantité, contenant, produit)
+LABELLED_CORPUS = [
+    (TEST_MESSAGES[0], [(2, 'fût', 'jonquille'), (1, 'fût', 'pointe')]),
+    (TEST_MESSAGES[1], [(3, 'carton', 'ipa')]),
+    (TEST_MESSAGES[2], [(2, 'fût', 'jonquille'), (3, 'carton', 'pointe'), (5, 'bouteille', 'wild')]),
+    (TEST_MESSAGES[3], [(10, 'canette', 'stout')]),
+    (TEST_MESSAGES[4], [(1, 'fût', 'ipa'), (2, 'carton', 'bizule')]),
+    ("2 fûts de jonquille", [(2, 'fût', 'jonquille')]),
+    ("3 cartons de pointe", [(3, 'carton', 'pointe')]),
+    ("Salut, deux fûts de jonquille et un de pointe stp", [(2, 'fût', 'jonquille'), (1, 'fût', 'pointe')]),
+    ("Bonjour, trois cartons de neipa merci", [(3, 'carton', 'neipa')]),
+    ("Coucou ! Tu peux nous mettre une caisse de pointe ?", [(1, 'carton', 'pointe')]),
+    ("4 fûts de lager du lac, 2 fûts de jonquille", [(4, 'fût', 'lager du lac'), (2, 'fût', 'jonquille')]),
+    ("Salut, 3 cartons de l'IPA fumée stp", [(3, 'carton', 'ipa fumée')]),
+    ("2 fûts 20L de jonquille et 5 bouteilles 75cl de wild merci", [(2, 'fût', 'jonquille'), (5, 'bouteille', 'wild')]),
+    ("6 canettes de stout, 6 canettes de porter", [(6, 'canette', 'stout'), (6, 'canette', 'porter')]),
+    ("1 fût de pointe + 1 de jonquille + 1 de bizule", [(1, 'fût', 'pointe'), (1, 'fût', 'jonquille'), (1, 'fût', 'bizule')]),
+    ("Bonsoir, 12 bouteilles de biere wild pour samedi", [(12, 'bouteille', 'biere wild')]),
+    ("10 jonquille", [(10, 'unité', 'jonquille')]),
+    ("Hello, 2 kegs de neipa please", [(2, 'fût', 'neipa')]),
+    ("5 cartons de 12x33cl de pointe", [(5, 'carton', 'pointe')]),
+    ("2 caisses de jonquille et 3 de bizule svp", [(2, 'carton', 'jonquille'), (3, 'carton', 'bizule')]),
+    ("cinq fûts de pointe", [(5, 'fût', 'pointe')]),
+    ("Pour vendredi : 2 fûts de double ipa et 1 carton de stout", [(2, 'fût', 'double ipa'), (1, 'carton', 'stout')]),
+    ("Salut Xavier, 1 fût de jonquille s'il te plaît", [(1, 'fût', 'jonquille')]),
+    ("2 futs de pointe, 2 cartons de jonquille, 1 fût de bizule.", [(2, 'fût', 'pointe'), (2, 'carton', 'jonquille'), (1, 'fût', 'bizule')]),
+    ("3 canettes d'imperial stout", [(3, 'canette', 'imperial stout')]),
+    ("Merci pour la livraison de la semaine dernière !", []),
+    ("Tu as des nouveautés en ce moment ?", []),
+    ("On peut passer vers 17h demain ?", []),
+    ("deux cartons de west coast et six canettes de stout", [(2, 'carton', 'west coast'), (6, 'canette', 'stout')]),
+    ("Salut ! 1 fût de jonquille. Et 2 cartons de pointe. Merci", [(1, 'fût', 'jonquille'), (2, 'carton', 'pointe')]),
+    ("Besoin de 8 bouteilles de sauvage et 4 de wild", [(8, 'bouteille', 'sauvage'), (4, 'bouteille', 'wild')]),
+    ("2 fûts jonquille 1 fût pointe", [(2, 'fût', 'jonquille'), (1, 'fût', 'pointe')]),
+    ("vingt deux canettes de pointe", [(22, 'canette', 'pointe')]),
+    ("vingt-deux canettes de pointe", [(22, 'canette', 'pointe')]),
+    ("soixante-dix bouteilles de wild", [(70, 'bouteille', 'wild')]),
+    ("quatre-vingt-douze canettes de stout", [(92, 'canette', 'stout')]),
+    ("vingt et un fûts de jonquille", [(21, 'fût', 'jonquille')]),
+    ("septante-cinq canettes de pointe", [(75, 'canette', 'pointe')]),
+    ("3 x jonquille", [(3, 'unité', 'jonquille')]),
+    ("2x jonquille", [(2, 'unité', 'jonquille')]),
+    ("livrer le 12 mars 3 cartons de pointe", [(3, 'carton', 'pointe')]),
+    ("Pour le 3 mai : deux fûts de bizule", [(2, 'fût', 'bizule')]),
+]
+
+
+def legacy_parse_order(text: str) -> dict:
+    """Ancien parser à expressions régulières (LapaiseeBot.parse_order), conservé pour comparaison"""
+    order = {
+        'items': [],
+        'greeting': bool(re.search(r'(salut|bonjour|hello|coucou|bonsoir)', text, re.IGNORECASE)),
+        'polite': bool(re.search(r'(s\'?il\s*te\s*pla[îi]t|stp|svp|merci)', text, re.IGNORECASE)),
+        'original_text': text
+    }
+
+    text = text.lower().strip()
+
+    matches = re.finditer(r'(\d+)\s*(fûts?|bouteilles?|canettes?|cartons?|caisses?)\s*(?:de\s+)?([\w\s]+?)(?:\s+et|\s*,|\s*\.|\s*$|\s+\d)', text)
+    for match in matches:
+        container = match.group(2)
+        if 'fût' in container:
+            container_type = 'fût'
+        elif 'carton' in container or 'caisse' in container:
+            container_type = 'carton'
+        elif 'canette' in container:
+            container_type = 'canette'
+        elif 'bouteille' in container:
+            container_type = 'bouteille'
+        else:
+            container_type = container
+
+        order['items'].append({
+            'quantity': int(match.group(1)),
+            'container': container_type,
+            'product': match.group(3).strip()
+        })
+
+    if not order['items']:
+        simple_matches = re.finditer(r'(\d+)\s+([\w\s]+?)(?:\s+et|\s*,|\s*\.|$)', text)
+        for match in simple_matches:
+            order['items'].append({
+                'quantity': int(match.group(1)),
+                'container': 'unité',
+                'product': match.group(2).strip()
+            })
+
+    return order
+
+
+def as_tuples(order: dict) -> list:
+    return [(item['quantity'], item['container'], item['product']) for item in order['items']]
+
+
+def evaluate(parse_many) -> dict:
+    """Exactitude par message et précision / rappel par article sur le corpus étiqueté"""
+    orders = parse_many([text for text, _ in LABELLED_CORPUS])
+    exact = found = correct = expected_total = 0
+    failures = []
+    for (text, expected), order in zip(LABELLED_CORPUS, orders):
+        items = as_tuples(order)
+        exact += items == expected
+        found += len(items)
+        expected_total += len(expected)
+        remaining = list(expected)
+        for item in items:
+            if item in remaining:
+                remaining.remove(item)
+                correct += 1
+        if items != expected:
+            failures.append((text, expected, items))
+    return {
+        'exact': exact / len(LABELLED_CORPUS),
+        'precision': correct / found if found else 1.0,
+        'recall': correct / expected_total if expected_total else 1.0,
+        'failures': failures,
+    }
+
+
+def throughput(parse_many, repeat: int) -> float:
+    """Messages parsés par seconde"""
+    texts = [text for text, _ in LABELLED_CORPUS] * repeat
+    start = time.perf_counter()
+    parse_many(texts)
+    return len(texts) / (time.perf_counter() - start)
+
+
+def test_parser(repeat: int = 1000, verbose: bool = False):
     print("🧪 Test du parser de commandes\n")
-    
-    for msg in test_messages:
+
+    for msg in TEST_MESSAGES:
         print(f"Message: {msg}")
-        order = bot.parse_order(msg)
-        print(f"Résultat: {order}")
+        order = ORDER_PARSER.parse(msg)
+        print(f"Résultat: {as_tuples(order)}")
         print("-" * 50)
 
+    parsers = {
+        'regex (ancien)': lambda texts: [legacy_parse_order(text) for text in texts],
+        'tokenizer': ORDER_PARSER.parse_many,
+    }
+    print(f"\n📊 Corpus étiqueté : {len(LABELLED_CORPUS)} messages\n")
+    for name, parse_many in parsers.items():
+        scores = evaluate(parse_many)
+        rate = throughput(parse_many, repeat)
+        print(f"{name:16} exact {scores['exact']:6.1%}  précision {scores['precision']:6.1%}  "
+              f"rappel {scores['recall']:6.1%}  {rate:10,.0f} messages/s")
+        if verbose:
+            for text, expected, items in scores['failures']:
+                print(f"    ✗ {text}\n      attendu {expected}\n      obtenu  {items}")
+
+    return evaluate(ORDER_PARSER.parse_many)['exact']
+
+
 if __name__ == "__main__":
-    test_parser()
+    parser = argparse.ArgumentParser(description="Précision et débit du parser de commandes")
+    parser.add_argument("--repeat", type=int, default=1000, help="Passes sur le corpus pour mesurer le débit")
+    parser.add_argument("--verbose", action="store_true", help="Affiche les messages mal parsés")
+    args = parser.parse_args()
+    test_parser(args.repeat, args.verbose)
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Traitement en lot d'un export de discussion WhatsApp (.txt) : chaque message
+passe par le parser de commandes, la recherche des produits et la vérification
+du stock, comme dans le bot, sur un pool de workers. Le LLM n'est sollicité
+qu'avec --llm.
+
+    python src/bot/whatsapp_import.py "Discussion WhatsApp avec Bar du Lac.txt" -o data/import.jsonl
+    python src/bot/whatsapp_import.py export.txt -o data/import.csv --since 2026-10-05 --workers 8
+    python src/bot/whatsapp_import.py "WhatsApp Chat with Bar du Lac.txt" --date-order mdy
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Sequence
+
+from loguru import logger
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from src.utils.stock import stock_managed
+
+# En-têtes de message des exports iOS ("[16.10.26, 14:32:05] Nom: ...") et Android ("16/10/2026, 14:32 - Nom: ..."),
+# heure sur 24 ou 12 heures
+HEADER_RE = re.compile(r"""
+    ^\u200e?
+    (?:\[(?P<ios_date>\d{1,2}[./]\d{1,2}[./]\d{2,4}),?\s(?P<ios_time>\d{1,2}:\d{2}(?::\d{2})?(?:\s?[AaPp]\.?[Mm]\.?)?)\]\s
+      |(?P<date>\d{1,2}[./]\d{1,2}[./]\d{2,4}),?\s(?P<time>\d{1,2}:\d{2}(?::\d{2})?(?:\s?[AaPp]\.?[Mm]\.?)?)\s-\s)
+    (?P<rest>.*)$
+""", re.VERBOSE)
+
+# Pièces jointes absentes de l'export
+MEDIA_RE = re.compile(
+    r"<(?:media omitted|médias omis|fichier omis)>"
+    r"|\b(?:image|video|vidéo|audio|sticker|gif|document|photo)\s(?:omitted|omise?|absente?)\b",
+    re.IGNORECASE
+)
+
+# Messages traités par tâche (une seule recherche ChromaDB en lot par tâche)
+DEFAULT_BATCH = 32
+
+CSV_FIELDS = ('timestamp', 'author', 'message_index', 'quantity', 'container', 'product',
+              'matched_name', 'sku', 'stock_quantity', 'price', 'available', 'stock_message')
+
+
+def detect_date_order(lines: Iterable[str]) -> str:
+    """
+    Ordre des dates d'un export : 'dmy' (jour en premier) ou 'mdy' (exports US).
+
+    Un premier champ supérieur à 12 impose le jour en premier, un second champ
+    supérieur à 12 le mois en premier ; à défaut, l'heure en AM/PM désigne un
+    export US.
+    """
+    twelve_hour = False
+    for line in lines:
+        match = HEADER_RE.match(line.replace('\u202f', ' '))
+        if not match:
+            continue
+        first, second, _ = (int(part) for part in re.split(r"[./]", match.group('ios_date') or match.group('date')))
+        if first > 12:
+            return 'dmy'
+        if second > 12:
+            return 'mdy'
+        twelve_hour = twelve_hour or bool(re.search(r"[AaPp]\.?[Mm]\.?$", match.group('ios_time') or match.group('time')))
+    return 'mdy' if twelve_hour else 'dmy'
+
+
+def parse_timestamp(date: str, time_: str, date_order: str = 'dmy') -> str:
+    """Date d'export (jour en premier, ou mois en premier avec date_order='mdy') en ISO 8601"""
+    first, second, year = re.split(r"[./]", date)
+    day, month = (second, first) if date_order == 'mdy' else (first, second)
+    if len(year) == 2:
+        year = f"20{year}"
+    clock = re.sub(r"[^\d:]", "", time_)
+    hour, minute, *second = (int(part) for part in clock.split(':'))
+    # Exports réglés en 12 heures ("9:05 PM")
+    meridiem = time_.lower().replace('.', '')
+    if meridiem.endswith('pm') and hour < 12:
+        hour += 12
+    elif meridiem.endswith('am') and hour == 12:
+        hour = 0
+    return datetime(int(year), int(month), int(day), hour, minute, second[0] if second else 0).isoformat()
+
+
+def iter_messages(lines: Iterable[str], date_order: str = 'dmy') -> Iterator[Dict]:
+    """Messages d'un export : les lignes sans en-tête prolongent le message précédent"""
+    current = None
+    for line in lines:
+        line = line.rstrip('\n').replace('\u202f', ' ')  # espace fine des heures sur iOS
+        match = HEADER_RE.match(line)
+        timestamp = None
+        if match:
+            try:
+                timestamp = parse_timestamp(match.group('ios_date') or match.group('date'),
+                                            match.group('ios_time') or match.group('time'), date_order)
+            except ValueError as e:
+                # Date impossible dans cet ordre : la ligne est traitée comme du texte
+                logger.warning(f"Date illisible ({e}), ligne rattachée au message précédent: {line[:60]}")
+        if timestamp is None:
+            if current is not None:
+                current['text'] += '\n' + line
+            continue
+
+        if current is not None:
+            yield current
+        current = None
+
+        author, separator, text = match.group('rest').partition(': ')
+        if not separator:
+            # Message système (création du groupe, chiffrement, ajout d'un membre)
+            continue
+        current = {
+            'timestamp': timestamp,
+            'author': author.strip('\u200e '),
+            'text': text,
+        }
+    if current is not None:
+        yield current
+
+
+def load_export(path: str, since: str = None, authors: List[str] = None, date_order: str = None) -> List[Dict]:
+    """Messages texte de l'export, filtrés par date de début et auteurs (ordre des dates détecté si absent)"""
+    with open(path, encoding="utf-8-sig", errors="replace") as f:
+        lines: Sequence[str] = f.readlines()
+    if date_order is None:
+        date_order = detect_date_order(lines)
+        logger.info(f"Ordre des dates détecté: {date_order}")
+    messages = list(iter_messages(lines, date_order))
+
+    selected = []
+    for index, message in enumerate(messages):
+        message['message_index'] = index
+        if MEDIA_RE.search(message['text']):
+            continue
+        if since and message['timestamp'] < since:
+            continue
+        if authors and not any(author.lower() in message['author'].lower() for author in authors):
+            continue
+        selected.append(message)
+    return selected
+
+
+def batched(items: List, size: int) -> Iterator[List]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class WhatsAppImporter:
+    """Commandes d'un export WhatsApp vérifiées contre le catalogue"""
+
+    def __init__(self, bot=None, workers: int = 4, batch_size: int = DEFAULT_BATCH):
+        if bot is None:
+            from src.bot.telegram_bot import LapaiseeBot
+            bot = LapaiseeBot()
+        self.bot = bot
+        self.workers = workers
+        self.batch_size = batch_size
+
+    def check_batch(self, messages: List[Dict]) -> List[Dict]:
+        """Parse, recherche (une requête pour tous les articles du lot) et vérification du stock"""
+        orders = self.bot.parse_many([message['text'] for message in messages])
+        items = [item for order in orders for item in order['items']]
+        searches = self.bot.search_products(items) if items else []
+
+        results = []
+        position = 0
+        for message, order in zip(messages, orders):
+            if not order['items']:
+                continue
+            count = len(order['items'])
+            stock_check = self.bot.build_stock_check(order['items'], searches[position:position + count])
+            position += count
+            results.append({**message, 'order': order, 'stock_check': stock_check})
+        return results
+
+    def run(self, messages: List[Dict]) -> List[Dict]:
+        """Commandes trouvées dans les messages, dans l'ordre de la discussion"""
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="import") as executor:
+            batches = executor.map(self.check_batch, batched(messages, self.batch_size))
+            return [result for batch in batches for result in batch]
+
+    async def generate_replies(self, results: List[Dict]):
+        """Réponse du LLM pour chaque commande, une à la fois, après les commandes clients en direct"""
+        from src.ai.llm_scheduler import Priority
+
+        for result in results:
+            result['reply'] = await self.bot.generate_response(result['order'], result['stock_check'],
+                                                               priority=Priority.ANALYSIS)
+
+
+def to_record(result: Dict) -> Dict:
+    """Ligne JSONL d'une commande"""
+    record = {
+        'timestamp': result['timestamp'],
+        'author': result['author'],
+        'message_index': result['message_index'],
+        'text': result['text'],
+        'greeting': result['order']['greeting'],
+        'polite': result['order']['polite'],
+        'items': [],
+    }
+    for check in result['stock_check']:
+        product = check['product'] or {}
+        record['items'].append({
+            **check['item'],
+            'matched_name': product.get('name'),
+            'sku': product.get('sku'),
+            # Vide quand le stock n'est pas suivi (disponibilité dans 'available')
+            'stock_quantity': product.get('stock_quantity') if stock_managed(product) else None,
+            'price': product.get('price'),
+            'available': check['available'],
+            'stock_message': check['message'],
+        })
+    if 'reply' in result:
+        record['reply'] = result['reply']
+    return record
+
+
+def write_results(results: List[Dict], path: str):
+    """JSONL (une commande par ligne) ou CSV (un article par ligne) selon l'extension"""
+    output = Path(path)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    records = [to_record(result) for result in results]
+
+    if output.suffix.lower() == '.csv':
+        with open(output, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=CSV_FIELDS, extrasaction='ignore')
+            writer.writeheader()
+            for record in records:
+                for item in record['items']:
+                    writer.writerow({**record, **item})
+        return
+
+    with open(output, 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Commandes d'un export WhatsApp vérifiées contre le stock")
+    parser.add_argument("export", help="Export de discussion WhatsApp (.txt)")
+    parser.add_argument("-o", "--output", default="data/whatsapp_import.jsonl", help="Fichier .jsonl ou .csv")
+    parser.add_argument("--since", help="Ignorer les messages antérieurs (AAAA-MM-JJ)")
+    parser.add_argument("--author", action="append", help="Ne garder que les messages de cet auteur (répétable)")
+    parser.add_argument("--date-order", choices=("dmy", "mdy"),
+                        help="Ordre des dates de l'export (détecté par défaut ; mdy pour les exports US)")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("BOT_SEARCH_WORKERS", "4")))
+    parser.add_argument("--batch", type=int, default=DEFAULT_BATCH, help="Messages par recherche groupée")
+    parser.add_argument("--llm", action="store_true", help="Générer aussi la réponse de chaque commande")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    messages = load_export(args.export, args.since, args.author, args.date_order)
+    importer = WhatsAppImporter(workers=args.workers, batch_size=args.batch)
+    loaded = time.perf_counter()
+
+    results = importer.run(messages)
+    checked = time.perf_counter()
+    if args.llm:
+        asyncio.run(importer.generate_replies(results))
+
+    write_results(results, args.output)
+
+    items = [check for result in results for check in result['stock_check']]
+    found = sum(1 for check in items if check['product'])
+    available = sum(1 for check in items if check['available'])
+    elapsed = checked - loaded
+    logger.info(f"{len(messages)} messages, {len(results)} commandes, {len(items)} articles "
+                f"({found} trouvés, {available} disponibles) en {elapsed:.2f}s "
+                f"({len(messages) / elapsed if elapsed else 0:.0f} messages/s)")
+    logger.info(f"Résultats écrits dans {args.output} (total {time.perf_counter() - start:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Client WooCommerce REST avec récupération concurrente des pages
+"""
+
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qsl, quote, urlencode, urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.auth import AuthBase
+from urllib3.util.retry import Retry
+from loguru import logger
+
+
+class WooCommerceError(RuntimeError):
+    """Erreur renvoyée par l'API WooCommerce"""
+
+
+class WooCommerceOAuth1(AuthBase):
+    """
+    Signature OAuth 1.0a "one-legged" exigée par WooCommerce sur HTTP.
+
+    Sur HTTP, WooCommerce refuse les clés en query string : chaque requête
+    est signée (HMAC-SHA256) comme le faisait le client `woocommerce.API`,
+    et seule la signature circule dans l'URL, jamais le secret.
+    """
+
+    def __init__(self, consumer_key: str, consumer_secret: str):
+        self.consumer_key = consumer_key or ""
+        self.consumer_secret = consumer_secret or ""
+
+    @staticmethod
+    def _encode(value: Any) -> str:
+        return quote(str(value), safe="~")
+
+    def __call__(self, request):
+        parts = urlsplit(request.url)
+        base_url = f"{parts.scheme}://{parts.netloc}{parts.path}"
+        params = parse_qsl(parts.query, keep_blank_values=True)
+        params += [
+            ("oauth_consumer_key", self.consumer_key),
+            ("oauth_timestamp", str(int(time.time()))),
+            ("oauth_nonce", secrets.token_hex(16)),
+            ("oauth_signature_method", "HMAC-SHA256"),
+        ]
+
+        normalized = "&".join(
+            f"{k}={v}" for k, v in sorted((self._encode(k), self._encode(v)) for k, v in params)
+        )
+        string_to_sign = "&".join([request.method.upper(), self._encode(base_url), self._encode(normalized)])
+        # API v3 : la clé HMAC est "secret&" (pas de token secret en one-legged)
+        digest = hmac.new(f"{self.consumer_secret}&".encode(), string_to_sign.encode(), hashlib.sha256).digest()
+        params.append(("oauth_signature", base64.b64encode(digest).decode()))
+
+        request.url = f"{base_url}?{urlencode(params)}"
+        return request
+
+
+class WooCommerceFetcher:
+    """
+    Récupère des collections paginées de l'API WooCommerce.
+
+    La première page donne X-WP-TotalPages : les pages suivantes sont ensuite
+    demandées en parallèle (parallélisme borné) sur une seule session HTTP
+    dont le pool de connexions est réutilisé, avec retries et backoff.
+    Au plus `prefetch` pages sont en vol ou en attente de consommation, ce
+    qui borne la mémoire quand l'aval est plus lent que le réseau.
+    """
+
+    def __init__(self, url: str = None, consumer_key: str = None, consumer_secret: str = None,
+                 max_workers: int = None, per_page: int = 100, timeout: float = 30,
+                 retries: int = 3, backoff: float = 0.5, prefetch: int = None):
+        url = url or os.getenv("WOOCOMMERCE_URL", "")
+        self.base_url = f"{url.rstrip('/')}/wp-json/wc/v3/"
+        self.max_workers = max_workers or int(os.getenv("WOOCOMMERCE_MAX_WORKERS", "8"))
+        self.per_page = per_page
+        self.prefetch = prefetch or self.max_workers * 2
+        self.timeout = timeout
+        # Nombre total de pages annoncé par le dernier iter_pages (suivi de progression)
+        self.last_total_pages = None
+
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(["GET"]),
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers, max_retries=retry)
+
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        consumer_key = consumer_key or os.getenv("WOOCOMMERCE_KEY")
+        consumer_secret = consumer_secret or os.getenv("WOOCOMMERCE_SECRET")
+        if self.base_url.startswith("https://"):
+            self.session.auth = (consumer_key, consumer_secret)
+        else:
+            # En HTTP, WooCommerce n'accepte que des requêtes signées OAuth1
+            self.session.auth = WooCommerceOAuth1(consumer_key, consumer_secret)
+
+    def get_page(self, endpoint: str, page: int, params: Optional[Dict[str, Any]] = None) -> Tuple[List[Dict[str, Any]], int]:
+        """Récupère une page et renvoie (éléments, nombre total de pages)"""
+        query = {"per_page": self.per_page, "page": page, **(params or {})}
+        try:
+            response = self.session.get(self.base_url + endpoint, params=query, timeout=self.timeout)
+        except requests.RequestException as e:
+            raise WooCommerceError(f"Erreur réseau {endpoint} page {page}: {e}") from e
+
+        if response.status_code != 200:
+            raise WooCommerceError(f"Erreur API {endpoint} page {page}: {response.status_code}")
+
+        total_pages = int(response.headers.get("X-WP-TotalPages", 1) or 1)
+        return response.json(), total_pages
+
+    def iter_pages(self, endpoint: str, params: Optional[Dict[str, Any]] = None,
+                   start_page: int = 1) -> Iterator[Tuple[int, List[Dict[str, Any]]]]:
+        """Génère (numéro de page, éléments) dans l'ordre des pages, à partir de start_page"""
+        items, total_pages = self.get_page(endpoint, start_page, params)
+        self.last_total_pages = total_pages
+        logger.info(f"{endpoint}: {total_pages} pages à récupérer (à partir de la page {start_page})")
+        yield start_page, items
+
+        if total_pages <= start_page:
+            return
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            pending = deque()
+            next_page = start_page + 1
+            while pending or next_page <= total_pages:
+                while next_page <= total_pages and len(pending) < self.prefetch:
+                    pending.append((next_page, executor.submit(self.get_page, endpoint, next_page, params)))
+                    next_page += 1
+
+                page, future = pending.popleft()
+                yield page, future.result()[0]
+
+    def get_all(self, endpoint: str, params: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Récupère tous les éléments d'une collection"""
+        all_items = []
+        for page, items in self.iter_pages(endpoint, params):
+            logger.info(f"  Page {page}: {len(items)} éléments")
+            all_items.extend(items)
+        return all_items
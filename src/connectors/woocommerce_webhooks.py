@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Récepteur des webhooks WooCommerce (product.created / updated / deleted)
+
+Met à jour un seul produit dans ChromaDB sans attendre la prochaine synchro.
+Les rafales d'événements sur un même produit sont regroupées : seul le
+dernier état est appliqué après WEBHOOK_DEBOUNCE_SECONDS de calme.
+
+    uvicorn src.connectors.woocommerce_webhooks:app --port 8001
+"""
+
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from fastapi import FastAPI, HTTPException, Request
+from loguru import logger
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from src.utils.catalog_version import bump_catalog_version
+from src.utils.jobs import target_lock
+
+load_dotenv()
+logger.add("data/logs/woocommerce_webhooks.log", rotation="10 MB")
+
+WEBHOOK_SECRET = os.getenv("WOOCOMMERCE_WEBHOOK_SECRET", "")
+DEBOUNCE_SECONDS = float(os.getenv("WEBHOOK_DEBOUNCE_SECONDS", "2"))
+# Délai maximum avant application, même si le produit continue de changer
+MAX_DELAY_SECONDS = float(os.getenv("WEBHOOK_MAX_DELAY_SECONDS", "10"))
+
+SUPPORTED_TOPICS = ("product.created", "product.updated", "product.deleted")
+
+Event = Tuple[str, Dict[str, Any]]
+
+
+def compute_signature(body: bytes, secret: str) -> str:
+    """Signature WooCommerce : base64(HMAC-SHA256(corps brut, secret))"""
+    digest = hmac.new(secret.encode("utf-8"), body, hashlib.sha256).digest()
+    return base64.b64encode(digest).decode("ascii")
+
+
+def verify_signature(body: bytes, signature: Optional[str], secret: str) -> bool:
+    """Vérifie la signature d'un webhook"""
+    if not secret or not signature:
+        return False
+    return hmac.compare_digest(compute_signature(body, secret), signature)
+
+
+class WebhookCoalescer:
+    """
+    Regroupe les événements par produit et applique le dernier état de chacun.
+
+    Un produit est appliqué quand il n'a plus reçu d'événement depuis `debounce`
+    secondes, ou au plus tard `max_delay` secondes après son premier événement.
+    Les produits dus au même moment sont appliqués en un seul lot.
+    """
+
+    def __init__(self, apply_batch: Callable[[List[Event]], None],
+                 debounce: float = DEBOUNCE_SECONDS, max_delay: float = MAX_DELAY_SECONDS):
+        self.apply_batch = apply_batch
+        self.debounce = debounce
+        self.max_delay = max_delay
+        # id produit -> (événement, échéance, premier événement)
+        self._pending: Dict[str, Tuple[Event, float, float]] = {}
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {'received': 0, 'coalesced': 0, 'applied': 0, 'batches': 0, 'errors': 0}
+
+    @property
+    def pending(self) -> int:
+        """Nombre de produits en attente d'application"""
+        return len(self._pending)
+
+    def submit(self, topic: str, payload: Dict[str, Any]):
+        """Enregistre un événement (remplace l'événement en attente du même produit)"""
+        product_id = str(payload['id'])
+        now = time.monotonic()
+        self.stats['received'] += 1
+
+        first_seen = now
+        if product_id in self._pending:
+            self.stats['coalesced'] += 1
+            first_seen = self._pending[product_id][2]
+
+        due = min(now + self.debounce, first_seen + self.max_delay)
+        self._pending[product_id] = ((topic, payload), due, first_seen)
+        self._wakeup.set()
+
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while self._pending:
+            now = time.monotonic()
+            # Les produits presque dus partent avec le lot courant
+            horizon = now + self.debounce / 4
+            due = [pid for pid, (_, deadline, _) in self._pending.items() if deadline <= horizon]
+            if due and min(self._pending[pid][1] for pid in due) > now:
+                due = []
+
+            if due:
+                batch = [self._pending.pop(pid)[0] for pid in due]
+                try:
+                    # ChromaDB et l'embedding sont bloquants : hors de la boucle asyncio
+                    await asyncio.to_thread(self.apply_batch, batch)
+                    self.stats['applied'] += len(batch)
+                    self.stats['batches'] += 1
+                except Exception as e:
+                    self.stats['errors'] += 1
+                    logger.error(f"Erreur application webhooks: {e}")
+                continue
+
+            self._wakeup.clear()
+            next_due = min(deadline for _, deadline, _ in self._pending.values())
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=max(0.0, next_due - now))
+            except asyncio.TimeoutError:
+                pass
+
+    async def flush(self):
+        """Attend que tous les événements en attente soient appliqués"""
+        while self._task is not None and not self._task.done():
+            await asyncio.sleep(0.05)
+
+
+class ProductWebhookApplier:
+    """Applique des événements produits à ChromaDB en réutilisant le syncer"""
+
+    def __init__(self):
+        from src.sync_woocommerce import WooCommerceSyncer
+        self.syncer = WooCommerceSyncer()
+
+    def __call__(self, events: List[Event]):
+        # Même verrou que les synchros : l'état (empreintes) n'est jamais écrit par
+        # deux runs à la fois. Pendant une synchro, les événements attendent sa fin
+        # (dans le thread d'application) et continuent d'être regroupés en amont.
+        with target_lock('products', wait=True):
+            self.apply(events)
+
+    def apply(self, events: List[Event]):
+        state = self.syncer.state
+        # Relire l'état : la synchro planifiée peut l'avoir modifié entre-temps
+        state.load()
+
+        upserts = []
+        deleted = []
+        for topic, payload in events:
+            if topic == "product.deleted":
+                deleted.append(str(payload['id']))
+                continue
+
+            item = self.syncer.prepare_item(self.syncer.process_product(payload))
+            if item:
+                upserts.append(item)
+
+        if upserts:
+            self.syncer.upsert_batch(upserts)
+        if deleted:
+            self.syncer.delete_products(deleted)
+
+        state.save()
+        if upserts or deleted:
+            bump_catalog_version("webhook")
+        logger.info(f"Webhooks appliqués: {len(upserts)} upserts, {len(deleted)} suppressions "
+                    f"({len(events) - len(upserts) - len(deleted)} inchangés)")
+
+
+app = FastAPI(title="L'Apaisée - webhooks WooCommerce")
+
+
+@app.on_event("startup")
+async def startup():
+    app.state.coalescer = WebhookCoalescer(ProductWebhookApplier())
+    if not WEBHOOK_SECRET:
+        logger.warning("WOOCOMMERCE_WEBHOOK_SECRET non défini : tous les webhooks seront refusés")
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    await app.state.coalescer.flush()
+
+
+@app.post("/webhooks/woocommerce")
+async def receive_webhook(request: Request):
+    """Point d'entrée des webhooks WooCommerce"""
+    body = await request.body()
+    topic = request.headers.get("X-WC-Webhook-Topic")
+
+    # Ping envoyé par WooCommerce à la création du webhook (non signé)
+    if topic is None and body.startswith(b"webhook_id="):
+        return {"status": "pong"}
+
+    if not verify_signature(body, request.headers.get("X-WC-Webhook-Signature"), WEBHOOK_SECRET):
+        logger.warning(f"Signature de webhook invalide ({topic})")
+        raise HTTPException(status_code=401, detail="Signature invalide")
+
+    if topic not in SUPPORTED_TOPICS:
+        return {"status": "ignored", "topic": topic}
+
+    try:
+        payload = json.loads(body)
+        payload['id']
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Payload invalide")
+
+    app.state.coalescer.submit(topic, payload)
+    return {"status": "queued"}
+
+
+@app.get("/webhooks/stats")
+async def webhook_stats():
+    """Compteurs du récepteur"""
+    coalescer = app.state.coalescer
+    return {**coalescer.stats, 'pending': coalescer.pending}
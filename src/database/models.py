@@ -0,0 +1,65 @@
+"""
+Modèles SQLAlchemy du stock local des commandes WooCommerce
+"""
+
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import DateTime, Float, ForeignKey, Index, Integer, String, Text
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
+
+
+class Base(DeclarativeBase):
+    pass
+
+
+class Order(Base):
+    """Commande WooCommerce (champs affichés et filtrés par l'interface)"""
+    __tablename__ = "orders"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    number: Mapped[str] = mapped_column(String(32))
+    status: Mapped[str] = mapped_column(String(32), index=True)
+    date_created: Mapped[datetime] = mapped_column(DateTime, index=True)
+    date_modified_gmt: Mapped[Optional[datetime]] = mapped_column(DateTime, index=True)
+    date_completed: Mapped[Optional[datetime]] = mapped_column(DateTime)
+    total: Mapped[float] = mapped_column(Float, default=0.0)
+    currency: Mapped[str] = mapped_column(String(8), default="CHF")
+
+    customer_id: Mapped[int] = mapped_column(Integer, index=True, default=0)
+    customer_name: Mapped[str] = mapped_column(String(255), index=True, default="")
+    customer_email: Mapped[str] = mapped_column(String(255), default="")
+    customer_phone: Mapped[str] = mapped_column(String(64), default="")
+
+    shipping_method: Mapped[str] = mapped_column(String(255), default="")
+    shipping_address: Mapped[str] = mapped_column(String(255), default="")
+    shipping_postcode: Mapped[str] = mapped_column(String(32), default="")
+    shipping_city: Mapped[str] = mapped_column(String(255), default="")
+
+    payment_method_title: Mapped[str] = mapped_column(String(255), default="")
+    transaction_id: Mapped[str] = mapped_column(String(255), default="")
+    customer_note: Mapped[str] = mapped_column(Text, default="")
+
+    items: Mapped[List["OrderItem"]] = relationship(
+        back_populates="order", cascade="all, delete-orphan", lazy="selectin"
+    )
+
+    __table_args__ = (
+        Index("ix_orders_status_date", "status", "date_created"),
+        Index("ix_orders_customer_date", "customer_name", "date_created"),
+    )
+
+
+class OrderItem(Base):
+    """Ligne de commande"""
+    __tablename__ = "order_items"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    order_id: Mapped[int] = mapped_column(ForeignKey("orders.id", ondelete="CASCADE"), index=True)
+    product_id: Mapped[int] = mapped_column(Integer, index=True, default=0)
+    name: Mapped[str] = mapped_column(String(255), index=True, default="")
+    sku: Mapped[str] = mapped_column(String(64), default="")
+    quantity: Mapped[int] = mapped_column(Integer, default=0)
+    total: Mapped[float] = mapped_column(Float, default=0.0)
+
+    order: Mapped[Order] = relationship(back_populates="items")
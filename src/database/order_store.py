@@ -0,0 +1,142 @@
+"""
+Stock local des commandes WooCommerce (SQLite par défaut)
+"""
+
+import os
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import create_engine, delete, func, select
+from sqlalchemy.orm import sessionmaker
+
+from src.database.models import Base, Order, OrderItem
+
+
+def _parse_date(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+
+def _to_float(value: Any) -> float:
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class OrderStore:
+    """Lecture/écriture des commandes et lignes de commande"""
+
+    def __init__(self, url: str = None):
+        url = url or os.getenv("ORDERS_DATABASE_URL", "sqlite:///data/orders.sqlite")
+        if url.startswith("sqlite:///"):
+            Path(url[len("sqlite:///"):]).parent.mkdir(parents=True, exist_ok=True)
+
+        self.engine = create_engine(url)
+        Base.metadata.create_all(self.engine)
+        self.Session = sessionmaker(self.engine, expire_on_commit=False)
+
+    def order_from_api(self, data: Dict[str, Any]) -> Order:
+        """Convertit une commande de l'API REST en modèle"""
+        billing = data.get('billing') or {}
+        shipping = data.get('shipping') or {}
+        shipping_lines = data.get('shipping_lines') or []
+
+        return Order(
+            id=data['id'],
+            number=str(data.get('number', data['id'])),
+            status=data.get('status', ''),
+            date_created=_parse_date(data.get('date_created')),
+            date_modified_gmt=_parse_date(data.get('date_modified_gmt')),
+            date_completed=_parse_date(data.get('date_completed')),
+            total=_to_float(data.get('total')),
+            currency=data.get('currency', 'CHF'),
+            customer_id=data.get('customer_id') or 0,
+            customer_name=f"{billing.get('first_name', '')} {billing.get('last_name', '')}".strip(),
+            customer_email=billing.get('email', ''),
+            customer_phone=billing.get('phone', ''),
+            shipping_method=shipping_lines[0]['method_title'] if shipping_lines else '',
+            shipping_address=shipping.get('address_1', ''),
+            shipping_postcode=shipping.get('postcode', ''),
+            shipping_city=shipping.get('city', ''),
+            payment_method_title=data.get('payment_method_title', ''),
+            transaction_id=data.get('transaction_id', ''),
+            customer_note=data.get('customer_note', ''),
+            items=[
+                OrderItem(
+                    id=item['id'],
+                    product_id=item.get('product_id') or 0,
+                    name=item.get('name', ''),
+                    sku=item.get('sku') or '',
+                    quantity=item.get('quantity', 0),
+                    total=_to_float(item.get('total')),
+                )
+                for item in data.get('line_items', [])
+            ],
+        )
+
+    def upsert_orders(self, orders: Sequence[Dict[str, Any]]) -> int:
+        """Insère ou remplace des commandes (lignes comprises)"""
+        with self.Session.begin() as session:
+            for data in orders:
+                session.merge(self.order_from_api(data))
+        return len(orders)
+
+    def delete_orders(self, order_ids: Iterable[int]) -> int:
+        """Supprime des commandes et leurs lignes"""
+        order_ids = list(order_ids)
+        with self.Session.begin() as session:
+            for i in range(0, len(order_ids), 500):
+                chunk = order_ids[i:i + 500]
+                # SQLite n'applique pas ON DELETE CASCADE sans PRAGMA foreign_keys
+                session.execute(delete(OrderItem).where(OrderItem.order_id.in_(chunk)))
+                session.execute(delete(Order).where(Order.id.in_(chunk)))
+        return len(order_ids)
+
+    def ids(self) -> Set[int]:
+        """Identifiants des commandes en base"""
+        with self.Session() as session:
+            return set(session.scalars(select(Order.id)))
+
+    def count(self) -> int:
+        """Nombre de commandes en base"""
+        with self.Session() as session:
+            return session.scalar(select(func.count(Order.id)))
+
+    def statuses(self) -> List[str]:
+        """Statuts présents dans la base"""
+        with self.Session() as session:
+            return list(session.scalars(select(Order.status).distinct().order_by(Order.status)))
+
+    def query_orders(self, statuses: Optional[Sequence[str]] = None, customer: Optional[str] = None,
+                     product: Optional[str] = None, date_from: Optional[date] = None,
+                     date_to: Optional[date] = None, limit: int = 20,
+                     offset: int = 0) -> Tuple[List[Order], int]:
+        """
+        Commandes filtrées, les plus récentes d'abord, et nombre total de résultats.
+
+        Les filtres client et produit sont des recherches par sous-chaîne
+        (ILIKE '%x%') : elles ne peuvent pas utiliser les index sur
+        customer_name et OrderItem.name et parcourent la table, ce qui reste
+        acceptable au volume de commandes de la brasserie.
+        """
+        query = select(Order)
+        if statuses:
+            query = query.where(Order.status.in_(statuses))
+        if customer:
+            query = query.where(Order.customer_name.ilike(f"%{customer}%"))
+        if product:
+            query = query.where(Order.id.in_(
+                select(OrderItem.order_id).where(OrderItem.name.ilike(f"%{product}%"))
+            ))
+        if date_from:
+            query = query.where(Order.date_created >= datetime.combine(date_from, datetime.min.time()))
+        if date_to:
+            query = query.where(Order.date_created < datetime.combine(date_to + timedelta(days=1), datetime.min.time()))
+
+        with self.Session() as session:
+            total = session.scalar(select(func.count()).select_from(query.subquery()))
+            orders = list(session.scalars(
+                query.order_by(Order.date_created.desc()).limit(limit).offset(offset)
+            ))
+        return orders, total
@@ -0,0 +1,77 @@
+"""
+Stockage clé-valeur des champs lourds des produits (descriptions nettoyées)
+
+Les descriptions ne sont pas dans les métadonnées ChromaDB : elles gonfleraient
+chaque résultat de requête. Elles sont lues ici à la demande, produit par produit.
+"""
+
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+# Nombre maximum de paramètres par requête SQLite
+SQL_CHUNK = 500
+
+
+class ProductDetailsStore:
+    """Descriptions des produits indexées par id de produit"""
+
+    FIELDS = ('short_description', 'description')
+
+    def __init__(self, path: str = None):
+        path = Path(path or os.getenv("PRODUCT_DETAILS_PATH", "./data/product_details.sqlite"))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS product_details (
+                id TEXT PRIMARY KEY,
+                short_description TEXT NOT NULL DEFAULT '',
+                description TEXT NOT NULL DEFAULT ''
+            )
+        """)
+        self._conn.commit()
+
+    def put_many(self, details: Dict[str, Dict[str, str]]):
+        """Insère ou remplace les détails de plusieurs produits"""
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO product_details (id, short_description, description) VALUES (?, ?, ?)",
+                [(product_id, d.get('short_description', ''), d.get('description', ''))
+                 for product_id, d in details.items()]
+            )
+            self._conn.commit()
+
+    def get(self, product_id: str) -> Optional[Dict[str, str]]:
+        """Détails d'un produit (None s'il est inconnu)"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT short_description, description FROM product_details WHERE id = ?",
+                (product_id,)
+            ).fetchone()
+        return dict(zip(self.FIELDS, row)) if row else None
+
+    def delete_many(self, product_ids: Iterable[str]):
+        """Supprime les détails de produits supprimés"""
+        product_ids = list(product_ids)
+        with self._lock:
+            for i in range(0, len(product_ids), SQL_CHUNK):
+                chunk = product_ids[i:i + SQL_CHUNK]
+                self._conn.execute(
+                    f"DELETE FROM product_details WHERE id IN ({','.join('?' * len(chunk))})", chunk
+                )
+            self._conn.commit()
+
+
+_store: Optional[ProductDetailsStore] = None
+
+
+def get_product_details_store() -> ProductDetailsStore:
+    """Store partagé par le processus"""
+    global _store
+    if _store is None:
+        _store = ProductDetailsStore()
+    return _store
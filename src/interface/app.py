@@ -5,15 +5,54 @@ Interface Streamlit pour L'Apaisée AI Agent
 
 import streamlit as st
 import os
+import sys
+from pathlib import Path
 from dotenv import load_dotenv
 import chromadb
-from chromadb.utils import embedding_functions
 import ollama
-from datetime import datetime
+from datetime import datetime, timedelta
 import json
-from woocommerce import API
+import time
+import pandas as pd
 from loguru import logger
 
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from src.ai.catalog_analytics import CatalogAnalytics
+from src.ai.embedding_cache import get_embedding_function
+from src.ai.llm_scheduler import LLMDeadlineExceeded, Priority, get_llm_scheduler
+from src.ai.prompt_builder import PromptBuilder
+from src.ai.query_client import RemoteEmbeddingFunction, get_query_client
+from src.ai.retrieval_cache import RetrievalCache
+from src.database.order_store import OrderStore
+from src.database.product_details import get_product_details_store
+from src.utils import log_index
+from src.utils.jobs import JOB_TYPES, JobAlreadyRunning, JobRunner
+from src.utils.stock import stock_label, stock_managed
+from src.utils.sync_run import load_last_summary
+
+# En-têtes des tableaux d'analyse
+ANALYSIS_COLUMNS = {'name': 'Produit', 'format': 'Format', 'stock_quantity': 'Stock',
+                    'units': 'Unités', 'price': 'Prix (CHF)', 'statut': 'Statut'}
+
+# Composants dont les logs sont consultables, et périodes proposées
+LOG_COMPONENTS = {'sync': "Synchro produits", 'bot': "Bot Telegram",
+                  'webhooks': "Webhooks WooCommerce", 'orders': "Synchro commandes",
+                  'query': "Service de recherche"}
+LOG_PERIODS = {"15 min": timedelta(minutes=15), "1 h": timedelta(hours=1), "24 h": timedelta(days=1),
+               "7 jours": timedelta(days=7), "Tout": None}
+
+# Prompt du chat : règles en tête, consignes de réponse après la question
+CHAT_RULES = """Tu es l'assistant AI de la brasserie L'Apaisée (Suisse), tu connais ses produits et ses stocks.
+Règles:
+- prix en CHF (francs suisses), jamais en euros
+- bières clean (IPA, Jonquille, Pointe...) : canettes 44cl, cartons de 12
+- bières wild : bouteilles
+- stock total = unités + cartons × 12"""
+CHAT_ANSWER_FORMAT = ("Réponds précisément. Pour un stock, donne le total de canettes/bouteilles "
+                      "et le détail (X unités + Y cartons), prix en CHF.")
+PROMPT_PRODUCT_COLUMNS = [('name', 'Produit'), ('format', 'Format'), ('stock_quantity', 'Stock'),
+                          ('price', 'Prix CHF'), ('gamme', 'Gamme')]
+
 # Configuration de la page
 st.set_page_config(
     page_title="L'Apaisée AI Agent",
@@ -24,6 +63,14 @@ st.set_page_config(
 # Charger les variables d'environnement
 load_dotenv()
 
+# Intervalle de rafraîchissement de la sidebar pendant un job de synchro
+JOBS_REFRESH_SECONDS = float(os.getenv("JOBS_REFRESH_SECONDS", "2"))
+# Lignes de sortie affichées pour un job échoué ou interrompu
+JOB_LOG_TAIL_LINES = 15
+
+# Nombre maximum d'entrées affichées par recherche dans les logs
+LOG_VIEW_LIMIT = int(os.getenv("LOG_VIEW_LIMIT", "200"))
+
 # Style CSS personnalisé
 st.markdown("""
 <style>
@@ -43,14 +90,16 @@ st.markdown("""
 
 @st.cache_resource
 def init_chromadb():
-    """Initialise la connexion ChromaDB"""
+    """Initialise la connexion ChromaDB (ou au service de recherche partagé si QUERY_SERVICE_URL est défini)"""
+    query_client = get_query_client()
+    if query_client:
+        return query_client.collection("products"), query_client.collection("brewery_context")
+    
     client = chromadb.PersistentClient(
         path=os.getenv("CHROMA_PERSIST_DIRECTORY", "./data/chromadb")
     )
     
-    embedding_function = embedding_functions.SentenceTransformerEmbeddingFunction(
-        model_name="paraphrase-multilingual-MiniLM-L12-v2"
-    )
+    embedding_function = get_embedding_function()
     
     products_collection = client.get_or_create_collection(
         name="products",
@@ -64,98 +113,143 @@ def init_chromadb():
     
     return products_collection, context_collection
 
-def search_products(collection, query: str, n_results: int = 5):
-    """Recherche dans la collection de produits"""
-    results = collection.query(
-        query_texts=[query],
-        n_results=n_results
-    )
-    return results
-
-def generate_context(products_results, context_results):
-    """Génère le contexte pour le LLM"""
-    context = "Contexte de la brasserie L'Apaisée:\n\n"
-    
-    # Ajouter le contexte général
-    if context_results['documents'][0]:
-        context += "Informations générales:\n"
-        for doc in context_results['documents'][0]:
-            context += f"- {doc}\n"
-        context += "\n"
-    
-    # Ajouter les produits pertinents
-    if products_results['documents'][0]:
-        context += "Produits pertinents:\n"
-        for i, metadata in enumerate(products_results['metadatas'][0]):
-            context += f"\n{i+1}. {metadata['name']}\n"
-            context += f"   - Format: {metadata.get('format', 'Non spécifié')}\n"
-            context += f"   - Stock: {metadata.get('stock_quantity', 0)} unités\n"
-            context += f"   - Prix: {metadata.get('price', 'N/A')}€\n"
-            context += f"   - Gamme: {metadata.get('gamme', 'Non classifié')}\n"
-    
-    return context
-
-def query_llm(question: str, context: str):
-    """Interroge le LLM avec le contexte"""
-    prompt = f"""Tu es l'assistant AI de la brasserie L'Apaisée en Suisse. Tu connais parfaitement les produits, 
-    les stocks et le fonctionnement de la brasserie.
+@st.cache_resource
+def init_retrieval_cache():
+    """Cache des recherches partagé par les reruns et les sessions"""
+    return RetrievalCache()
 
-    RÈGLES IMPORTANTES:
-    1. Tous les prix sont en CHF (francs suisses), JAMAIS en euros
-    2. Les bières clean (IPA, Jonquille, Pointe, etc.) sont TOUJOURS en canettes 44cl
-    3. Les bières wild sont en bouteilles
-    4. Les cartons de canettes contiennent 12 unités
-    5. Quand on demande le stock, calcule le total: unités + (cartons × 12)
+def search_products(collection, query: str, n_results: int = 5):
+    """Recherche dans la collection de produits (résultats en cache tant que le catalogue ne change pas)"""
+    return init_retrieval_cache().query(collection, query, n_results)
 
-    {context}
+def new_prompt() -> PromptBuilder:
+    """Prompt du chat et des analyses, règles de la brasserie en tête"""
+    return PromptBuilder().add_text('règles', CHAT_RULES, required=True)
 
-    Question: {question}
+def generate_context(products_results, context_results) -> PromptBuilder:
+    """Prompt avec les produits (tableau compact) et le contexte de la brasserie, par pertinence"""
+    prompt = new_prompt()
+    # Stock non géré : le statut remplace la quantité (0) pour ne pas annoncer une rupture
+    products = [dict(metadata, stock_quantity=stock_label(metadata)) for metadata in products_results['metadatas'][0]]
+    prompt.add_table('produits', "Produits pertinents:", products,
+                     PROMPT_PRODUCT_COLUMNS, products_results.get('distances', [None])[0])
+    prompt.add_snippets('contexte', "Informations générales:", context_results['documents'][0],
+                        context_results.get('distances', [None])[0])
+    return prompt
 
-    Réponds de manière précise. Pour les stocks, donne toujours:
-    - Le nombre total de canettes/bouteilles disponibles
-    - Le détail (X unités + Y cartons)
-    - Utilise CHF pour les prix"""
+def query_llm(question: str, prompt: PromptBuilder, priority: Priority = Priority.CHAT):
+    """Interroge le LLM avec le contexte (créneau partagé avec le bot, selon la priorité)"""
+    prompt.add_text('question', f"Question: {question}\n{CHAT_ANSWER_FORMAT}", required=True)
+    text = prompt.build()
+    logger.info(f"Prompt {priority.name.lower()}: {prompt.summary()}")
     
     try:
-        response = ollama.chat(
-            model=os.getenv("OLLAMA_MODEL", "deepseek-r1:7b"),
-            messages=[
-                {'role': 'user', 'content': prompt}
-            ]
-        )
+        with get_llm_scheduler().slot(priority):
+            response = ollama.chat(
+                model=os.getenv("OLLAMA_MODEL", "deepseek-r1:7b"),
+                messages=[
+                    {'role': 'user', 'content': text}
+                ]
+            )
+        # Tokens réellement traités par le modèle, pour ajuster PROMPT_TOKEN_BUDGET
+        if response.get('prompt_eval_count'):
+            logger.info(f"Prompt évalué: {response['prompt_eval_count']} tokens en "
+                        f"{response.get('prompt_eval_duration', 0) / 1e9:.1f}s")
         return response['message']['content']
+    except LLMDeadlineExceeded as e:
+        logger.warning(f"{e}")
+        # Pas de génération possible à temps : les données brutes plutôt qu'une attente sans fin
+        context = prompt.build(include=[s.name for s in prompt.sections if not s.required])
+        return f"⏳ Le LLM est occupé par des commandes clients, voici les données trouvées :\n\n{context}"
     except Exception as e:
         logger.error(f"Erreur LLM: {e}")
         return f"Erreur lors de la génération de la réponse: {str(e)}"
 
 
-@st.cache_data(ttl=300)  # Cache de 5 minutes
-def get_recent_orders(n_orders=10):
-    """Récupère les dernières commandes depuis WooCommerce"""
+@st.cache_resource
+def init_analytics():
+    """Analyses du catalogue complet (tableau rechargé à chaque nouvelle version)"""
+    products_collection, _ = init_chromadb()
+    return CatalogAnalytics(products_collection)
+
+def show_analysis(question: str, compute, rephrase: bool, display=st.info):
+    """Affiche le tableau calculé, puis sa reformulation par le LLM si demandée"""
+    start = time.perf_counter()
+    table = compute()
+    st.caption(f"{len(table)} produits, calculé en {(time.perf_counter() - start) * 1000:.1f} ms")
+    table = table.rename(columns=ANALYSIS_COLUMNS)
+    st.dataframe(table, use_container_width=True, hide_index=True)
+    
+    if rephrase and not table.empty:
+        with st.spinner("Reformulation en cours..."):
+            prompt = new_prompt().add_table(
+                'résultat', "Résultat exact, calculé sur tout le catalogue:",
+                table.to_dict('records'), [(column, column) for column in table.columns]
+            )
+            display(query_llm(question, prompt, priority=Priority.ANALYSIS))
+
+
+@st.cache_resource
+def init_order_store():
+    """Initialise la base locale des commandes"""
+    return OrderStore()
+
+@st.cache_resource
+def init_job_runner():
+    """Lanceur des jobs de synchro en arrière-plan"""
+    return JobRunner()
+
+def start_job(job_type: str):
+    """Lance un job de synchro, ou prévient si un job de la même cible tourne déjà"""
     try:
-        wcapi = API(
-            url=os.getenv("WOOCOMMERCE_URL"),
-            consumer_key=os.getenv("WOOCOMMERCE_KEY"),
-            consumer_secret=os.getenv("WOOCOMMERCE_SECRET"),
-            version="wc/v3",
-            timeout=30
-        )
-        
-        # Récupérer les dernières commandes
-        response = wcapi.get("orders", params={
-            "per_page": n_orders,
-            "orderby": "date",
-            "order": "desc"
-        })
-        
-        if response.status_code == 200:
-            return response.json()
-        else:
-            st.error(f"Erreur API: {response.status_code}")
-            return []
-    except Exception as e:
-        st.error(f"Erreur lors de la récupération des commandes: {e}")
-        return []
+        init_job_runner().start(job_type)
+    except JobAlreadyRunning as e:
+        st.warning(str(e))
+        return
+    st.toast(f"{JOB_TYPES[job_type]['label']} lancée")
+    # Rerun pour afficher la progression dans la barre latérale
+    st.rerun()
+
+def show_job_progress(job):
+    """Progression d'un job en cours : barre si le nombre de pages est connu"""
+    progress = init_job_runner().progress(job['job_id']) or {}
+    page, total_pages = progress.get('page'), progress.get('total_pages')
+    details = " · ".join(f"{key}: {value}" for key, value in progress.items()
+                         if key not in ('at', 'page', 'total_pages'))
+    if page and total_pages:
+        st.progress(min(page / total_pages, 1.0), text=f"{job['label']} : page {page}/{total_pages}")
+    else:
+        st.caption(f"⏳ {job['label']} : démarrage...")
+    if details:
+        st.caption(details)
+
+def show_jobs_panel():
+    """Jobs en cours et derniers jobs terminés (fragment rafraîchi seul pendant un job)"""
+    job_runner = init_job_runner()
+    active_jobs = job_runner.active()
+    for job in active_jobs:
+        show_job_progress(job)
+    
+    # Un job a démarré ou s'est terminé : rerun complet pour les statistiques et le rafraîchissement
+    active_ids = sorted(job['job_id'] for job in active_jobs)
+    if active_ids != st.session_state.get('active_job_ids', active_ids):
+        st.rerun()
+    
+    history = job_runner.history(limit=5)
+    if history:
+        with st.expander("Historique des synchros"):
+            status_icons = {'completed': '✅', 'failed': '❌', 'interrupted': '⚠️', 'skipped': '⏭️'}
+            for job in history:
+                duration = f"{job['duration']:.1f}s" if job.get('duration') is not None else "-"
+                st.caption(f"{status_icons.get(job['status'], '❓')} {job.get('started_at') or job['requested_at']} "
+                           f"{job['label']} ({duration})")
+                if job.get('error'):
+                    st.caption(f"Erreur: {job['error']}")
+                if job['status'] in ('failed', 'interrupted'):
+                    # Fin de la sortie du processus, lue à reculons depuis la fin du fichier
+                    output = job_runner.log_tail(job['job_id'], JOB_LOG_TAIL_LINES)
+                    if output:
+                        st.code("\n".join(output), language=None)
 
 def format_order_status(status):
     """Formate le statut de commande avec emoji"""
@@ -193,20 +287,70 @@ def main():
         except:
             st.metric("Produits en base", "N/A")
         
+        cache_stats = (RemoteEmbeddingFunction() if get_query_client() else get_embedding_function()).stats()
+        st.caption(f"Cache d'embeddings: {cache_stats['hits']} hits / {cache_stats['misses']} misses")
+        retrieval_stats = init_retrieval_cache().stats()
+        st.caption(f"Cache de recherche: {retrieval_stats['hits']} hits / {retrieval_stats['misses']} misses "
+                   f"({retrieval_stats['hit_rate']:.0%}), {retrieval_stats['entries']} entrées, "
+                   f"{retrieval_stats['invalidations']} invalidations")
+        
+        # File d'attente Ollama (bot et interface confondus)
+        llm_queue = get_llm_scheduler().queue_depth()
+        st.caption(f"File LLM: {llm_queue['order']} commandes, {llm_queue['chat']} chat, "
+                   f"{llm_queue['analysis']} analyses en attente")
+        
+        # Bilan de la dernière synchro des produits
+        summary = load_last_summary("products")
+        if summary:
+            status = "✅" if summary['status'] == 'completed' else "⚠️"
+            st.caption(f"{status} Dernière synchro: {summary['finished_at']} "
+                       f"({'complète' if summary['params']['full'] else 'incrémentale'}, "
+                       f"essai {summary['attempts']})")
+            if summary['error']:
+                st.caption(f"Erreur après la page {summary['committed_page']}: {summary['error']}")
+            counters = summary['counters']
+            st.caption(f"{counters['pages_fetched']} pages, {counters['batches_embedded']} lots embeddés, "
+                       f"{counters['batches_upserted']} lots écrits")
+            st.caption(" · ".join(
+                f"{stage}: {values['items']} en {values['seconds']:.1f}s"
+                for stage, values in summary['stages'].items()
+            ))
+        
         st.divider()
         
         # Actions rapides
         st.header("⚡ Actions rapides")
+        job_type = st.selectbox("Synchro", list(JOB_TYPES), format_func=lambda key: JOB_TYPES[key]['label'])
         if st.button("🔄 Synchroniser WooCommerce"):
-            st.info("Lancer `python src/sync_woocommerce.py` dans le terminal")
+            start_job(job_type)
+        
+        # Jobs en cours et derniers jobs terminés : seul ce panneau se rafraîchit pendant un job
+        active_jobs = init_job_runner().active()
+        st.session_state.active_job_ids = sorted(job['job_id'] for job in active_jobs)
+        live_refresh = st.toggle("Suivi en direct", value=True, disabled=not active_jobs)
+        refresh_every = JOBS_REFRESH_SECONDS if active_jobs and live_refresh else None
+        st.fragment(run_every=refresh_every)(show_jobs_panel)()
         
-        if st.button("📝 Voir les logs"):
-            try:
-                with open("data/logs/sync_woocommerce.log", "r") as f:
-                    logs = f.readlines()[-20:]  # 20 dernières lignes
-                    st.text("\n".join(logs))
-            except:
-                st.warning("Aucun log disponible")
+        # Logs de tous les composants, archives de rotation comprises (lecture indexée)
+        with st.expander("📝 Logs"):
+            log_components = st.multiselect("Composants", list(LOG_COMPONENTS), default=list(LOG_COMPONENTS),
+                                            format_func=LOG_COMPONENTS.get)
+            log_levels = st.multiselect("Niveaux", log_index.LEVELS, default=['WARNING', 'ERROR', 'CRITICAL'])
+            log_period = st.selectbox("Période", list(LOG_PERIODS), index=1)
+            log_contains = st.text_input("Contient", placeholder="Ex: timeout")
+            if st.button("📝 Voir les logs"):
+                since = datetime.now() - LOG_PERIODS[log_period] if LOG_PERIODS[log_period] else None
+                start = time.perf_counter()
+                records = log_index.search(log_components, log_levels, since=since,
+                                           contains=log_contains, limit=LOG_VIEW_LIMIT)
+                st.caption(f"{len(records)} entrées en {(time.perf_counter() - start) * 1000:.1f} ms")
+                if records:
+                    st.text("\n".join(
+                        f"{record.time:%Y-%m-%d %H:%M:%S} {record.level:<8} [{record.component}] {record.message}"
+                        for record in records
+                    ))
+                else:
+                    st.info("Aucun log correspondant")
     
     # Tabs principales
     tab1, tab2, tab3, tab4 = st.tabs(["💬 Assistant", "📦 Produits", "📈 Analyses", "📋 Commandes"])
@@ -228,10 +372,10 @@ def main():
                 context_results = search_products(context_collection, question, n_results=3)
                 
                 # Générer le contexte
-                context = generate_context(products_results, context_results)
+                llm_prompt = generate_context(products_results, context_results)
                 
                 # Interroger le LLM
-                response = query_llm(question, context)
+                response = query_llm(question, llm_prompt)
                 
                 # Afficher et stocker la réponse
                 with st.chat_message("assistant"):
@@ -253,12 +397,13 @@ def main():
             if results['metadatas'][0]:
                 st.subheader(f"Résultats ({len(results['metadatas'][0])})")
                 
-                for metadata in results['metadatas'][0]:
+                for product_id, metadata in zip(results['ids'][0], results['metadatas'][0]):
                     with st.expander(f"🍺 {metadata['name']}"):
                         col1, col2, col3 = st.columns(3)
                         
                         with col1:
-                            st.metric("Stock", f"{metadata.get('stock_quantity', 0)} unités")
+                            st.metric("Stock", f"{metadata.get('stock_quantity', 0)} unités"
+                                      if stock_managed(metadata) else "Non suivi")
                             st.caption(f"Statut: {metadata.get('stock_status', 'unknown')}")
                         
                         with col2:
@@ -269,125 +414,122 @@ def main():
                             st.metric("Gamme", metadata.get('gamme', 'Non classifié'))
                             st.caption(f"SKU: {metadata.get('sku', 'N/A')}")
                         
-                        if metadata.get('short_description'):
-                            st.markdown("**Description:**")
-                            # Afficher la description nettoyée
-                            desc = metadata['short_description']
+                        # Description lue dans le store de détails seulement à la demande
+                        if st.toggle("Description", key=f"desc_{product_id}"):
+                            details = get_product_details_store().get(product_id) or {}
+                            desc = details.get('short_description') or details.get('description')
                             if desc and len(desc) > 200:
                                 desc = desc[:200] + "..."
-                            st.write(desc)
+                            st.write(desc or "Aucune description")
             else:
                 st.info("Aucun résultat trouvé")
     
     with tab3:
         st.header("Analyses et tendances")
         
+        analytics = init_analytics()
+        
+        # Calculé sur tout le catalogue, rechargé seulement quand il change
+        st.subheader("Stock par gamme")
+        st.dataframe(analytics.gamme_breakdown(), use_container_width=True)
+        
         # Analyses prédéfinies
         st.subheader("Questions fréquentes")
+        rephrase = st.toggle("Reformuler avec le LLM", help="Le tableau est calculé sans LLM ; "
+                                                             "le LLM ne fait que le commenter")
         
         col1, col2 = st.columns(2)
         
         with col1:
             if st.button("📊 Produits les plus en stock"):
-                with st.spinner("Analyse en cours..."):
-                    response = query_llm(
-                        "Quels sont les 5 produits avec le plus de stock?",
-                        generate_context(
-                            search_products(products_collection, "stock", 20),
-                            search_products(context_collection, "stock", 1)
-                        )
-                    )
-                    st.info(response)
+                show_analysis("Quels sont les 5 produits avec le plus de stock?",
+                              lambda: analytics.top_stock(5), rephrase, st.info)
             
             if st.button("🔻 Produits en rupture"):
-                with st.spinner("Analyse en cours..."):
-                    response = query_llm(
-                        "Quels produits sont en rupture de stock ou presque?",
-                        generate_context(
-                            search_products(products_collection, "rupture stock", 20),
-                            search_products(context_collection, "stock", 1)
-                        )
-                    )
-                    st.warning(response)
+                show_analysis("Quels produits sont en rupture de stock ou presque?",
+                              lambda: pd.concat([
+                                  analytics.out_of_stock().assign(statut="rupture"),
+                                  analytics.low_stock().assign(statut="stock bas"),
+                              ]),
+                              rephrase, st.warning)
         
         with col2:
             if st.button("🍺 Bières clean disponibles"):
-                with st.spinner("Analyse en cours..."):
-                    response = query_llm(
-                        "Liste toutes les bières clean (IPA, Lager, Stout) disponibles",
-                        generate_context(
-                            search_products(products_collection, "clean IPA lager stout", 20),
-                            search_products(context_collection, "clean", 2)
-                        )
-                    )
-                    st.success(response)
+                show_analysis("Liste toutes les bières clean (IPA, Lager, Stout) disponibles",
+                              lambda: analytics.available('clean'), rephrase, st.success)
             
             if st.button("🌿 Bières wild disponibles"):
-                with st.spinner("Analyse en cours..."):
-                    response = query_llm(
-                        "Liste toutes les bières wild (fermentation mixte/spontanée) disponibles",
-                        generate_context(
-                            search_products(products_collection, "wild fermentation mixte spontanée", 20),
-                            search_products(context_collection, "wild", 2)
-                        )
-                    )
-                    st.success(response)
+                show_analysis("Liste toutes les bières wild (fermentation mixte/spontanée) disponibles",
+                              lambda: analytics.available('wild'), rephrase, st.success)
     
     with tab4:
-        st.header("Dernières commandes")
+        st.header("Commandes")
+        order_store = init_order_store()
         
-        # Sélecteur du nombre de commandes
-        col1, col2 = st.columns([3, 1])
+        # Filtres
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            statuses = st.multiselect("Statut", order_store.statuses(), format_func=format_order_status)
+            customer_filter = st.text_input("Client", placeholder="Nom du client")
         with col2:
-            n_orders = st.number_input("Nombre", min_value=5, max_value=50, value=10)
+            product_filter = st.text_input("Produit", placeholder="Ex: Jonquille")
+            date_range = st.date_input("Période", value=())
+        with col3:
+            page_size = st.selectbox("Par page", [10, 20, 50, 100], index=1)
+            if st.button("🔄 Synchroniser les commandes"):
+                start_job('orders')
         
-        # Bouton de rafraîchissement
-        with col1:
-            if st.button("🔄 Rafraîchir les commandes"):
-                st.cache_data.clear()
-                st.rerun()
+        date_from = date_range[0] if len(date_range) > 0 else None
+        date_to = date_range[1] if len(date_range) > 1 else date_from
         
-        # Récupérer les commandes
-        with st.spinner("Chargement des commandes..."):
-            orders = get_recent_orders(n_orders)
+        # Pagination : la page et le total viennent d'une seule requête ; la
+        # page demandée n'est relue que si les filtres l'ont mise hors limites
+        page = st.session_state.get('orders_page', 1)
+        orders, total_orders = order_store.query_orders(
+            statuses, customer_filter, product_filter, date_from, date_to,
+            limit=page_size, offset=(page - 1) * page_size
+        )
+        n_pages = max(1, -(-total_orders // page_size))
+        if page > n_pages:
+            page = n_pages
+            orders, total_orders = order_store.query_orders(
+                statuses, customer_filter, product_filter, date_from, date_to,
+                limit=page_size, offset=(page - 1) * page_size
+            )
+        st.session_state.orders_page = page
+        st.number_input(f"Page (sur {n_pages})", min_value=1, max_value=n_pages, key='orders_page')
         
         if orders:
-            st.subheader(f"{len(orders)} dernières commandes")
+            st.subheader(f"{total_orders} commandes")
             
             for order in orders:
                 # Créer un titre avec les infos principales
-                order_date = order['date_created'].split('T')[0]
-                order_total = order['total']
-                order_status = format_order_status(order['status'])
-                
-                # Nom du client
-                customer_name = f"{order['billing']['first_name']} {order['billing']['last_name']}"
+                order_date = order.date_created.date().isoformat()
+                order_status = format_order_status(order.status)
                 
-                with st.expander(f"#{order['number']} - {customer_name} - {order_date} - {order_total} CHF - {order_status}"):
+                with st.expander(f"#{order.number} - {order.customer_name} - {order_date} - {order.total:.2f} CHF - {order_status}"):
                     # Détails du client
                     col1, col2 = st.columns(2)
                     
                     with col1:
                         st.markdown("**👤 Client**")
-                        st.write(f"Nom: {customer_name}")
-                        st.write(f"Email: {order['billing']['email']}")
-                        st.write(f"Tél: {order['billing']['phone']}")
+                        st.write(f"Nom: {order.customer_name}")
+                        st.write(f"Email: {order.customer_email}")
+                        st.write(f"Tél: {order.customer_phone}")
                     
                     with col2:
                         st.markdown("**📍 Livraison**")
-                        if order.get('shipping_lines'):
-                            shipping = order['shipping_lines'][0]['method_title']
-                            st.write(f"Mode: {shipping}")
-                        st.write(f"Adresse: {order['shipping']['address_1']}")
-                        st.write(f"{order['shipping']['postcode']} {order['shipping']['city']}")
+                        if order.shipping_method:
+                            st.write(f"Mode: {order.shipping_method}")
+                        st.write(f"Adresse: {order.shipping_address}")
+                        st.write(f"{order.shipping_postcode} {order.shipping_city}")
                     
                     # Produits commandés
                     st.markdown("**🍺 Produits commandés**")
                     total_items = 0
-                    for item in order['line_items']:
-                        qty = item['quantity']
-                        total_items += qty
-                        st.write(f"- {qty}x {item['name']} ({item['total']} CHF)")
+                    for item in order.items:
+                        total_items += item.quantity
+                        st.write(f"- {item.quantity}x {item.name} ({item.total:.2f} CHF)")
                     
                     st.write(f"**Total articles: {total_items}**")
                     
@@ -396,20 +538,20 @@ def main():
                     
                     with col1:
                         st.markdown("**💳 Paiement**")
-                        st.write(f"Méthode: {order['payment_method_title']}")
-                        st.write(f"Total: {order['total']} CHF")
-                        if order.get('transaction_id'):
-                            st.write(f"Transaction: {order['transaction_id']}")
+                        st.write(f"Méthode: {order.payment_method_title}")
+                        st.write(f"Total: {order.total:.2f} CHF")
+                        if order.transaction_id:
+                            st.write(f"Transaction: {order.transaction_id}")
                     
                     with col2:
                         st.markdown("**📝 Notes**")
-                        if order.get('customer_note'):
-                            st.write(f"Note client: {order['customer_note']}")
+                        if order.customer_note:
+                            st.write(f"Note client: {order.customer_note}")
                         st.write(f"Créée le: {order_date}")
-                        if order.get('date_completed'):
-                            st.write(f"Complétée le: {order['date_completed'].split('T')[0]}")
+                        if order.date_completed:
+                            st.write(f"Complétée le: {order.date_completed.date().isoformat()}")
         else:
-            st.info("Aucune commande trouvée")
+            st.info("Aucune commande trouvée (lancer `python src/sync_orders.py` pour remplir la base)")
     
     # Chat input EN DEHORS des tabs
     if prompt := st.chat_input("Ex: Quel est le stock de Jonquille?"):
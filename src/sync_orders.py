@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Synchronise les commandes WooCommerce dans la base locale
+"""
+
+import argparse
+import os
+import sys
+import warnings
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Set
+
+from dotenv import load_dotenv
+from loguru import logger
+warnings.filterwarnings('ignore', message='urllib3 v2 only supports OpenSSL')
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from src.connectors.woocommerce_client import WooCommerceFetcher
+from src.database.order_store import OrderStore
+from src.utils.jobs import JobAlreadyRunning, report_progress, target_lock
+from src.utils.sync_state import OrderSyncState
+
+# Charger les variables d'environnement
+load_dotenv()
+
+# Configuration logging
+logger.add("data/logs/sync_orders.log", rotation="10 MB")
+
+
+# Ordre de pagination stable (les nouvelles commandes arrivent en fin de liste)
+STABLE_ORDER = {"orderby": "id", "order": "asc"}
+
+
+class OrderSyncer:
+    def __init__(self, store: OrderStore = None):
+        """Initialise la connexion WooCommerce et la base des commandes"""
+        self.fetcher = WooCommerceFetcher(timeout=30)
+        self.store = store or OrderStore()
+        self.state = OrderSyncState()
+
+    def sync_orders(self, full: bool = False) -> int:
+        """
+        Récupère les commandes modifiées depuis la dernière synchro réussie
+        (ou tout l'historique si full ou première synchro) et les enregistre page par page,
+        puis supprime localement les commandes mises à la corbeille ou effacées.
+        """
+        started_at = datetime.utcnow().replace(microsecond=0).isoformat()
+        reconcile_hours = float(os.getenv("ORDERS_FULL_RECONCILE_HOURS", "24"))
+        reconcile = full or self.state.needs_full_reconcile(reconcile_hours)
+        delta = not full and bool(self.state.last_sync)
+
+        # Tri par id : les pages restent stables si des commandes arrivent pendant la synchro
+        params = dict(STABLE_ORDER)
+        if delta:
+            params.update({"modified_after": self.state.last_sync, "dates_are_gmt": "true"})
+            logger.info(f"Synchronisation des commandes modifiées après {self.state.last_sync}...")
+        else:
+            logger.info("Synchronisation de tout l'historique des commandes...")
+
+        synced = 0
+        remote_ids = set()
+        for page, orders in self.fetcher.iter_pages("orders", params):
+            synced += self.store.upsert_orders(orders)
+            remote_ids.update(order['id'] for order in orders)
+            logger.info(f"  Page {page}: {len(orders)} commandes")
+            report_progress(page=page, total_pages=self.fetcher.last_total_pages, orders=synced)
+
+        # Le statut "any" de l'API exclut la corbeille : elle est interrogée à part
+        if delta:
+            trashed = self.fetch_ids({"status": "trash", **params})
+            self.delete_orders(trashed & self.store.ids())
+
+        # Les commandes effacées définitivement n'apparaissent plus du tout dans
+        # l'API : seule une liste complète des ids permet de les détecter
+        if reconcile:
+            if delta:
+                remote_ids = self.fetch_ids({})
+            self.delete_orders(self.store.ids() - remote_ids)
+            self.state.last_full_reconcile = started_at
+
+        # Le watermark n'avance qu'une fois toutes les pages enregistrées
+        self.state.last_sync = started_at
+        self.state.save()
+
+        logger.info(f"{synced} commandes synchronisées ({self.store.count()} en base)")
+        return synced
+
+    def fetch_ids(self, params: Dict[str, Any]) -> Set[int]:
+        """Identifiants des commandes correspondant aux paramètres (champ id seul)"""
+        ids = set()
+        for _, orders in self.fetcher.iter_pages("orders", {**STABLE_ORDER, **params, "_fields": "id"}):
+            ids.update(order['id'] for order in orders)
+        return ids
+
+    def delete_orders(self, order_ids: Set[int]):
+        """Supprime de la base locale les commandes absentes de WooCommerce"""
+        if order_ids:
+            self.store.delete_orders(sorted(order_ids))
+            logger.info(f"{len(order_ids)} commandes supprimées de la base locale")
+
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="Synchronise les commandes WooCommerce")
+    parser.add_argument("--full", action="store_true", help="Récupère tout l'historique")
+    args = parser.parse_args()
+
+    # Même verrou que les jobs lancés depuis l'interface
+    try:
+        with target_lock('orders'):
+            OrderSyncer().sync_orders(full=args.full)
+    except JobAlreadyRunning as e:
+        logger.warning(f"{e} : run ignoré")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,45 +4,67 @@ Synchronise les données WooCommerce avec ChromaDB
 """
 
 import os
+import sys
 import json
+import argparse
 from datetime import datetime
-from typing import List, Dict, Any
+from pathlib import Path
+from contextlib import nullcontext
+from typing import List, Dict, Any, Optional, Set
 from dotenv import load_dotenv
-from woocommerce import API
 import chromadb
-from chromadb.utils import embedding_functions
 from loguru import logger
 import re
 import warnings
 warnings.filterwarnings('ignore', message='urllib3 v2 only supports OpenSSL')
 
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from src.ai.embedding_cache import get_embedding_function
+from src.ai.product_classifier import PRODUCT_CLASSIFIER
+from src.ai.query_client import RemoteEmbeddingFunction, get_query_client
+from src.connectors.woocommerce_client import WooCommerceFetcher
+from src.database.product_details import get_product_details_store
+from src.utils.catalog_version import bump_catalog_version
+from src.utils.jobs import JobAlreadyRunning, report_progress, target_lock
+from src.utils.pipeline import batched
+from src.utils.stock import to_number
+from src.utils.sync_run import SyncRun
+from src.utils.sync_state import SyncState
+
 # Charger les variables d'environnement
 load_dotenv()
 
 # Configuration logging
 logger.add("data/logs/sync_woocommerce.log", rotation="10 MB")
 
+# Intervalle entre deux réconciliations complètes (détection des suppressions)
+FULL_RECONCILE_HOURS = float(os.getenv("SYNC_FULL_RECONCILE_HOURS", "24"))
+
+# Nombre de produits embeddés et upsertés par lot
+SYNC_BATCH_SIZE = int(os.getenv("SYNC_BATCH_SIZE", "64"))
+
+# Métadonnées gardées dans ChromaDB : seulement ce qui sert au filtrage et à l'affichage.
+# Les descriptions vont dans le store de détails (src/database/product_details.py)
+METADATA_FIELDS = ('name', 'sku', 'price', 'stock_quantity', 'stock_status', 'manage_stock',
+                   'gamme', 'format', 'container_type')
+
+# Version du schéma des métadonnées (un changement déclenche migrate_metadata_layout)
+METADATA_LAYOUT = 3
+
+
 class WooCommerceSyncer:
     def __init__(self):
         """Initialise les connexions WooCommerce et ChromaDB"""
-        # WooCommerce API
-        self.wcapi = API(
-            url=os.getenv("WOOCOMMERCE_URL"),
-            consumer_key=os.getenv("WOOCOMMERCE_KEY"),
-            consumer_secret=os.getenv("WOOCOMMERCE_SECRET"),
-            version="wc/v3",
-            timeout=30
-        )
+        # WooCommerce API (pages récupérées en parallèle)
+        self.fetcher = WooCommerceFetcher(timeout=30)
         
         # ChromaDB
         self.chroma_client = chromadb.PersistentClient(
             path=os.getenv("CHROMA_PERSIST_DIRECTORY", "./data/chromadb")
         )
         
-        # Embedding function
-        self.embedding_function = embedding_functions.SentenceTransformerEmbeddingFunction(
-            model_name="paraphrase-multilingual-MiniLM-L12-v2"
-        )
+        # Embedding function (avec cache disque), celle du service de recherche s'il tourne
+        self.embedding_function = RemoteEmbeddingFunction() if get_query_client() else get_embedding_function()
         
         # Collections
         self.products_collection = self.chroma_client.get_or_create_collection(
@@ -54,6 +76,15 @@ class WooCommerceSyncer:
             name="brewery_context",
             embedding_function=self.embedding_function
         )
+        
+        # État de la synchro incrémentale
+        self.state = SyncState()
+        
+        # Descriptions nettoyées, hors des métadonnées ChromaDB
+        self.details_store = get_product_details_store()
+        
+        # Run de synchro en cours (checkpoint et durées par étape)
+        self.run: Optional[SyncRun] = None
     
     
     def clean_html(self, text: str) -> str:
@@ -75,95 +106,35 @@ class WooCommerceSyncer:
     def classify_product(self, product: Dict[str, Any]) -> Dict[str, Any]:
         """
         Classifie un produit selon les règles de L'Apaisée
+        (voir GAMME_RULES et FORMAT_RULES dans src/ai/product_classifier.py)
         """
-        name = product.get('name', '').lower()
-        categories = [cat['name'].lower() for cat in product.get('categories', [])]
-        
-        # Classification par défaut
-        classification = {
-            'type': 'unknown',
-            'format': 'unknown',
-            'gamme': 'unknown',
-            'container_type': 'unknown'
-        }
-        
-        # Détection du type de bière
-        if any(term in name for term in ['ipa', 'lager', 'stout', 'pilsner', 'pale ale', 'jonquille', 'pointe']):
-            classification['gamme'] = 'clean'
-            classification['container_type'] = 'canette'
-        elif any(term in name for term in ['wild', 'spontané', 'mixte', 'lambic', 'gueuze']):
-            classification['gamme'] = 'wild'
-            classification['container_type'] = 'bouteille'
-        
-        # Détection du format - AMÉLIORATION pour 12x et 24x
-        if 'fût' in name or 'fut' in name or 'keg' in name:
-            classification['format'] = 'fût 20L'
-            classification['container_type'] = 'fût'
-        # IMPORTANT: Détecter 12x AVANT les autres formats
-        elif '12x' in name.lower() or '12 x' in name.lower():
-            classification['format'] = 'carton 12 canettes 44cl'
-            classification['container_type'] = 'carton'
-            classification['gamme'] = 'clean'  # Les 12x sont toujours des canettes donc clean
-        # Détecter 24x
-        elif '24x' in name.lower() or '24 x' in name.lower() or 'carton de 24' in name.lower():
-            classification['format'] = 'carton 24 bouteilles 33cl'
-            classification['container_type'] = 'carton'
-        elif '12x' in name.lower() or '12 x' in name.lower() or 'carton 12' in name.lower():
-            classification['format'] = 'carton 12 canettes 44cl'
-        elif '24x' in name.lower() or '24 x' in name.lower() or 'carton 24' in name.lower() or 'carton de 24' in name.lower():
-            classification['format'] = 'carton 24 bouteilles 33cl'
-        elif '6x' in name or 'carton 6' in name:
-            classification['format'] = 'carton 6 bouteilles 75cl'
-        elif '75cl' in name or '750ml' in name:
-            classification['format'] = 'bouteille 75cl'
-        elif '33cl' in name or '330ml' in name:
-            classification['format'] = 'bouteille 33cl'
-        elif '44cl' in name or '440ml' in name:
-            classification['format'] = 'canette 44cl'
-        
-        return classification
+        return PRODUCT_CLASSIFIER.classify(product)
     
-    def get_all_products(self) -> List[Dict[str, Any]]:
-        """Récupère tous les produits depuis WooCommerce"""
-        all_products = []
-        page = 1
-        
-        while True:
-            logger.info(f"Récupération page {page}...")
-            logger.info(f"  Params: per_page=100, page={page}")
-            response = self.wcapi.get("products", params={"per_page": 100, "page": page, "status": "any"})
-            
-            if response.status_code != 200:
-                logger.error(f"Erreur API: {response.status_code}")
-                break
-            
-            products = response.json()
-            if not products:
-                break
-                
-            all_products.extend(products)
-            page += 1
+    def get_all_products(self, extra_params: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Récupère tous les produits depuis WooCommerce (filtrés par extra_params)"""
+        # Une erreur lève WooCommerceError : une liste partielle ferait avancer
+        # le watermark et supprimerait à tort les produits manquants
+        all_products = self.fetcher.get_all("products", {"status": "any", **(extra_params or {})})
         
         logger.info(f"Total produits récupérés: {len(all_products)}")
         return all_products
     
-    def process_product(self, product: Dict[str, Any]) -> Dict[str, Any]:
-        """Traite et enrichit les données d'un produit"""
-        classification = self.classify_product(product)
+    def process_product(self, product: Dict[str, Any],
+                        classification: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Traite et enrichit les données d'un produit (classification fournie ou calculée)"""
+        if classification is None:
+            classification = self.classify_product(product)
         
         # Extraire les infos importantes
         processed = {
             'id': str(product['id']),
             'name': product['name'],
             'sku': product.get('sku', ''),
-            'price': product.get('price', '0'),
-            'stock_quantity': product.get('stock_quantity', 0),
-            'stock_status': product.get('stock_status', 'unknown'),
+            **self.volatile_fields(product),
             'categories': ', '.join([cat['name'] for cat in product.get('categories', [])]),
-            'description': product.get('description', ''),
-            'short_description': product.get('short_description', ''),
+            'description': self.clean_html(product.get('description', '')),
+            'short_description': self.clean_html(product.get('short_description', '')),
             **classification,
-            'last_sync': datetime.now().isoformat()
         }
         # Nettoyer les valeurs None pour ChromaDB
         for key in list(processed.keys()):
@@ -172,49 +143,294 @@ class WooCommerceSyncer:
                 
         return processed
     
-    def sync_products(self):
-        """Synchronise tous les produits dans ChromaDB"""
-        logger.info("Début de la synchronisation des produits...")
-        
-        # Récupérer tous les produits
-        products = self.get_all_products()
-        
-        # Préparer les données pour ChromaDB
-        ids = []
-        documents = []
-        metadatas = []
+    def volatile_fields(self, product: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Champs volatils (stock, prix) typés : métadonnées seulement, hors du texte embeddé.
+        Sans gestion du stock, l'API renvoie une quantité nulle : manage_stock=False
+        le distingue d'une rupture (voir src/utils/stock.py).
+        """
+        quantity = product.get('stock_quantity')
+        return {
+            'price': to_number(product.get('price')),
+            'stock_quantity': to_number(quantity, int),
+            'stock_status': product.get('stock_status') or 'unknown',
+            'manage_stock': quantity is not None,
+        }
+    
+    def compact_metadata(self, processed: Dict[str, Any]) -> Dict[str, Any]:
+        """Métadonnées ChromaDB d'un produit traité (voir METADATA_FIELDS)"""
+        return {key: processed[key] for key in METADATA_FIELDS}
+    
+    def build_document(self, processed: Dict[str, Any]) -> str:
+        """
+        Construit le document texte utilisé pour l'embedding.
         
-        for product in products:
-            processed = self.process_product(product)
-            
-            # ID unique
-            ids.append(processed['id'])
-            
-            # Document texte pour l'embedding
-            doc = f"""
+        Il ne contient que la partie stable du produit : un mouvement de stock
+        ou de prix ne change pas le document et ne force pas de ré-embedding.
+        """
+        return f"""
             Produit: {processed['name']}
             SKU: {processed['sku']}
             Gamme: {processed['gamme']}
             Format: {processed['format']}
             Type de contenant: {processed['container_type']}
-            Prix: {processed['price']} CHF
-            Stock: {processed['stock_quantity']} unités
-            Statut stock: {processed['stock_status']}
             Description: {processed['short_description']}
             """
-            documents.append(doc)
+    
+    def sync_products(self, full: bool = False):
+        """
+        Synchronise les produits dans ChromaDB.
+        
+        Par défaut, seuls les produits modifiés depuis le dernier watermark sont
+        récupérés, et seuls ceux dont l'empreinte a changé sont ré-embeddés.
+        Une synchro complète (forcée ou périodique) détecte aussi les suppressions.
+        
+        Les pages circulent en flux : récupération → classification → embedding
+        → upsert par lots de SYNC_BATCH_SIZE. La mémoire reste bornée quelle que
+        soit la taille du catalogue et les produits sont consultables au fil de l'eau.
+        
+        Chaque run est un job avec checkpoint (voir SyncRun) : après une coupure,
+        le run suivant reprend à la dernière page écrite avec les mêmes paramètres.
+        """
+        if self.state.metadata_layout < METADATA_LAYOUT:
+            self.migrate_metadata_layout()
+            full = True
+        
+        run = SyncRun.start_or_resume("products", {
+            'full': full or self.state.needs_full_reconcile(FULL_RECONCILE_HOURS),
+            'modified_after': self.state.last_sync,
+            'started_at': datetime.utcnow().replace(microsecond=0).isoformat(),
+        })
+        full = run.params['full']
+        started_at = run.params['started_at']
+        
+        # Tri par id : l'ordre des pages reste stable d'un essai à l'autre
+        params = {"status": "any", "orderby": "id", "order": "asc"}
+        if full:
+            logger.info("Début de la synchronisation complète des produits...")
+            local_ids = set(self.products_collection.get(include=[])['ids'])
+        else:
+            logger.info(f"Début de la synchronisation incrémentale (modifiés après {run.params['modified_after']})...")
+            params.update({"modified_after": run.params['modified_after'], "dates_are_gmt": "true"})
+            local_ids = None
+        
+        # La dernière page écrite est relue : elle absorbe un léger décalage de pagination
+        start_page = max(1, run.committed_page)
+        if run.resumed:
+            logger.info(f"Reprise du run {run.run_id} (essai {run.attempts}) à la page {start_page}")
+        
+        self.run = run
+        try:
+            pages = run.timed_pages(self.fetcher.iter_pages("products", params, start_page=start_page))
+            for page, products in pages:
+                page_ids = set()
+                items = self.prepare_page(page, products, local_ids, page_ids)
+                for batch in batched(items, SYNC_BATCH_SIZE):
+                    self.upsert_batch(batch)
+                
+                # Empreintes d'abord, checkpoint ensuite : une page validée est entièrement écrite
+                self.state.save()
+                run.commit_page(page, page_ids)
+                report_progress(page=page, total_pages=self.fetcher.last_total_pages,
+                                **{stage: values['items'] for stage, values in run.stages.items()})
+            
+            if full:
+                self.reconcile_deletions(local_ids, run.remote_ids)
+                self.state.last_full_reconcile = started_at
+        except Exception as e:
+            logger.error(f"Synchro interrompue après la page {run.committed_page}: {e}")
+            run.fail(e)
+            raise
+        finally:
+            self.run = None
+        
+        # Le watermark est le début du run pour ne rien perdre de ce qui a changé pendant
+        self.state.last_sync = started_at
+        self.state.save()
+        run.complete()
+        if run.stages['upsert']['items'] or full:
+            bump_catalog_version("sync")
+        
+        logger.info(f"{run.stages['upsert']['items']} produits modifiés synchronisés dans ChromaDB "
+                    f"({len(run.remote_ids)} récupérés)")
+        for stage, values in run.stages.items():
+            logger.info(f"  {stage}: {values['items']} éléments en {values['seconds']:.1f}s")
+        logger.info(f"Cache d'embeddings: {self.embedding_function.stats()}")
+    
+    def migrate_metadata_layout(self):
+        """
+        Passe au schéma de métadonnées courant. ChromaDB ne sait pas retirer une
+        clé via update : chaque enregistrement est réécrit (même vecteur) avec les
+        seuls champs de METADATA_FIELDS, ce qui le garde consultable. Les empreintes
+        sont oubliées pour que la synchro complète qui suit réécrive tous les
+        produits et remplisse le store de détails.
+        """
+        logger.info(f"Migration des métadonnées vers le schéma {METADATA_LAYOUT}...")
+        ids = self.products_collection.get(include=[])['ids']
+        for chunk in batched(ids, 500):
+            records = self.products_collection.get(ids=chunk, include=['embeddings', 'documents', 'metadatas'])
+            metadatas = []
+            for metadata in records['metadatas']:
+                compact = {key: metadata[key] for key in METADATA_FIELDS if key in (metadata or {})}
+                if 'price' in compact:
+                    compact['price'] = to_number(compact['price'])
+                if 'stock_quantity' in compact:
+                    compact['stock_quantity'] = to_number(compact['stock_quantity'], int)
+                metadatas.append(compact or None)
             
-            # Métadonnées
-            metadatas.append(processed)
-        
-        # Ajouter à ChromaDB (en remplaçant les existants)
-        if ids:
-            self.products_collection.upsert(
-                ids=ids,
-                documents=documents,
+            self.products_collection.delete(ids=records['ids'])
+            self.products_collection.add(
+                ids=records['ids'],
+                embeddings=records['embeddings'],
+                documents=records['documents'],
                 metadatas=metadatas
             )
-            logger.info(f"{len(ids)} produits synchronisés dans ChromaDB")
+        
+        SyncRun.discard("products")
+        self.state.hashes.clear()
+        self.state.volatile_hashes.clear()
+        self.state.metadata_layout = METADATA_LAYOUT
+        self.state.save()
+    
+    def stage(self, name: str, items: int = 0):
+        """Chronomètre une étape du run en cours (sans effet hors d'un run)"""
+        return self.run.stage(name, items) if self.run else nullcontext()
+    
+    def prepare_page(self, page: int, products: List[Dict[str, Any]],
+                     local_ids: Optional[Set[str]], remote_ids: Set[str]) -> List[Dict[str, Any]]:
+        """
+        Transforme une page de produits en éléments à écrire (voir prepare_item)
+        pour les seuls produits modifiés. Les ids vus sont ajoutés à remote_ids.
+        """
+        logger.info(f"  Page {page}: {len(products)} produits")
+        items = []
+        with self.stage('classify', len(products)):
+            # Classification de toute la page en un seul balayage
+            classifications = PRODUCT_CLASSIFIER.classify_many([p.get('name', '') or '' for p in products])
+            for product, classification in zip(products, classifications):
+                processed = self.process_product(product, classification)
+                remote_ids.add(processed['id'])
+                
+                # Un produit absent de ChromaDB lors d'une synchro complète est toujours réécrit
+                missing = local_ids is not None and processed['id'] not in local_ids
+                item = self.prepare_item(processed, missing)
+                if item:
+                    items.append(item)
+        return items
+    
+    def prepare_item(self, processed: Dict[str, Any], missing: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Décide comment écrire un produit traité : ré-embedding si son contenu stable
+        a changé, simple mise à jour des métadonnées si seuls stock/prix ont changé,
+        rien (None) sinon.
+        """
+        doc = self.build_document(processed)
+        digest = SyncState.content_hash(doc, processed)
+        volatile_digest = SyncState.volatile_hash(processed)
+        
+        embed = missing or self.state.has_changed(processed['id'], digest)
+        if not embed and not self.state.has_volatile_changed(processed['id'], volatile_digest):
+            return None
+        
+        return {
+            'id': processed['id'],
+            'document': doc,
+            'metadata': self.compact_metadata(processed),
+            'details': {field: processed[field] for field in self.details_store.FIELDS},
+            'hash': digest,
+            'volatile_hash': volatile_digest,
+            'embed': embed,
+        }
+    
+    def upsert_batch(self, batch: List[Dict[str, Any]]):
+        """Écrit un lot : un seul appel d'embedding pour les contenus modifiés, métadonnées seules pour le reste"""
+        to_embed = [item for item in batch if item['embed']]
+        to_update = [item for item in batch if not item['embed']]
+        
+        if to_embed:
+            documents = [item['document'] for item in to_embed]
+            with self.stage('embed', len(to_embed)):
+                embeddings = self.embedding_function(documents)
+            with self.stage('upsert', len(to_embed)):
+                self.products_collection.upsert(
+                    ids=[item['id'] for item in to_embed],
+                    embeddings=embeddings,
+                    documents=documents,
+                    metadatas=[item['metadata'] for item in to_embed]
+                )
+                self.details_store.put_many({item['id']: item['details'] for item in to_embed})
+        
+        if to_update:
+            with self.stage('upsert', len(to_update)):
+                self.products_collection.update(
+                    ids=[item['id'] for item in to_update],
+                    metadatas=[item['metadata'] for item in to_update]
+                )
+        
+        if self.run:
+            self.run.counters['batches_embedded'] += 1 if to_embed else 0
+            self.run.counters['batches_upserted'] += 1
+        
+        self.state.hashes.update({item['id']: item['hash'] for item in batch})
+        self.state.volatile_hashes.update({item['id']: item['volatile_hash'] for item in batch})
+    
+    def refresh_stock(self):
+        """
+        Rafraîchissement rapide du stock et des prix.
+        
+        Ne récupère que id/stock/prix et met à jour les métadonnées des produits
+        déjà synchronisés dont ces champs ont changé, sans aucun embedding. Les
+        nouveaux produits attendent la prochaine synchro.
+        """
+        logger.info("Rafraîchissement du stock...")
+        fields = ",".join(("id",) + SyncState.VOLATILE_FIELDS)
+        seen = 0
+        updated = 0
+        
+        for page, products in self.fetcher.iter_pages("products", {"status": "any", "_fields": fields}):
+            ids = []
+            metadatas = []
+            for product in products:
+                product_id = str(product['id'])
+                seen += 1
+                if product_id not in self.state.hashes:
+                    continue
+                
+                volatile = self.volatile_fields(product)
+                digest = SyncState.volatile_hash(volatile)
+                if not self.state.has_volatile_changed(product_id, digest):
+                    continue
+                
+                ids.append(product_id)
+                metadatas.append(volatile)
+                self.state.volatile_hashes[product_id] = digest
+            
+            # Mise à jour partielle : ChromaDB fusionne les clés avec les métadonnées existantes
+            if ids:
+                self.products_collection.update(ids=ids, metadatas=metadatas)
+                updated += len(ids)
+            report_progress(page=page, total_pages=self.fetcher.last_total_pages, seen=seen, updated=updated)
+        
+        self.state.save()
+        if updated:
+            bump_catalog_version("stock")
+        logger.info(f"Stock rafraîchi: {updated} produits mis à jour sur {seen}")
+    
+    def reconcile_deletions(self, local_ids: Set[str], remote_ids: Set[str]):
+        """Supprime de ChromaDB les produits qui n'existent plus dans WooCommerce"""
+        deleted = sorted(local_ids - remote_ids)
+        
+        if deleted:
+            self.delete_products(deleted)
+            logger.info(f"{len(deleted)} produits supprimés de ChromaDB")
+    
+    def delete_products(self, product_ids: List[str]):
+        """Supprime des produits de ChromaDB, du store de détails et de l'état"""
+        self.products_collection.delete(ids=product_ids)
+        self.details_store.delete_many(product_ids)
+        for product_id in product_ids:
+            self.state.hashes.pop(product_id, None)
+            self.state.volatile_hashes.pop(product_id, None)
     
     def add_brewery_context(self):
         """Ajoute le contexte de la brasserie dans ChromaDB"""
@@ -282,12 +498,20 @@ class WooCommerceSyncer:
             }
         ]
         
+        # Rien à écrire si le contexte n'a pas changé (les caches restent valides)
+        existing = self.context_collection.get(ids=[c['id'] for c in contexts], include=['documents'])
+        current = dict(zip(existing['ids'], existing['documents']))
+        if all(current.get(c['id']) == c['text'] for c in contexts):
+            logger.info("Contexte de la brasserie inchangé")
+            return
+        
         # Ajouter au contexte
         self.context_collection.upsert(
             ids=[c['id'] for c in contexts],
             documents=[c['text'] for c in contexts],
             metadatas=[{'type': c['type']} for c in contexts]
         )
+        bump_catalog_version("context")
         
         logger.info("Contexte de la brasserie ajouté")
     
@@ -304,10 +528,35 @@ class WooCommerceSyncer:
 
 def main():
     """Fonction principale"""
+    parser = argparse.ArgumentParser(description="Synchronise WooCommerce avec ChromaDB")
+    parser.add_argument("--full", action="store_true",
+                        help="Synchro complète avec détection des suppressions")
+    parser.add_argument("--stock", action="store_true",
+                        help="Rafraîchit uniquement stock et prix (sans ré-embedding)")
+    parser.add_argument("--restart", action="store_true",
+                        help="Abandonne le run interrompu au lieu de le reprendre")
+    args = parser.parse_args()
+    
+    # Même verrou que les jobs lancés depuis l'interface : checkpoint et état partagés
+    try:
+        with target_lock('products'):
+            run_sync(args)
+    except JobAlreadyRunning as e:
+        logger.warning(f"{e} : run ignoré")
+
+def run_sync(args: argparse.Namespace):
+    """Synchro demandée en ligne de commande (verrou de la cible déjà pris)"""
+    if args.restart:
+        SyncRun.discard("products")
+    
     syncer = WooCommerceSyncer()
     
+    if args.stock:
+        syncer.refresh_stock()
+        return
+    
     # Synchroniser les produits
-    syncer.sync_products()
+    syncer.sync_products(full=args.full)
     
     # Ajouter le contexte
     syncer.add_brewery_context()
@@ -0,0 +1,71 @@
+"""
+Version du catalogue produits : un tampon sur disque incrémenté à chaque
+écriture dans ChromaDB (synchro, stock, webhooks, contexte) et surveillé par les caches
+en mémoire des autres processus (bot, interface).
+"""
+
+import json
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+
+def version_path() -> Path:
+    """Fichier du tampon de version"""
+    return Path(os.getenv("CATALOG_VERSION_FILE", "./data/catalog_version.json"))
+
+
+def read_catalog_version() -> Optional[str]:
+    """Version courante du catalogue (None si aucune synchro n'a encore écrit)"""
+    try:
+        return json.loads(version_path().read_text(encoding="utf-8"))['version']
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def bump_catalog_version(reason: str) -> str:
+    """Publie une nouvelle version du catalogue après une écriture dans ChromaDB"""
+    version = str(time.time_ns())
+    path = version_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + '.tmp')
+    tmp_path.write_text(json.dumps({
+        'version': version,
+        'reason': reason,
+        'updated_at': datetime.now().isoformat(timespec='seconds'),
+    }), encoding="utf-8")
+    os.replace(tmp_path, path)
+    return version
+
+
+class CatalogVersionWatcher:
+    """
+    Lit la version du catalogue à coût quasi nul : au plus un stat() du fichier
+    toutes les `check_interval` secondes, et une relecture seulement s'il a changé.
+    """
+
+    def __init__(self, check_interval: float = None):
+        self.check_interval = check_interval if check_interval is not None else \
+            float(os.getenv("CATALOG_VERSION_CHECK_SECONDS", "2"))
+        self._checked_at = 0.0
+        self._stamp = None
+        self._version: Optional[str] = None
+
+    def current(self) -> Optional[str]:
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return self._version
+        self._checked_at = now
+
+        try:
+            stat = os.stat(version_path())
+            stamp = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            stamp = None
+
+        if stamp != self._stamp:
+            self._stamp = stamp
+            self._version = read_catalog_version()
+        return self._version
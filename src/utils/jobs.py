@@ -0,0 +1,389 @@
+"""
+Jobs de synchronisation lancés depuis l'interface, hors du processus Streamlit
+
+Chaque job tourne dans son propre processus (`python -m src.utils.jobs run
+<type> <id>`) qui garde un verrou flock pendant toute sa durée : un seul run à
+la fois par cible (produits, commandes), même si plusieurs onglets cliquent en
+même temps. Les lancements en ligne de commande (cron) prennent le même verrou
+via `target_lock`. Dans JOBS_DIR :
+
+- `active/<id>.json` : état d'un job en cours, déplacé dans `archive/` à sa fin
+  (terminé, échoué, interrompu) pour que la liste des jobs actifs reste courte ;
+- `<id>.events.jsonl` : événements de progression (pages, produits embeddés, écrits) ;
+- `<id>.log` : sortie du processus ;
+- `history.jsonl` : un bilan par job terminé.
+
+Les états archivés, événements, logs et bilans plus vieux que
+JOBS_RETENTION_DAYS sont supprimés à chaque lancement de job.
+"""
+
+import argparse
+import fcntl
+import json
+import os
+import subprocess
+import sys
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+from src.utils.log_index import tail
+
+# Types de job : libellé et cible verrouillée (un seul run à la fois par cible)
+JOB_TYPES = {
+    'products': {'label': "Synchro des produits", 'lock': 'products'},
+    'products_full': {'label': "Synchro complète des produits", 'lock': 'products'},
+    'stock': {'label': "Rafraîchissement du stock", 'lock': 'products'},
+    'orders': {'label': "Synchro des commandes", 'lock': 'orders'},
+}
+
+ACTIVE_STATUSES = ('starting', 'running')
+
+# Fichier d'événements du job exécuté par ce processus (None hors d'un job)
+_events_path: Optional[Path] = None
+
+
+class JobAlreadyRunning(Exception):
+    """Un job de la même cible est déjà en cours"""
+
+
+def jobs_dir() -> Path:
+    """Répertoire des états, événements et historique des jobs"""
+    return Path(os.getenv("JOBS_DIR", "./data/jobs"))
+
+
+def retention_days() -> float:
+    """Durée de conservation des jobs terminés (0 : illimitée)"""
+    return float(os.getenv("JOBS_RETENTION_DAYS", "30"))
+
+
+def report_progress(**data: Any):
+    """Publie un événement de progression du job en cours (sans effet hors d'un job)"""
+    if _events_path is None:
+        return
+    with open(_events_path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps({'at': time.time(), **data}, ensure_ascii=False) + '\n')
+
+
+def _pid_alive(pid: int) -> bool:
+    # Un job lancé par ce processus reste zombie tant qu'il n'est pas récupéré
+    try:
+        if os.waitpid(pid, os.WNOHANG)[0] == pid:
+            return False
+    except ChildProcessError:
+        pass
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _write_json(path: Path, data: Dict[str, Any]):
+    tmp_path = path.with_suffix(path.suffix + '.tmp')
+    tmp_path.write_text(json.dumps(data, ensure_ascii=False), encoding='utf-8')
+    os.replace(tmp_path, path)
+
+
+def _try_lock(target: str, wait: bool = False) -> Optional[int]:
+    """Descripteur du verrou de la cible, None s'il est déjà pris (ou attente de sa libération avec wait)"""
+    root = jobs_dir()
+    root.mkdir(parents=True, exist_ok=True)
+    fd = os.open(root / f"{target}.lock", os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX if wait else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return fd
+    except BlockingIOError:
+        os.close(fd)
+        return None
+
+
+def _release(fd: int):
+    fcntl.flock(fd, fcntl.LOCK_UN)
+    os.close(fd)
+
+
+@contextmanager
+def target_lock(target: str, wait: bool = False):
+    """
+    Verrou d'une cible pour un run lancé hors de JobRunner (ligne de commande,
+    cron, webhooks). Avec wait, attend la fin du run en cours au lieu d'échouer.
+    """
+    fd = _try_lock(target, wait)
+    if fd is None:
+        raise JobAlreadyRunning(f"Une synchro « {target} » est déjà en cours")
+    try:
+        yield
+    finally:
+        _release(fd)
+
+
+def execute(job_type: str):
+    """Exécute la synchro correspondant au type de job"""
+    if job_type in ('products', 'products_full'):
+        from src.sync_woocommerce import WooCommerceSyncer
+        syncer = WooCommerceSyncer()
+        syncer.sync_products(full=job_type == 'products_full')
+        syncer.add_brewery_context()
+    elif job_type == 'stock':
+        from src.sync_woocommerce import WooCommerceSyncer
+        WooCommerceSyncer().refresh_stock()
+    elif job_type == 'orders':
+        from src.sync_orders import OrderSyncer
+        OrderSyncer().sync_orders()
+    else:
+        raise ValueError(f"Type de job inconnu: {job_type}")
+
+
+class JobRunner:
+    """Lance les jobs en arrière-plan et lit leur état, leur progression et l'historique"""
+
+    def __init__(self, root: str = None):
+        self.root = Path(root) if root else jobs_dir()
+        self.active_dir = self.root / 'active'
+        self.archive_dir = self.root / 'archive'
+        self.active_dir.mkdir(parents=True, exist_ok=True)
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+
+    def _record_path(self, job_id: str) -> Path:
+        return self.active_dir / f"{job_id}.json"
+
+    def _finish(self, job: Dict[str, Any]):
+        """Archive l'état d'un job terminé et ajoute son bilan à l'historique"""
+        _write_json(self.archive_dir / f"{job['job_id']}.json", job)
+        self._record_path(job['job_id']).unlink(missing_ok=True)
+        self._append_history(job)
+
+    def is_running(self, job_type: str) -> bool:
+        """Un job de la même cible tient-il le verrou ?"""
+        fd = _try_lock(JOB_TYPES[job_type]['lock'])
+        if fd is None:
+            return True
+        _release(fd)
+        return False
+
+    def start(self, job_type: str) -> str:
+        """Lance un job dans un processus détaché et renvoie son id"""
+        if job_type not in JOB_TYPES:
+            raise ValueError(f"Type de job inconnu: {job_type}")
+        if self.is_running(job_type) or any(
+            JOB_TYPES[job['job_type']]['lock'] == JOB_TYPES[job_type]['lock'] for job in self.active()
+        ):
+            raise JobAlreadyRunning(f"{JOB_TYPES[job_type]['label']} : un job est déjà en cours")
+        self.prune()
+
+        job_id = f"{datetime.now():%Y%m%d-%H%M%S}-{job_type}-{uuid.uuid4().hex[:6]}"
+        record = {
+            'job_id': job_id,
+            'job_type': job_type,
+            'label': JOB_TYPES[job_type]['label'],
+            'status': 'starting',
+            'pid': None,
+            'requested_at': datetime.now().isoformat(timespec='seconds'),
+            'started_at': None,
+            'finished_at': None,
+            'duration': None,
+            'error': None,
+        }
+        _write_json(self._record_path(job_id), record)
+
+        with open(self.root / f"{job_id}.log", 'ab') as log:
+            process = subprocess.Popen(
+                [sys.executable, '-m', 'src.utils.jobs', 'run', job_type, job_id],
+                cwd=str(Path(__file__).resolve().parents[2]),
+                env={**os.environ, 'JOBS_DIR': str(self.root.resolve())},
+                stdout=log, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL,
+                start_new_session=True,
+            )
+        record['pid'] = process.pid
+        _write_json(self._record_path(job_id), record)
+        return job_id
+
+    def job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """État d'un job, en cours ou archivé"""
+        for path in (self._record_path(job_id), self.archive_dir / f"{job_id}.json"):
+            try:
+                return json.loads(path.read_text(encoding='utf-8'))
+            except (OSError, ValueError):
+                continue
+        return None
+
+    def active(self) -> List[Dict[str, Any]]:
+        """Jobs en cours ; un job dont le processus a disparu est marqué interrompu"""
+        jobs = []
+        for path in self.active_dir.glob('*.json'):
+            try:
+                job = json.loads(path.read_text(encoding='utf-8'))
+            except (OSError, ValueError):
+                continue
+            if job.get('status') not in ACTIVE_STATUSES:
+                continue
+            if job.get('pid') and not _pid_alive(job['pid']):
+                # Relecture : le job a pu se terminer entre-temps
+                job = self.job(job['job_id']) or job
+                if job['status'] in ACTIVE_STATUSES:
+                    job.update(status='interrupted', finished_at=datetime.now().isoformat(timespec='seconds'))
+                    self._finish(job)
+                continue
+            jobs.append(job)
+        return sorted(jobs, key=lambda job: job['requested_at'])
+
+    def progress(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Dernier événement de progression d'un job (lecture de la fin du fichier seulement)"""
+        path = self.root / f"{job_id}.events.jsonl"
+        try:
+            with open(path, 'rb') as f:
+                f.seek(0, os.SEEK_END)
+                size = f.tell()
+                f.seek(max(0, size - 4096))
+                lines = f.read().splitlines()
+        except OSError:
+            return None
+        for line in reversed(lines):
+            try:
+                return json.loads(line)
+            except ValueError:
+                continue
+        return None
+
+    def log_tail(self, job_id: str, lines: int = 20) -> List[str]:
+        """Dernières lignes de la sortie d'un job (vide si le log a été purgé)"""
+        try:
+            return tail(self.root / f"{job_id}.log", lines)
+        except OSError:
+            return []
+
+    def history(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """Derniers jobs terminés, du plus récent au plus ancien"""
+        try:
+            lines = (self.root / 'history.jsonl').read_text(encoding='utf-8').splitlines()
+        except OSError:
+            return []
+        entries = []
+        for line in reversed(lines):
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                continue
+            if len(entries) >= limit:
+                break
+        return entries
+
+    def _append_history(self, job: Dict[str, Any]):
+        with target_lock('history', wait=True):
+            with open(self.root / 'history.jsonl', 'a', encoding='utf-8') as f:
+                f.write(json.dumps(job, ensure_ascii=False) + '\n')
+
+    def prune(self) -> int:
+        """Supprime les états archivés, événements, logs et bilans plus vieux que la rétention"""
+        days = retention_days()
+        if days <= 0:
+            return 0
+        cutoff = time.time() - days * 86400
+        running = {path.stem for path in self.active_dir.glob('*.json')}
+        removed = 0
+        # Les *.json à la racine sont des états écrits avant l'archivage
+        for pattern in ('archive/*.json', '*.json', '*.events.jsonl', '*.log'):
+            for path in self.root.glob(pattern):
+                if path.name.split('.')[0] in running:
+                    continue
+                try:
+                    if path.stat().st_mtime < cutoff:
+                        path.unlink()
+                        removed += 1
+                except OSError:
+                    continue
+
+        # Sous verrou : un job peut ajouter son bilan pendant la réécriture
+        history_path = self.root / 'history.jsonl'
+        with target_lock('history', wait=True):
+            try:
+                lines = history_path.read_text(encoding='utf-8').splitlines()
+            except OSError:
+                lines = []
+            kept = [line for line in lines if self._finished_after(line, cutoff)]
+            if len(kept) < len(lines):
+                tmp_path = history_path.with_suffix('.jsonl.tmp')
+                tmp_path.write_text(''.join(line + '\n' for line in kept), encoding='utf-8')
+                os.replace(tmp_path, history_path)
+        return removed
+
+    @staticmethod
+    def _finished_after(line: str, cutoff: float) -> bool:
+        try:
+            finished_at = json.loads(line).get('finished_at')
+            return datetime.fromisoformat(finished_at).timestamp() >= cutoff
+        except (ValueError, TypeError, AttributeError):
+            return False
+
+    def run(self, job_type: str, job_id: str):
+        """Exécute le job dans ce processus (appelé par le processus lancé par start)"""
+        global _events_path
+        path = self._record_path(job_id)
+        job = self.job(job_id) or {'job_id': job_id, 'job_type': job_type,
+                                   'label': JOB_TYPES[job_type]['label'], 'error': None}
+        job['pid'] = os.getpid()
+
+        fd = _try_lock(JOB_TYPES[job_type]['lock'])
+        if fd is None:
+            job.update(status='skipped', error="Un job de la même cible est déjà en cours",
+                       finished_at=datetime.now().isoformat(timespec='seconds'))
+            self._finish(job)
+            return
+
+        start = time.perf_counter()
+        job.update(status='running', started_at=datetime.now().isoformat(timespec='seconds'))
+        _write_json(path, job)
+        _events_path = self.root / f"{job_id}.events.jsonl"
+        try:
+            execute(job_type)
+            job['status'] = 'completed'
+        except Exception as e:
+            job.update(status='failed', error=str(e))
+            raise
+        finally:
+            _events_path = None
+            job.update(finished_at=datetime.now().isoformat(timespec='seconds'),
+                       duration=round(time.perf_counter() - start, 1),
+                       last_progress=self.progress(job_id))
+            self._finish(job)
+            _release(fd)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Jobs de synchronisation en arrière-plan")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    start_parser = subparsers.add_parser("start", help="Lance un job en arrière-plan")
+    start_parser.add_argument("job_type", choices=list(JOB_TYPES))
+    run_parser = subparsers.add_parser("run", help="Exécute un job (processus lancé par start)")
+    run_parser.add_argument("job_type", choices=list(JOB_TYPES))
+    run_parser.add_argument("job_id")
+    subparsers.add_parser("history", help="Affiche les derniers jobs")
+    subparsers.add_parser("prune", help="Supprime les jobs plus vieux que JOBS_RETENTION_DAYS")
+    args = parser.parse_args()
+
+    runner = JobRunner()
+    if args.command == "start":
+        print(runner.start(args.job_type))
+    elif args.command == "run":
+        runner.run(args.job_type, args.job_id)
+    elif args.command == "prune":
+        print(f"{runner.prune()} fichiers supprimés")
+    else:
+        for job in runner.history():
+            print(f"{job.get('started_at') or job.get('requested_at')}  {job['label']:32} {job['status']:11} "
+                  f"{job.get('duration') or 0:7.1f}s  {job.get('error') or ''}")
+
+
+if __name__ == "__main__":
+    # Sous `python -m`, ce fichier est __main__ : passer par le module importé
+    # pour que report_progress (appelé par les syncers) voie le job en cours
+    from src.utils.jobs import main
+    main()
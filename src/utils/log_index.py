@@ -0,0 +1,336 @@
+"""
+Lecture des logs loguru de tous les composants, archives de rotation comprises,
+sans relire les fichiers en entier
+
+Chaque fichier est découpé en blocs d'environ LOG_INDEX_BLOCK_BYTES octets,
+coupés entre deux enregistrements. Un index sur disque (LOG_INDEX_DIR) garde
+pour chaque bloc son offset, l'heure du premier et du dernier enregistrement et
+les niveaux présents, ainsi que l'offset de chaque avertissement ou erreur : une
+recherche par période ne lit que les blocs de la période, et une recherche
+d'avertissements ou d'erreurs ne lit que ces enregistrements. Les archives ne
+changent plus et ne sont indexées qu'une fois ; le fichier actif est indexé au
+fil de sa croissance.
+"""
+
+import json
+import os
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Composants : nom affiché -> nom du fichier de log (sans .log)
+COMPONENTS = {
+    'sync': 'sync_woocommerce',
+    'bot': 'telegram_bot',
+    'webhooks': 'woocommerce_webhooks',
+    'orders': 'sync_orders',
+    'query': 'query_service',
+}
+
+LEVELS = ('TRACE', 'DEBUG', 'INFO', 'SUCCESS', 'WARNING', 'ERROR', 'CRITICAL')
+LEVEL_BITS = {level: 1 << i for i, level in enumerate(LEVELS)}
+
+# Niveaux rares dont chaque enregistrement est indexé
+MARKED_LEVELS = ('WARNING', 'ERROR', 'CRITICAL')
+
+INDEX_VERSION = 1
+
+# Format par défaut de loguru : "2024-05-01 12:00:00.123 | INFO     | module:fonction:12 - message"
+HEADER_RE = re.compile(rb'^(\d{4})-(\d\d)-(\d\d) (\d\d):(\d\d):(\d\d)\.(\d{3}) \| (\w+)\s*\| (.*?) - (.*)$')
+
+
+@dataclass
+class LogRecord:
+    time: datetime
+    level: str
+    component: str
+    source: str
+    message: str
+
+
+def log_dir() -> Path:
+    return Path(os.getenv("LOG_DIR", "./data/logs"))
+
+
+def index_dir() -> Path:
+    return Path(os.getenv("LOG_INDEX_DIR", str(log_dir() / ".index")))
+
+
+def block_bytes() -> int:
+    """Taille visée d'un bloc d'index"""
+    return int(os.getenv("LOG_INDEX_BLOCK_BYTES", str(64 * 1024)))
+
+
+def log_files(component: str) -> List[Path]:
+    """Archives de rotation puis fichier actif d'un composant, du plus ancien au plus récent"""
+    stem = COMPONENTS[component]
+    root = log_dir()
+    archives = sorted(root.glob(f"{stem}.*.log"), key=lambda path: path.stat().st_mtime)
+    active = root / f"{stem}.log"
+    return archives + ([active] if active.exists() else [])
+
+
+@lru_cache(maxsize=4096)
+def _minute_timestamp(year: bytes, month: bytes, day: bytes, hour: bytes, minute: bytes) -> float:
+    return datetime(int(year), int(month), int(day), int(hour), int(minute)).timestamp()
+
+
+def _header(line: bytes) -> Optional[Tuple[float, str]]:
+    """(horodatage, niveau) si la ligne commence un enregistrement"""
+    if not line[:1].isdigit():
+        return None
+    match = HEADER_RE.match(line)
+    if match is None:
+        return None
+    timestamp = _minute_timestamp(*match.group(1, 2, 3, 4, 5)) + int(match.group(6)) + int(match.group(7)) / 1000
+    return timestamp, match.group(8).decode('ascii')
+
+
+def tail(path: Path, lines: int = 20, chunk_size: int = 8192) -> List[str]:
+    """Dernières lignes d'un fichier, en lisant à reculons depuis la fin"""
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        data = b''
+        while position > 0 and data.count(b'\n') <= lines:
+            step = min(chunk_size, position)
+            position -= step
+            f.seek(position)
+            data = f.read(step) + data
+    return [line.decode('utf-8', errors='replace') for line in data.splitlines()[-lines:]]
+
+
+class LogIndex:
+    """
+    Index d'un fichier de log : blocs [offset, fin, premier ts, dernier ts,
+    niveaux] et, par niveau rare, enregistrements [offset, ts]
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.index_path = index_dir() / f"{path.name}.idx.json"
+        self.inode = None
+        self.size = 0
+        self.blocks: List[list] = []
+        self.marks: Dict[str, List[list]] = {level: [] for level in MARKED_LEVELS}
+
+    def _load(self, index_path: Path) -> bool:
+        try:
+            data = json.loads(index_path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return False
+        if data.get('version') != INDEX_VERSION:
+            return False
+        self.inode, self.size, self.blocks, self.marks = data['inode'], data['size'], data['blocks'], data['marks']
+        return True
+
+    def _save(self):
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.index_path.with_suffix('.tmp')
+        tmp_path.write_text(json.dumps({
+            'version': INDEX_VERSION, 'inode': self.inode, 'size': self.size,
+            'blocks': self.blocks, 'marks': self.marks,
+        }), encoding='utf-8')
+        os.replace(tmp_path, self.index_path)
+
+    def refresh(self) -> 'LogIndex':
+        """Met l'index à jour : rien si le fichier n'a pas bougé, sinon indexe la fin"""
+        stat = self.path.stat()
+        if self.inode == stat.st_ino and self.size == stat.st_size:
+            return self
+        if (self.inode is None and not self._load(self.index_path)) or self.inode != stat.st_ino:
+            # Archive fraîchement renommée : reprendre l'index de l'ancien fichier actif
+            active_index = index_dir() / f"{self.path.name.split('.', 1)[0]}.log.idx.json"
+            if not (active_index != self.index_path and self._load(active_index) and self.inode == stat.st_ino):
+                self._reset(stat.st_ino)
+        if stat.st_size < self.size:
+            self._reset(stat.st_ino)
+        if stat.st_size == self.size and self.index_path.exists():
+            return self
+
+        # Le dernier bloc a pu être coupé en cours d'écriture : il est réindexé
+        start = self.blocks.pop()[0] if self.blocks else 0
+        for level in MARKED_LEVELS:
+            self.marks[level] = [mark for mark in self.marks[level] if mark[0] < start]
+        self._index_from(start, stat.st_size)
+        self._save()
+        return self
+
+    def _reset(self, inode: int):
+        self.inode, self.size, self.blocks = inode, 0, []
+        self.marks = {level: [] for level in MARKED_LEVELS}
+
+    def _index_from(self, start: int, end: int):
+        max_block = block_bytes()
+        with open(self.path, 'rb') as f:
+            f.seek(start)
+            offset = start
+            block = None
+            for line in f:
+                if offset >= end:
+                    break
+                header = _header(line)
+                if header is not None:
+                    timestamp, level = header
+                    if block is None or offset - block[0] >= max_block:
+                        if block is not None:
+                            block[1] = offset
+                            self.blocks.append(block)
+                        block = [offset, offset, timestamp, timestamp, 0]
+                    block[3] = timestamp
+                    block[4] |= LEVEL_BITS.get(level, 0)
+                    if level in self.marks:
+                        self.marks[level].append([offset, timestamp])
+                elif block is None:
+                    # Début de fichier sans en-tête (suite d'une trace) : bloc sans horodatage
+                    block = [offset, offset, 0.0, 0.0, 0]
+                offset += len(line)
+            if block is not None:
+                block[1] = offset
+                self.blocks.append(block)
+        self.size = offset
+
+    def candidate_blocks(self, since: float = None, until: float = None, level_mask: int = None) -> List[list]:
+        """Blocs qui peuvent contenir des enregistrements de la période et des niveaux demandés"""
+        return [
+            block for block in self.blocks
+            if (since is None or block[3] >= since)
+            and (until is None or block[2] <= until)
+            and (level_mask is None or block[4] & level_mask)
+        ]
+
+    def candidate_marks(self, levels: Iterable[str], since: float = None, until: float = None) -> List[list]:
+        """Offsets des enregistrements des niveaux rares demandés, dans la période, dans l'ordre du fichier"""
+        return sorted(
+            mark for level in levels for mark in self.marks[level]
+            if (since is None or mark[1] >= since) and (until is None or mark[1] <= until)
+        )
+
+
+# Index déjà chargés dans ce processus, par fichier
+_indexes: Dict[Path, LogIndex] = {}
+
+
+def get_index(path: Path) -> LogIndex:
+    """Index à jour d'un fichier, gardé en mémoire entre deux recherches"""
+    if path not in _indexes:
+        _indexes[path] = LogIndex(path)
+    return _indexes[path].refresh()
+
+
+def _parse(match, component: str) -> Tuple[float, LogRecord]:
+    year, month, day, hour, minute, second, ms = (int(value) for value in match.groups()[:7])
+    moment = datetime(year, month, day, hour, minute, second, ms * 1000)
+    return moment.timestamp(), LogRecord(
+        time=moment,
+        level=match.group(8).decode('ascii'),
+        component=component,
+        source=match.group(9).decode('utf-8', errors='replace'),
+        message=match.group(10).decode('utf-8', errors='replace'),
+    )
+
+
+def _read_records(path: Path, block: list, component: str) -> List[Tuple[float, LogRecord]]:
+    """Enregistrements d'un bloc, lignes de suite (traces) rattachées à leur enregistrement"""
+    with open(path, 'rb') as f:
+        f.seek(block[0])
+        data = f.read(block[1] - block[0])
+    records = []
+    for line in data.splitlines():
+        match = HEADER_RE.match(line) if line[:1].isdigit() else None
+        if match is None:
+            if records:
+                records[-1][1].message += '\n' + line.decode('utf-8', errors='replace')
+            continue
+        records.append(_parse(match, component))
+    return records
+
+
+def _read_record(f, offset: int, component: str, max_bytes: int = 64 * 1024) -> Optional[Tuple[float, LogRecord]]:
+    """Un enregistrement à partir de son offset, avec ses lignes de suite"""
+    f.seek(offset)
+    first = f.readline()
+    match = HEADER_RE.match(first)
+    if match is None:
+        return None
+    timestamp, record = _parse(match, component)
+    read = len(first)
+    for line in f:
+        read += len(line)
+        if _header(line) is not None or read > max_bytes:
+            break
+        record.message += '\n' + line.rstrip(b'\r\n').decode('utf-8', errors='replace')
+    return timestamp, record
+
+
+def search(components: Iterable[str] = None, levels: Iterable[str] = None,
+           since: datetime = None, until: datetime = None, contains: str = None,
+           limit: int = 100) -> List[LogRecord]:
+    """
+    Enregistrements les plus récents correspondant aux filtres, tous composants
+    et archives confondus, du plus récent au plus ancien
+    """
+    components = list(components or COMPONENTS)
+    levels = set(levels) if levels else None
+    since_ts = since.timestamp() if since else None
+    until_ts = until.timestamp() if until else None
+    needle = contains.lower() if contains else None
+
+    streams = [_iter_component(component, since_ts, until_ts, levels) for component in components]
+    results = []
+    for timestamp, record in _merge_newest_first(streams):
+        if since_ts is not None and timestamp < since_ts:
+            break
+        if until_ts is not None and timestamp > until_ts:
+            continue
+        if levels and record.level not in levels:
+            continue
+        if needle and needle not in record.message.lower():
+            continue
+        results.append(record)
+        if len(results) >= limit:
+            break
+    return results
+
+
+def _iter_component(component: str, since: float, until: float,
+                    levels: Optional[set]) -> Iterator[Tuple[float, LogRecord]]:
+    """
+    Enregistrements d'un composant du plus récent au plus ancien : seulement
+    les enregistrements indexés pour les niveaux rares, sinon les blocs candidats
+    """
+    level_mask = sum(LEVEL_BITS[level] for level in levels) if levels else None
+    for path in reversed(log_files(component)):
+        try:
+            index = get_index(path)
+        except FileNotFoundError:
+            continue
+        if levels and levels.issubset(MARKED_LEVELS):
+            with open(path, 'rb') as f:
+                for offset, _ in reversed(index.candidate_marks(levels, since, until)):
+                    record = _read_record(f, offset, component)
+                    if record is not None:
+                        yield record
+            continue
+        for block in reversed(index.candidate_blocks(since, until, level_mask)):
+            yield from reversed(_read_records(path, block, component))
+
+
+def _merge_newest_first(streams: List[Iterator[Tuple[float, LogRecord]]]) -> Iterator[Tuple[float, LogRecord]]:
+    """Fusionne des flux déjà triés du plus récent au plus ancien"""
+    heads: Dict[int, Tuple[float, LogRecord]] = {}
+    for i, stream in enumerate(streams):
+        head = next(stream, None)
+        if head is not None:
+            heads[i] = head
+    while heads:
+        i = max(heads, key=lambda key: heads[key][0])
+        yield heads[i]
+        head = next(streams[i], None)
+        if head is None:
+            del heads[i]
+        else:
+            heads[i] = head
@@ -0,0 +1,18 @@
+"""
+Utilitaires pour les pipelines en flux (générateurs)
+"""
+
+from itertools import islice
+from typing import Iterable, Iterator, List, TypeVar
+
+T = TypeVar('T')
+
+
+def batched(iterable: Iterable[T], size: int) -> Iterator[List[T]]:
+    """Découpe un itérable en lots de `size` éléments (le dernier peut être plus court)"""
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
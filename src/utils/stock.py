@@ -0,0 +1,49 @@
+"""
+Lecture du stock des métadonnées produits
+
+Un produit dont WooCommerce ne gère pas le stock n'a pas de quantité : il est
+enregistré avec manage_stock=False (et stock_quantity=0, ChromaDB refusant les
+valeurs nulles) et sa disponibilité vient alors de stock_status.
+"""
+
+from typing import Any, Dict
+
+# Statuts WooCommerce d'un produit commandable
+AVAILABLE_STATUSES = ('instock', 'onbackorder')
+
+
+def to_number(value: Any, cast=float):
+    """Convertit un nombre de l'API (souvent une chaîne, parfois vide ou None)"""
+    try:
+        return cast(float(value))
+    except (TypeError, ValueError):
+        return cast(0)
+
+
+def stock_managed(metadata: Dict[str, Any]) -> bool:
+    """Le stock du produit est-il suivi en quantité ?"""
+    if 'manage_stock' in metadata:
+        return bool(metadata['manage_stock'])
+    # Métadonnées d'avant le drapeau : quantité vide quand le stock n'était pas géré
+    return metadata.get('stock_quantity') not in (None, '')
+
+
+def stock_quantity(metadata: Dict[str, Any]) -> int:
+    """Quantité en stock (0 si non gérée ou illisible)"""
+    return to_number(metadata.get('stock_quantity'), int) if stock_managed(metadata) else 0
+
+
+def is_in_stock(metadata: Dict[str, Any]) -> bool:
+    """Disponibilité : quantité positive si le stock est géré, sinon d'après stock_status"""
+    if metadata.get('stock_status') == 'outofstock':
+        return False
+    if not stock_managed(metadata):
+        return metadata.get('stock_status') in AVAILABLE_STATUSES
+    return stock_quantity(metadata) > 0
+
+
+def stock_label(metadata: Dict[str, Any]):
+    """Quantité à afficher, ou « non suivi (statut) » quand le stock n'est pas géré"""
+    if stock_managed(metadata):
+        return metadata.get('stock_quantity')
+    return f"non suivi ({metadata.get('stock_status', 'unknown')})"
@@ -0,0 +1,198 @@
+"""
+Runs de synchronisation avec checkpoint sur disque, reprise et bilan par étape
+"""
+
+import json
+import os
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+from loguru import logger
+
+STAGES = ('fetch', 'classify', 'embed', 'upsert')
+
+
+def runs_dir() -> Path:
+    """Répertoire des checkpoints et bilans de synchro"""
+    return Path(os.getenv("SYNC_RUNS_DIR", "./data/sync_runs"))
+
+
+def load_last_summary(job_type: str = "products") -> Optional[Dict[str, Any]]:
+    """Bilan du dernier run terminé (ou échoué) d'un type de job"""
+    path = runs_dir() / f"{job_type}.last_summary.json"
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+class SyncRun:
+    """
+    Un run de synchro enregistré comme job.
+
+    Le checkpoint contient les paramètres du run (mode, watermark de départ),
+    la dernière page entièrement écrite et les compteurs par étape. Les ids
+    récupérés sont ajoutés page par page dans un fichier à part, pour que le
+    coût d'écriture d'un checkpoint ne croisse pas avec le catalogue. S'il
+    existe un checkpoint non terminé pour ce type de job, le run suivant le
+    reprend (avec ses paramètres d'origine) au lieu de repartir de zéro.
+    """
+
+    # Paramètres propres à chaque lancement, ignorés pour détecter un changement
+    VOLATILE_PARAMS = ('started_at',)
+
+    def __init__(self, job_type: str, params: Dict[str, Any]):
+        self.job_type = job_type
+        self.run_id = uuid.uuid4().hex[:12]
+        self.params = params
+        self.status = 'running'
+        self.error: Optional[str] = None
+        self.started_at = datetime.now().isoformat(timespec='seconds')
+        self.finished_at: Optional[str] = None
+        self.attempts = 1
+        self.committed_page = 0
+        self.remote_ids: set = set()
+        self.stages = {stage: {'seconds': 0.0, 'items': 0} for stage in STAGES}
+        self.counters = {'pages_fetched': 0, 'batches_embedded': 0, 'batches_upserted': 0}
+
+    @property
+    def checkpoint_path(self) -> Path:
+        return runs_dir() / f"{self.job_type}.checkpoint.json"
+
+    @property
+    def ids_path(self) -> Path:
+        return runs_dir() / f"{self.job_type}.remote_ids"
+
+    @property
+    def resumed(self) -> bool:
+        return self.attempts > 1
+
+    @classmethod
+    def start_or_resume(cls, job_type: str, params: Dict[str, Any]) -> "SyncRun":
+        """Reprend le run interrompu de ce type s'il existe, sinon en démarre un avec `params`"""
+        run = cls(job_type, params)
+        try:
+            data = json.loads(run.checkpoint_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            run.ids_path.unlink(missing_ok=True)
+            run.checkpoint()
+            return run
+
+        changed = {
+            key: value for key, value in params.items()
+            if key not in cls.VOLATILE_PARAMS and data['params'].get(key) != value
+        }
+        if changed:
+            logger.warning(f"Reprise du run {job_type} {data['run_id']} avec ses paramètres d'origine : "
+                           f"nouveaux paramètres ignorés {changed} (--restart pour repartir de zéro)")
+
+        run.run_id = data['run_id']
+        run.params = data['params']
+        run.started_at = data['started_at']
+        run.attempts = data.get('attempts', 1) + 1
+        run.committed_page = data.get('committed_page', 0)
+        run.remote_ids = set(data.get('remote_ids', [])) | run._read_ids()
+        run.stages = data.get('stages', run.stages)
+        run.counters = data.get('counters', run.counters)
+        run.checkpoint()
+        return run
+
+    @classmethod
+    def discard(cls, job_type: str):
+        """Abandonne le run interrompu de ce type : le prochain repartira de zéro"""
+        (runs_dir() / f"{job_type}.checkpoint.json").unlink(missing_ok=True)
+        (runs_dir() / f"{job_type}.remote_ids").unlink(missing_ok=True)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'run_id': self.run_id,
+            'job_type': self.job_type,
+            'params': self.params,
+            'status': self.status,
+            'error': self.error,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'attempts': self.attempts,
+            'committed_page': self.committed_page,
+            'stages': self.stages,
+            'counters': self.counters,
+        }
+
+    def _read_ids(self) -> set:
+        try:
+            with open(self.ids_path, encoding="utf-8") as f:
+                return {line.rstrip("\n") for line in f if line.strip()}
+        except OSError:
+            return set()
+
+    def _write(self, path: Path, data: Dict[str, Any]):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(path.suffix + '.tmp')
+        tmp_path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp_path, path)
+
+    def checkpoint(self):
+        """Écrit le checkpoint de manière atomique"""
+        self._write(self.checkpoint_path, self.to_dict())
+
+    def commit_page(self, page: int, ids: Iterable[str] = ()):
+        """Marque une page comme entièrement écrite dans ChromaDB, avec les ids qu'elle contenait"""
+        ids = list(ids)
+        if ids:
+            # Ids d'abord : une page relue après coupure ne fait que les réécrire
+            self.ids_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.ids_path, "a", encoding="utf-8") as f:
+                f.write("".join(f"{product_id}\n" for product_id in ids))
+                f.flush()
+                os.fsync(f.fileno())
+            self.remote_ids.update(ids)
+        self.committed_page = page
+        self.checkpoint()
+
+    @contextmanager
+    def stage(self, name: str, items: int = 0):
+        """Chronomètre une étape et compte les éléments traités"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name]['seconds'] += time.perf_counter() - start
+            self.stages[name]['items'] += items
+
+    def timed_pages(self, pages: Iterable[Tuple[int, list]]) -> Iterator[Tuple[int, list]]:
+        """Enveloppe un flux de pages en chronométrant l'attente de chaque page"""
+        iterator = iter(pages)
+        while True:
+            with self.stage('fetch'):
+                try:
+                    page, items = next(iterator)
+                except StopIteration:
+                    return
+            self.stages['fetch']['items'] += len(items)
+            self.counters['pages_fetched'] += 1
+            yield page, items
+
+    def summary(self) -> Dict[str, Any]:
+        """Bilan du run"""
+        return self.to_dict()
+
+    def _finish(self, status: str):
+        self.status = status
+        self.finished_at = datetime.now().isoformat(timespec='seconds')
+        self._write(runs_dir() / f"{self.job_type}.last_summary.json", self.summary())
+
+    def complete(self):
+        """Termine le run avec succès et supprime le checkpoint"""
+        self._finish('completed')
+        self.checkpoint_path.unlink(missing_ok=True)
+        self.ids_path.unlink(missing_ok=True)
+
+    def fail(self, error: Exception):
+        """Termine le run en échec en gardant le checkpoint pour la reprise"""
+        self.error = str(error)
+        self._finish('failed')
+        self.checkpoint()
@@ -0,0 +1,131 @@
+"""
+État persistant de la synchronisation WooCommerce (watermark et empreintes)
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+
+class SyncState:
+    """Watermark de la dernière synchro et empreinte du contenu de chaque produit"""
+
+    # Champs qui changent à chaque synchro sans que le produit ait changé
+    IGNORED_FIELDS = ('last_sync',)
+
+    # Champs volatils : stockés en métadonnées seulement, jamais embeddés
+    VOLATILE_FIELDS = ('price', 'stock_quantity', 'stock_status', 'manage_stock')
+
+    def __init__(self, path: str = None):
+        self.path = Path(path or os.getenv("SYNC_STATE_FILE", "./data/sync_state.json"))
+        self.last_sync: Optional[str] = None
+        self.last_full_reconcile: Optional[str] = None
+        self.hashes: Dict[str, str] = {}
+        self.volatile_hashes: Dict[str, str] = {}
+        # Version du schéma des métadonnées écrit avec ces empreintes
+        self.metadata_layout = 1
+        self.load()
+
+    def load(self):
+        """Charge l'état depuis le disque (état vide si absent ou illisible)"""
+        if not self.path.exists():
+            return
+
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+
+        self.last_sync = data.get('last_sync')
+        self.last_full_reconcile = data.get('last_full_reconcile')
+        self.hashes = data.get('hashes', {})
+        self.volatile_hashes = data.get('volatile_hashes', {})
+        self.metadata_layout = data.get('metadata_layout', 1)
+
+    def save(self):
+        """Écrit l'état de manière atomique"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + '.tmp')
+        tmp_path.write_text(json.dumps({
+            'last_sync': self.last_sync,
+            'last_full_reconcile': self.last_full_reconcile,
+            'hashes': self.hashes,
+            'volatile_hashes': self.volatile_hashes,
+            'metadata_layout': self.metadata_layout,
+        }, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp_path, self.path)
+
+    @classmethod
+    def content_hash(cls, document: str, metadata: Dict[str, Any]) -> str:
+        """Empreinte du document et des métadonnées stables d'un produit"""
+        excluded = cls.IGNORED_FIELDS + cls.VOLATILE_FIELDS
+        stable = {k: v for k, v in metadata.items() if k not in excluded}
+        payload = document + json.dumps(stable, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @classmethod
+    def volatile_hash(cls, metadata: Dict[str, Any]) -> str:
+        """Empreinte des champs volatils (stock, prix) d'un produit"""
+        volatile = {k: metadata.get(k) for k in cls.VOLATILE_FIELDS}
+        payload = json.dumps(volatile, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def has_changed(self, product_id: str, digest: str) -> bool:
+        """Indique si l'empreinte d'un produit diffère de celle enregistrée"""
+        return self.hashes.get(product_id) != digest
+
+    def has_volatile_changed(self, product_id: str, digest: str) -> bool:
+        """Indique si le stock ou le prix d'un produit a changé"""
+        return self.volatile_hashes.get(product_id) != digest
+
+    def needs_full_reconcile(self, interval_hours: float) -> bool:
+        """Indique si une réconciliation complète est due"""
+        if not self.last_sync or not self.last_full_reconcile:
+            return True
+
+        last = datetime.fromisoformat(self.last_full_reconcile)
+        return datetime.utcnow() - last >= timedelta(hours=interval_hours)
+
+
+class OrderSyncState:
+    """Watermark de la synchro des commandes et date de la dernière réconciliation complète"""
+
+    def __init__(self, path: str = None):
+        self.path = Path(path or os.getenv("ORDERS_SYNC_STATE_FILE", "./data/orders_sync_state.json"))
+        self.last_sync: Optional[str] = None
+        self.last_full_reconcile: Optional[str] = None
+        self.load()
+
+    def load(self):
+        """Charge l'état depuis le disque (état vide si absent ou illisible)"""
+        if not self.path.exists():
+            return
+
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+
+        self.last_sync = data.get('last_sync')
+        self.last_full_reconcile = data.get('last_full_reconcile')
+
+    def save(self):
+        """Écrit l'état de manière atomique"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + '.tmp')
+        tmp_path.write_text(json.dumps({
+            'last_sync': self.last_sync,
+            'last_full_reconcile': self.last_full_reconcile,
+        }), encoding="utf-8")
+        os.replace(tmp_path, self.path)
+
+    def needs_full_reconcile(self, interval_hours: float) -> bool:
+        """Indique si une réconciliation complète est due"""
+        if not self.last_sync or not self.last_full_reconcile:
+            return True
+
+        last = datetime.fromisoformat(self.last_full_reconcile)
+        return datetime.utcnow() - last >= timedelta(hours=interval_hours)
@@ -0,0 +1,75 @@
+"""
+Cache LRU en mémoire lié à la version du catalogue
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+from src.utils.catalog_version import CatalogVersionWatcher
+
+
+class VersionedCache:
+    """
+    Entrées évincées au-delà de `max_entries` (les moins récemment utilisées),
+    expirées après `ttl` secondes, et tout le cache vidé quand la version du
+    catalogue change (synchro, rafraîchissement du stock, webhook).
+    """
+
+    def __init__(self, ttl: float, max_entries: int, watcher: CatalogVersionWatcher = None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.watcher = watcher or CatalogVersionWatcher()
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = self.watcher.current()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.invalidations = 0
+
+    def _check_version(self):
+        version = self.watcher.current()
+        if version != self._version:
+            self._version = version
+            if self._entries:
+                self._entries.clear()
+                self.invalidations += 1
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Valeur en cache (None si absente, expirée ou invalidée)"""
+        with self._lock:
+            self._check_version()
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[1] > self.ttl:
+                del self._entries[key]
+                self.expired += 1
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any):
+        with self._lock:
+            self._check_version()
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'entries': len(self._entries),
+            'expired': self.expired,
+            'invalidations': self.invalidations,
+        }